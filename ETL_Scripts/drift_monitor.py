@@ -0,0 +1,495 @@
+"""Profile key mart objects each run and flag drift against recent runs."""
+
+from __future__ import annotations
+
+import math
+import statistics
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import duckdb
+
+
+METRICS_TABLE = "mart._profile_metrics"
+SKETCHES_TABLE = "mart._profile_sketches"
+DRIFT_REPORT_TABLE = "mart._drift_report"
+
+DEFAULT_HISTORY_RUNS = 5
+# Relative accuracy of quantiles read from the sketches.
+SKETCH_RELATIVE_ACCURACY = 0.02
+SKETCH_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+SKETCH_QUANTILES = (0.5, 0.9, 0.99)
+
+# Allowed change from the baseline per metric family. Rates are compared by
+# absolute difference, everything else by change relative to the baseline.
+DEFAULT_THRESHOLDS = {
+    "row_count": 0.2,
+    "null_rate": 0.02,
+    "quantile": 0.25,
+    "aggregate": 0.3,
+    "rate": 0.05,
+}
+ABSOLUTE_FAMILIES = ("null_rate", "rate")
+
+
+@dataclass(frozen=True)
+class ProfileSpec:
+    """What to profile on one table or view.
+
+    ``segment_metrics`` are read per value of ``segment_column`` (or once,
+    without a segment column); they are meant for small aggregated views.
+    """
+
+    object_name: str
+    null_columns: Tuple[str, ...] = ()
+    sketch_columns: Tuple[str, ...] = ()
+    segment_column: Optional[str] = None
+    segment_metrics: Tuple[str, ...] = ()
+
+
+PROFILES: List[ProfileSpec] = [
+    ProfileSpec(
+        "mart.fact_orders",
+        null_columns=("customer_sk", "purchase_date_key", "review_score", "delivery_days"),
+        sketch_columns=("gmv", "freight_value", "payment_value", "delivery_days", "delay_days"),
+    ),
+    ProfileSpec(
+        "mart.fact_order_items",
+        null_columns=("product_sk", "seller_sk"),
+        sketch_columns=("item_price", "item_freight_value"),
+    ),
+    ProfileSpec("mart.dim_customer"),
+    ProfileSpec("mart.dim_product"),
+    ProfileSpec("mart.dim_seller"),
+    ProfileSpec(
+        "mart.vw_exec_summary_monthly",
+        segment_column="month_start",
+        segment_metrics=("gmv", "order_count", "aov"),
+    ),
+    ProfileSpec(
+        "mart.vw_ops_monthly_logistics",
+        segment_column="month_start",
+        segment_metrics=("avg_delivery_days", "on_time_rate"),
+    ),
+    ProfileSpec(
+        "mart.vw_ops_state_bottlenecks",
+        segment_column="customer_state",
+        segment_metrics=("order_count", "avg_delivery_days", "on_time_rate", "severe_delay_rate"),
+    ),
+    ProfileSpec(
+        "mart.vw_csat_kpis",
+        segment_metrics=("avg_review_score", "one_star_rate", "low_score_rate"),
+    ),
+]
+
+
+@dataclass(frozen=True)
+class Metric:
+    object_name: str
+    metric: str
+    segment: str
+    family: str
+    value: Optional[float]
+
+
+@dataclass(frozen=True)
+class DriftResult:
+    object_name: str
+    metric: str
+    segment: str
+    family: str
+    current_value: Optional[float]
+    baseline_value: Optional[float]
+    baseline_runs: int
+    change: Optional[float]
+    threshold: float
+    status: str
+
+
+# (sign, bucket) -> count; the mergeable form of a column's distribution.
+Sketch = Dict[Tuple[int, int], int]
+
+
+def profiled_relations(profiles: Iterable[ProfileSpec] = PROFILES) -> FrozenSet[str]:
+    return frozenset(spec.object_name for spec in profiles)
+
+
+def metric_family(metric: str) -> str:
+    return "rate" if metric.endswith("_rate") else "aggregate"
+
+
+def sketch_query(spec: ProfileSpec) -> str:
+    """Log-bucketed histogram of every sketch column in one scan.
+
+    A value ``v`` lands in bucket ``ceil(log_gamma(|v|))`` of its sign, so
+    bucket counts from different runs, months or shards merge by addition.
+    """
+    casts = ", ".join(f"CAST({column} AS DOUBLE) AS {column}" for column in spec.sketch_columns)
+    columns = ", ".join(spec.sketch_columns)
+    return f"""
+        SELECT
+            column_name,
+            CAST(SIGN(value) AS TINYINT) AS sign,
+            CASE
+                WHEN value = 0 THEN 0
+                ELSE CAST(CEIL(LN(ABS(value)) / LN({SKETCH_GAMMA!r})) AS INTEGER)
+            END AS bucket,
+            COUNT(*) AS count
+        FROM (
+            UNPIVOT (SELECT {casts} FROM {spec.object_name})
+            ON {columns}
+            INTO NAME column_name VALUE value
+        )
+        WHERE isfinite(value)
+        GROUP BY ALL
+    """
+
+
+def sketch_quantile(sketch: Sketch, quantile: float) -> Optional[float]:
+    """Approximate quantile, within SKETCH_RELATIVE_ACCURACY of the true value."""
+    total = sum(sketch.values())
+    if total == 0:
+        return None
+    # Negative buckets hold larger magnitudes at higher indexes, so they sort descending.
+    ordered = sorted(sketch.items(), key=lambda item: (item[0][0], item[0][1] * item[0][0]))
+    rank = quantile * (total - 1)
+    seen = 0
+    for (sign, bucket), count in ordered:
+        seen += count
+        if seen > rank:
+            if sign == 0:
+                return 0.0
+            return sign * 2 * SKETCH_GAMMA**bucket / (SKETCH_GAMMA + 1)
+    return None
+
+
+def merge_sketches(sketches: Iterable[Sketch]) -> Sketch:
+    merged: Sketch = {}
+    for sketch in sketches:
+        for key, count in sketch.items():
+            merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def ensure_profile_tables(conn: duckdb.DuckDBPyConnection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+            run_id VARCHAR,
+            captured_at TIMESTAMP,
+            object_name VARCHAR,
+            metric VARCHAR,
+            segment VARCHAR,
+            family VARCHAR,
+            value DOUBLE
+        );
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SKETCHES_TABLE} (
+            run_id VARCHAR,
+            captured_at TIMESTAMP,
+            object_name VARCHAR,
+            column_name VARCHAR,
+            sign TINYINT,
+            bucket INTEGER,
+            count BIGINT
+        );
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {DRIFT_REPORT_TABLE} (
+            run_id VARCHAR,
+            checked_at TIMESTAMP,
+            object_name VARCHAR,
+            metric VARCHAR,
+            segment VARCHAR,
+            family VARCHAR,
+            current_value DOUBLE,
+            baseline_value DOUBLE,
+            baseline_runs INTEGER,
+            change DOUBLE,
+            threshold DOUBLE,
+            status VARCHAR
+        );
+        """
+    )
+
+
+def insert_rows(
+    conn: duckdb.DuckDBPyConnection, table: str, rows: Sequence[Sequence[object]]
+) -> None:
+    """Append ``rows`` with one statement; executemany costs a round trip per row."""
+    if not rows:
+        return
+    columns = list(zip(*rows))
+    unnested = ", ".join(f"UNNEST(${index})" for index in range(1, len(columns) + 1))
+    conn.execute(f"INSERT INTO {table} SELECT {unnested}", [list(column) for column in columns])
+
+
+def profile_object(
+    conn: duckdb.DuckDBPyConnection, spec: ProfileSpec
+) -> Tuple[List[Metric], Dict[str, Sketch]]:
+    """Row count, null rates, segment metrics and sketches for one object."""
+    name = spec.object_name
+    metrics: List[Metric] = []
+    null_counts = "".join(
+        f", COUNT(*) FILTER (WHERE {column} IS NULL)" for column in spec.null_columns
+    )
+    row = conn.execute(f"SELECT COUNT(*){null_counts} FROM {name}").fetchone()
+    rows = row[0]
+    metrics.append(Metric(name, "row_count", "", "row_count", float(rows)))
+    for column, nulls in zip(spec.null_columns, row[1:]):
+        rate = nulls / rows if rows else None
+        metrics.append(Metric(name, f"null_rate:{column}", "", "null_rate", rate))
+
+    if spec.segment_metrics:
+        segment = f"CAST({spec.segment_column} AS VARCHAR)" if spec.segment_column else "''"
+        values = ", ".join(f"CAST({metric} AS DOUBLE)" for metric in spec.segment_metrics)
+        for segment_value, *metric_values in conn.execute(
+            f"SELECT {segment}, {values} FROM {name}"
+        ).fetchall():
+            for metric, value in zip(spec.segment_metrics, metric_values):
+                metrics.append(
+                    Metric(name, metric, segment_value or "", metric_family(metric), value)
+                )
+
+    sketches: Dict[str, Sketch] = {column: {} for column in spec.sketch_columns}
+    if spec.sketch_columns:
+        for column, sign, bucket, count in conn.execute(sketch_query(spec)).fetchall():
+            sketches[column][(sign, bucket)] = count
+        for column, sketch in sketches.items():
+            for quantile in SKETCH_QUANTILES:
+                metrics.append(
+                    Metric(
+                        name,
+                        f"p{quantile * 100:g}:{column}",
+                        "",
+                        "quantile",
+                        sketch_quantile(sketch, quantile),
+                    )
+                )
+    return metrics, sketches
+
+
+def previous_runs(conn: duckdb.DuckDBPyConnection, run_id: str, history: int) -> List[str]:
+    rows = conn.execute(
+        f"""
+        SELECT run_id
+        FROM {METRICS_TABLE}
+        WHERE run_id <> ?
+        GROUP BY run_id
+        ORDER BY MAX(captured_at) DESC
+        LIMIT ?
+        """,
+        [run_id, history],
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def baseline_metrics(
+    conn: duckdb.DuckDBPyConnection, run_ids: Sequence[str]
+) -> Dict[Tuple[str, str, str], List[float]]:
+    if not run_ids:
+        return {}
+    rows = conn.execute(
+        f"""
+        SELECT object_name, metric, segment, value
+        FROM {METRICS_TABLE}
+        WHERE list_contains(?, run_id)
+          AND family <> 'quantile'
+          AND value IS NOT NULL
+        """,
+        [list(run_ids)],
+    ).fetchall()
+    values: Dict[Tuple[str, str, str], List[float]] = {}
+    for object_name, metric, segment, value in rows:
+        values.setdefault((object_name, metric, segment), []).append(value)
+    return values
+
+
+def baseline_sketches(
+    conn: duckdb.DuckDBPyConnection, run_ids: Sequence[str]
+) -> Dict[Tuple[str, str], Tuple[Sketch, int]]:
+    """Per-column sketch merged over ``run_ids``, with the number of runs merged."""
+    if not run_ids:
+        return {}
+    rows = conn.execute(
+        f"""
+        SELECT object_name, column_name, run_id, sign, bucket, count
+        FROM {SKETCHES_TABLE}
+        WHERE list_contains(?, run_id)
+        """,
+        [list(run_ids)],
+    ).fetchall()
+    per_run: Dict[Tuple[str, str], Dict[str, Sketch]] = {}
+    for object_name, column, sketch_run, sign, bucket, count in rows:
+        per_run.setdefault((object_name, column), {}).setdefault(sketch_run, {})[
+            (sign, bucket)
+        ] = count
+    return {
+        key: (merge_sketches(sketches.values()), len(sketches))
+        for key, sketches in per_run.items()
+    }
+
+
+def compare(
+    metric: Metric, baseline: Optional[float], runs: int, thresholds: Dict[str, float]
+) -> DriftResult:
+    threshold = thresholds[metric.family]
+    change: Optional[float] = None
+    if baseline is None:
+        status = "new"
+    elif metric.value is None:
+        status = "missing"
+    elif metric.family in ABSOLUTE_FAMILIES:
+        change = metric.value - baseline
+        status = "drift" if abs(change) > threshold else "ok"
+    elif baseline == 0:
+        status = "ok" if metric.value == 0 else "drift"
+    else:
+        change = (metric.value - baseline) / abs(baseline)
+        status = "drift" if abs(change) > threshold else "ok"
+    return DriftResult(
+        metric.object_name,
+        metric.metric,
+        metric.segment,
+        metric.family,
+        metric.value,
+        baseline,
+        runs,
+        change,
+        threshold,
+        status,
+    )
+
+
+def run_drift_monitor(
+    conn: duckdb.DuckDBPyConnection,
+    run_id: str,
+    profiles: Iterable[ProfileSpec] = PROFILES,
+    history: int = DEFAULT_HISTORY_RUNS,
+    thresholds: Optional[Dict[str, float]] = None,
+    keep_drifted: bool = True,
+) -> List[DriftResult]:
+    """Snapshot ``profiles`` under ``run_id`` and compare them with recent runs.
+
+    Scalar metrics are compared with their median over the last ``history``
+    runs; quantiles with those of the sketch merged over the same runs, so
+    history is never re-scanned. With ``keep_drifted`` unset, a snapshot with
+    drifted metrics is only reported and never joins the baseline.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    ensure_profile_tables(conn)
+    captured_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    run_ids = previous_runs(conn, run_id, history)
+    history_values = baseline_metrics(conn, run_ids)
+    history_sketches = baseline_sketches(conn, run_ids)
+
+    results: List[DriftResult] = []
+    metric_rows: List[List[object]] = []
+    sketch_rows: List[List[object]] = []
+    for spec in profiles:
+        metrics, sketches = profile_object(conn, spec)
+        for metric in metrics:
+            metric_rows.append(
+                [
+                    run_id,
+                    captured_at,
+                    metric.object_name,
+                    metric.metric,
+                    metric.segment,
+                    metric.family,
+                    metric.value,
+                ]
+            )
+            if metric.family == "quantile":
+                quantile_text, column = metric.metric.split(":", 1)
+                merged, runs = history_sketches.get((spec.object_name, column), ({}, 0))
+                baseline = sketch_quantile(merged, float(quantile_text[1:]) / 100)
+            else:
+                values = history_values.get((metric.object_name, metric.metric, metric.segment), [])
+                runs = len(values)
+                baseline = statistics.median(values) if values else None
+            results.append(compare(metric, baseline, runs, thresholds))
+        for column, sketch in sketches.items():
+            sketch_rows.extend(
+                [run_id, captured_at, spec.object_name, column, sign, bucket, count]
+                for (sign, bucket), count in sketch.items()
+            )
+
+    if keep_drifted or not any(result.status == "drift" for result in results):
+        insert_rows(conn, METRICS_TABLE, metric_rows)
+        insert_rows(conn, SKETCHES_TABLE, sketch_rows)
+    insert_rows(
+        conn,
+        DRIFT_REPORT_TABLE,
+        [
+            [
+                run_id,
+                captured_at,
+                result.object_name,
+                result.metric,
+                result.segment,
+                result.family,
+                result.current_value,
+                result.baseline_value,
+                result.baseline_runs,
+                result.change,
+                result.threshold,
+                result.status,
+            ]
+            for result in results
+        ],
+    )
+    return results
+
+
+def drift_unresolved(conn: duckdb.DuckDBPyConnection) -> bool:
+    """Whether the latest drift report was rejected and must be checked again."""
+    ensure_profile_tables(conn)
+    row = conn.execute(
+        f"""
+        WITH latest AS (
+            SELECT run_id
+            FROM {DRIFT_REPORT_TABLE}
+            ORDER BY checked_at DESC
+            LIMIT 1
+        )
+        SELECT COUNT(*)
+        FROM latest
+        WHERE run_id NOT IN (SELECT DISTINCT run_id FROM {METRICS_TABLE})
+        """
+    ).fetchone()
+    return bool(row[0])
+
+
+def format_drift(result: DriftResult) -> str:
+    segment = f"[{result.segment}]" if result.segment else ""
+    if result.family in ABSOLUTE_FAMILIES:
+        change = f"{result.change:+.4f}" if result.change is not None else "n/a"
+    else:
+        change = f"{result.change:+.1%}" if result.change is not None else "from zero"
+    return (
+        f"{result.object_name} {result.metric}{segment}: {result.current_value:.4g} "
+        f"vs baseline {result.baseline_value:.4g} ({change}, limit {result.threshold:g})"
+    )
+
+
+def parse_thresholds(values: Sequence[str]) -> Dict[str, float]:
+    """``family=value`` pairs from the command line."""
+    thresholds: Dict[str, float] = {}
+    for item in values:
+        family, _, value = item.partition("=")
+        if family not in DEFAULT_THRESHOLDS or not value:
+            raise ValueError(
+                f"Invalid drift threshold {item!r}; expected one of "
+                f"{', '.join(DEFAULT_THRESHOLDS)} as family=value"
+            )
+        thresholds[family] = float(value)
+        if not math.isfinite(thresholds[family]) or thresholds[family] < 0:
+            raise ValueError(f"Drift threshold must be a non-negative number: {item!r}")
+    return thresholds
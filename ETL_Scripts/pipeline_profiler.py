@@ -0,0 +1,223 @@
+"""Step-level timing, row count and memory instrumentation for pipeline runs."""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import duckdb
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - resource is unavailable on Windows
+    resource = None
+
+
+RUNS_TABLE = "mart._pipeline_runs"
+STEPS_TABLE = "mart._pipeline_steps"
+
+DEFAULT_SAMPLE_INTERVAL = 0.05
+
+
+@dataclass
+class StepRecord:
+    phase: str
+    step_name: str
+    started_at: datetime
+    duration_s: float
+    rows_produced: Optional[int] = None
+    peak_memory_bytes: Optional[int] = None
+
+
+@dataclass
+class StepCounter:
+    """Mutable handle yielded by ``PipelineProfiler.step`` to report rows."""
+
+    rows: Optional[int] = None
+
+
+def process_peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PipelineProfiler:
+    """Collect per-step timings and sampled DuckDB memory for one pipeline run.
+
+    A background thread samples ``duckdb_memory()`` on its own cursor; a
+    step's peak memory is the highest sample taken while it was running.
+    Steps timed on worker threads are added with ``record`` using
+    ``time.perf_counter`` timestamps.
+    """
+
+    def __init__(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ) -> None:
+        self.conn = conn
+        self.run_id = uuid.uuid4().hex
+        self.sample_interval = sample_interval
+        self.steps: List[StepRecord] = []
+        self.profiles: Dict[str, object] = {}
+        self._samples: List[Tuple[float, int]] = []
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._origin_wall = datetime.now(timezone.utc).replace(tzinfo=None)
+        self._origin_perf = time.perf_counter()
+
+    def start(self) -> None:
+        self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample_loop(self) -> None:
+        cursor = self.conn.cursor()
+        try:
+            while not self._stop.is_set():
+                used = cursor.execute(
+                    "SELECT COALESCE(SUM(memory_usage_bytes), 0) FROM duckdb_memory()"
+                ).fetchone()[0]
+                self._samples.append((time.perf_counter(), int(used)))
+                self._stop.wait(self.sample_interval)
+        finally:
+            cursor.close()
+
+    def wall_time(self, perf_value: float) -> datetime:
+        return self._origin_wall + timedelta(seconds=perf_value - self._origin_perf)
+
+    def peak_between(self, started: float, finished: float) -> Optional[int]:
+        window = [
+            used
+            for at, used in list(self._samples)
+            if started <= at <= finished + self.sample_interval
+        ]
+        return max(window) if window else None
+
+    def record(
+        self,
+        phase: str,
+        step_name: str,
+        started: float,
+        finished: float,
+        rows: Optional[int] = None,
+    ) -> StepRecord:
+        step = StepRecord(
+            phase=phase,
+            step_name=step_name,
+            started_at=self.wall_time(started),
+            duration_s=finished - started,
+            rows_produced=rows,
+            peak_memory_bytes=self.peak_between(started, finished),
+        )
+        self.steps.append(step)
+        return step
+
+    @contextmanager
+    def step(self, phase: str, step_name: str) -> Iterator[StepCounter]:
+        counter = StepCounter()
+        started = time.perf_counter()
+        try:
+            yield counter
+        finally:
+            self.record(phase, step_name, started, time.perf_counter(), counter.rows)
+
+    def add_profile(self, step_name: str, profile_path: Path) -> None:
+        try:
+            self.profiles[step_name] = json.loads(profile_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.profiles[step_name] = None
+
+    def finish(self, status: str, options: Dict[str, object]) -> Dict[str, object]:
+        """Persist the run and its steps, returning the JSON-ready report."""
+        self.stop()
+        finished_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        peak_memory = max((used for _, used in self._samples), default=None)
+        run = {
+            "run_id": self.run_id,
+            "started_at": self._origin_wall,
+            "finished_at": finished_at,
+            "duration_s": (finished_at - self._origin_wall).total_seconds(),
+            "status": status,
+            "step_count": len(self.steps),
+            "peak_memory_bytes": peak_memory,
+            "peak_rss_bytes": process_peak_rss_bytes(),
+            "options": json.dumps(options, default=str, sort_keys=True),
+        }
+
+        self.conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+                run_id VARCHAR PRIMARY KEY,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                duration_s DOUBLE,
+                status VARCHAR,
+                step_count INTEGER,
+                peak_memory_bytes BIGINT,
+                peak_rss_bytes BIGINT,
+                options VARCHAR
+            );
+            """
+        )
+        self.conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {STEPS_TABLE} (
+                run_id VARCHAR,
+                phase VARCHAR,
+                step_name VARCHAR,
+                started_at TIMESTAMP,
+                duration_s DOUBLE,
+                rows_produced BIGINT,
+                peak_memory_bytes BIGINT
+            );
+            """
+        )
+        self.conn.execute(
+            f"INSERT INTO {RUNS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            list(run.values()),
+        )
+        if self.steps:
+            self.conn.executemany(
+                f"INSERT INTO {STEPS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    [
+                        self.run_id,
+                        step.phase,
+                        step.step_name,
+                        step.started_at,
+                        step.duration_s,
+                        step.rows_produced,
+                        step.peak_memory_bytes,
+                    ]
+                    for step in self.steps
+                ],
+            )
+
+        return {
+            "run": {**run, "options": options},
+            "steps": [asdict(step) for step in self.steps],
+            "profiles": self.profiles,
+        }
+
+
+def write_report(report: Dict[str, object], report_path: Path) -> None:
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with report_path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, default=str, indent=2)
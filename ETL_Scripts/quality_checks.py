@@ -0,0 +1,607 @@
+"""Declarative warehouse quality checks, evaluated with one aggregate scan per table."""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import math
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import duckdb
+
+
+QUALITY_TABLE = "mart.data_quality_checks"
+WATERMARK_TABLE = "mart._quality_watermarks"
+
+CHECK_KINDS = ("not_null", "unique", "range", "referential", "row_count")
+CHECK_MODES = ("full", "incremental", "sample")
+DEFAULT_CHECK_MODE = "full"
+DEFAULT_LOOKBACK_DAYS = 30
+DEFAULT_SAMPLE_CONFIDENCE = 0.95
+DEFAULT_SAMPLE_MARGIN = 0.01
+
+# Modes each kind can be evaluated in when a check does not list its own.
+# Row counts and uniqueness say nothing about a table from a random sample.
+KIND_MODES = {
+    "row_count": ("full",),
+    "unique": ("full", "incremental"),
+    "not_null": ("full", "incremental", "sample"),
+    "range": ("full", "incremental", "sample"),
+    "referential": ("full", "incremental", "sample"),
+}
+
+# YYYYMMDD key bounding the newly loaded rows of a table in incremental mode.
+INCREMENTAL_DATE_KEYS = {
+    "mart.fact_orders": "purchase_date_key",
+    "mart.fact_order_items": "purchase_date_key",
+}
+
+
+@dataclass(frozen=True)
+class QualityCheck:
+    """One rule on ``table``; which fields apply depends on ``kind``.
+
+    - ``not_null``: ``column`` has no NULLs, or a NULL ratio below ``max_null_ratio``.
+    - ``unique``: non-NULL values of ``column`` are distinct.
+    - ``range``: non-NULL values of ``column`` lie within ``min_value``/``max_value``.
+    - ``referential``: non-NULL values of ``column`` exist in ``ref_table.ref_column``.
+    - ``row_count``: the table has at least ``min_rows`` rows.
+
+    ``modes`` lists the modes the check may run in (default: ``KIND_MODES``);
+    in any other mode it is evaluated in full.
+    """
+
+    name: str
+    table: str
+    kind: str
+    column: Optional[str] = None
+    max_null_ratio: Optional[float] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    ref_table: Optional[str] = None
+    ref_column: Optional[str] = None
+    min_rows: int = 1
+    modes: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if self.kind not in CHECK_KINDS:
+            raise ValueError(f"Unknown check kind for {self.name}: {self.kind}")
+        if self.kind != "row_count" and not self.column:
+            raise ValueError(f"Check {self.name} ({self.kind}) needs a column")
+        if self.kind == "range" and self.min_value is None and self.max_value is None:
+            raise ValueError(f"Range check {self.name} needs min_value or max_value")
+        if self.kind == "referential" and not (self.ref_table and self.ref_column):
+            raise ValueError(f"Referential check {self.name} needs ref_table and ref_column")
+        if not self.modes:
+            object.__setattr__(self, "modes", KIND_MODES[self.kind])
+        unsupported = set(self.modes) - set(KIND_MODES[self.kind])
+        if unsupported or "full" not in self.modes:
+            raise ValueError(
+                f"Check {self.name} ({self.kind}) supports modes {KIND_MODES[self.kind]}, "
+                f"got {self.modes}"
+            )
+
+    @property
+    def relations(self) -> FrozenSet[str]:
+        return frozenset(filter(None, (self.table, self.ref_table)))
+
+    def aggregates(self, window: Optional[str] = None) -> Tuple[str, str]:
+        """``(passed, observed)`` aggregate expressions over one scan of ``table``.
+
+        ``window`` is the incremental row predicate the scan is filtered by.
+        """
+        column = self.column
+        if self.kind == "row_count":
+            return f"COUNT(*) >= {self.min_rows}", "COUNT(*)"
+        if self.kind == "not_null" and self.max_null_ratio is not None:
+            nulls, rows = self.violations()
+            ratio = f"{nulls}::DOUBLE / NULLIF({rows}, 0)"
+            return f"{ratio} < {self.max_null_ratio!r}", ratio
+        if self.kind == "unique":
+            if window is not None:
+                # Keys touched by the window that occur more than once anywhere.
+                duplicates = (
+                    f"(SELECT COUNT(*) FROM (SELECT {column} FROM {self.table} "
+                    f"WHERE {column} IN (SELECT {column} FROM {self.table} WHERE {window}) "
+                    f"GROUP BY {column} HAVING COUNT(*) > 1))"
+                )
+                return f"{duplicates} = 0", duplicates
+            return (
+                f"COUNT({column}) = COUNT(DISTINCT {column})",
+                f"CAST(COUNT({column}) AS VARCHAR) || '/' "
+                f"|| CAST(COUNT(DISTINCT {column}) AS VARCHAR)",
+            )
+        violations, _ = self.violations()
+        return f"{violations} = 0", violations
+
+    def violations(self) -> Tuple[str, str]:
+        """``(violating rows, rows judged)`` aggregates for rate-style checks."""
+        column = self.column
+        if self.kind == "not_null":
+            return f"COUNT(*) FILTER (WHERE {column} IS NULL)", "COUNT(*)"
+        if self.kind == "range":
+            bounds = []
+            if self.min_value is not None:
+                bounds.append(f"{column} < {self.min_value!r}")
+            if self.max_value is not None:
+                bounds.append(f"{column} > {self.max_value!r}")
+            return (
+                f"COUNT(*) FILTER (WHERE {column} IS NOT NULL AND ({' OR '.join(bounds)}))",
+                f"COUNT({column})",
+            )
+        if self.kind == "referential":
+            return (
+                f"COUNT(*) FILTER (WHERE {column} IS NOT NULL AND {column} NOT IN "
+                f"(SELECT {self.ref_column} FROM {self.ref_table} "
+                f"WHERE {self.ref_column} IS NOT NULL))",
+                f"COUNT({column})",
+            )
+        raise ValueError(f"Check {self.name} ({self.kind}) has no violation rate")
+
+    def passes_sample(self, high: float, violations: int) -> bool:
+        """Sampled verdict: ratio checks need the upper bound below the limit."""
+        if self.kind == "not_null" and self.max_null_ratio is not None:
+            return high < self.max_null_ratio
+        return violations == 0
+
+
+QUALITY_CHECKS: List[QualityCheck] = [
+    QualityCheck("fact_orders_not_empty", "mart.fact_orders", "row_count"),
+    QualityCheck("fact_orders_order_id_not_null", "mart.fact_orders", "not_null", "order_id"),
+    QualityCheck("fact_orders_unique_order_id", "mart.fact_orders", "unique", "order_id"),
+    QualityCheck(
+        "fact_orders_review_score_between_1_and_5",
+        "mart.fact_orders",
+        "range",
+        "review_score",
+        min_value=1,
+        max_value=5,
+    ),
+    QualityCheck(
+        "fact_orders_non_negative_payment_value",
+        "mart.fact_orders",
+        "range",
+        "payment_value",
+        min_value=0,
+    ),
+    QualityCheck(
+        "fact_orders_customer_sk_null_ratio_lt_5pct",
+        "mart.fact_orders",
+        "not_null",
+        "customer_sk",
+        max_null_ratio=0.05,
+    ),
+    QualityCheck(
+        "fact_orders_customer_sk_in_dim_customer",
+        "mart.fact_orders",
+        "referential",
+        "customer_sk",
+        ref_table="mart.dim_customer",
+        ref_column="customer_sk",
+    ),
+    QualityCheck("fact_order_items_not_empty", "mart.fact_order_items", "row_count"),
+    QualityCheck(
+        "fact_order_items_order_id_in_fact_orders",
+        "mart.fact_order_items",
+        "referential",
+        "order_id",
+        ref_table="mart.fact_orders",
+        ref_column="order_id",
+    ),
+    QualityCheck("dim_customer_unique_customer_sk", "mart.dim_customer", "unique", "customer_sk"),
+    QualityCheck("dim_time_not_empty", "mart.dim_time", "row_count"),
+]
+
+
+@dataclass(frozen=True)
+class CheckPlan:
+    """How one evaluation scans the tables.
+
+    ``since_keys`` maps tables to the first date key of their incremental
+    window; tables without an entry are checked in full in incremental mode.
+    """
+
+    mode: str = "full"
+    since_keys: Dict[str, int] = field(default_factory=dict)
+    sample_rows: int = 0
+    confidence: float = DEFAULT_SAMPLE_CONFIDENCE
+    seed: int = 0
+
+    def mode_for(self, check: QualityCheck) -> str:
+        if self.mode not in check.modes:
+            return "full"
+        if self.mode == "incremental" and check.table not in self.since_keys:
+            return "full"
+        return self.mode
+
+
+@dataclass(frozen=True)
+class CheckResult:
+    check_name: str
+    check_type: str
+    table_name: str
+    check_mode: str
+    passed: Optional[bool]
+    observed_value: Optional[str]
+    rows_checked: int
+    violation_rate_low: Optional[float]
+    violation_rate_high: Optional[float]
+    duration_s: float
+
+
+@dataclass(frozen=True)
+class TableScan:
+    table: str
+    mode: str
+    started: float
+    finished: float
+    results: Tuple[CheckResult, ...]
+    high_water_key: Optional[int] = None
+
+
+def checks_by_table(checks: Iterable[QualityCheck]) -> Dict[str, List[QualityCheck]]:
+    grouped: Dict[str, List[QualityCheck]] = {}
+    names = set()
+    for check in checks:
+        if check.name in names:
+            raise ValueError(f"Quality check defined more than once: {check.name}")
+        names.add(check.name)
+        grouped.setdefault(check.table, []).append(check)
+    return grouped
+
+
+def sample_size(confidence: float, margin: float) -> int:
+    """Rows needed to estimate any rate within ``margin`` at ``confidence``."""
+    if not 0 < confidence < 1 or not 0 < margin < 1:
+        raise ValueError("Sample confidence and margin must be between 0 and 1")
+    z = statistics.NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    return math.ceil(z * z * 0.25 / (margin * margin))
+
+
+def wilson_interval(violations: int, rows: int, confidence: float) -> Tuple[float, float]:
+    """Wilson score interval for a violation rate observed in a sample."""
+    if rows == 0:
+        return 0.0, 1.0
+    z = statistics.NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    rate = violations / rows
+    denominator = 1 + z * z / rows
+    centre = (rate + z * z / (2 * rows)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / rows + z * z / (4 * rows * rows)) / denominator
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+def window_predicate(table: str, since_key: int) -> str:
+    return f"{INCREMENTAL_DATE_KEYS[table]} >= {since_key}"
+
+
+def compile_table_scan(
+    table: str, checks: List[QualityCheck], mode: str = "full", plan: CheckPlan = CheckPlan()
+) -> str:
+    """One SELECT evaluating every check on ``table`` in ``mode``.
+
+    Columns are ``scanned_rows`` and ``high_water_key``, then a pair per check:
+    passed/observed, or violations/judged rows when sampling.
+    """
+    date_key = INCREMENTAL_DATE_KEYS.get(table)
+    columns = [
+        "COUNT(*) AS scanned_rows",
+        f"MAX({date_key}) AS high_water_key" if date_key else "NULL AS high_water_key",
+    ]
+    window = window_predicate(table, plan.since_keys[table]) if mode == "incremental" else None
+    for position, check in enumerate(checks):
+        if mode == "sample":
+            violations, judged = check.violations()
+            columns.append(f"{violations} AS violations_{position}")
+            columns.append(f"{judged} AS judged_{position}")
+        else:
+            passed, observed = check.aggregates(window)
+            columns.append(f"{passed} AS passed_{position}")
+            columns.append(f"CAST({observed} AS VARCHAR) AS observed_{position}")
+
+    source = table
+    if mode == "sample":
+        source += f" USING SAMPLE reservoir({plan.sample_rows} ROWS) REPEATABLE ({plan.seed})"
+    elif window is not None:
+        source += f" WHERE {window}"
+    return "SELECT\n    " + ",\n    ".join(columns) + f"\nFROM {source}"
+
+
+def registry_hash(checks: Iterable[QualityCheck], mode: str = "full") -> str:
+    """Changes whenever a check is added, removed or edited, or the mode changes."""
+    grouped = checks_by_table(checks)
+    compiled = "\n;\n".join(
+        f"{[(check.name, check.modes) for check in grouped[table]]}\n"
+        f"{compile_table_scan(table, grouped[table])}"
+        for table in sorted(grouped)
+    )
+    return hashlib.sha256(f"{mode}\n{compiled}".encode("utf-8")).hexdigest()
+
+
+def checked_relations(checks: Iterable[QualityCheck]) -> FrozenSet[str]:
+    return frozenset().union(*(check.relations for check in checks))
+
+
+def scan_table(
+    conn: duckdb.DuckDBPyConnection,
+    table: str,
+    checks: List[QualityCheck],
+    mode: str = "full",
+    plan: CheckPlan = CheckPlan(),
+) -> TableScan:
+    cursor = conn.cursor()
+    try:
+        started = time.perf_counter()
+        row = cursor.execute(compile_table_scan(table, checks, mode, plan)).fetchone()
+        finished = time.perf_counter()
+    finally:
+        cursor.close()
+    scanned_rows, high_water_key = row[0], row[1]
+
+    results = []
+    for position, check in enumerate(checks):
+        first, second = row[2 + 2 * position], row[3 + 2 * position]
+        low = high = None
+        if mode == "sample":
+            if scanned_rows < plan.sample_rows:
+                # The reservoir took the whole table, so the rate is exact.
+                low = high = first / second if second else 0.0
+            else:
+                low, high = wilson_interval(first, second, plan.confidence)
+            passed: Optional[bool] = check.passes_sample(high, first)
+            observed: Optional[str] = f"{first}/{second}"
+            rows_checked = second
+        else:
+            passed, observed, rows_checked = first, second, scanned_rows
+        # Every check on the table shares the scan, so each reports the scan's time.
+        results.append(
+            CheckResult(
+                check_name=check.name,
+                check_type=check.kind,
+                table_name=table,
+                check_mode=mode,
+                passed=passed,
+                observed_value=observed,
+                rows_checked=rows_checked,
+                violation_rate_low=low,
+                violation_rate_high=high,
+                duration_s=finished - started,
+            )
+        )
+    return TableScan(table, mode, started, finished, tuple(results), high_water_key)
+
+
+def run_quality_checks(
+    conn: duckdb.DuckDBPyConnection,
+    checks: Iterable[QualityCheck] = QUALITY_CHECKS,
+    jobs: int = 1,
+    plan: CheckPlan = CheckPlan(),
+) -> List[TableScan]:
+    """Scan each checked table once per mode in use, up to ``jobs`` scans at a time."""
+    groups: Dict[Tuple[str, str], List[QualityCheck]] = {}
+    for table, table_checks in checks_by_table(checks).items():
+        for check in table_checks:
+            groups.setdefault((table, plan.mode_for(check)), []).append(check)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [
+            pool.submit(scan_table, conn, table, group_checks, mode, plan)
+            for (table, mode), group_checks in groups.items()
+        ]
+        return [future.result() for future in futures]
+
+
+def read_watermarks(conn: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    schema, name = WATERMARK_TABLE.split(".")
+    exists = conn.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = ? AND table_name = ?",
+        [schema, name],
+    ).fetchone()[0]
+    if not exists:
+        return {}
+    rows = conn.execute(f"SELECT table_name, high_water_key FROM {WATERMARK_TABLE}").fetchall()
+    return {table: key for table, key in rows if key is not None}
+
+
+def write_watermarks(conn: duckdb.DuckDBPyConnection, scans: Iterable[TableScan]) -> None:
+    """Remember the newest date key each full or incremental scan has covered."""
+    checked_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = [
+        [scan.table, scan.high_water_key, checked_at]
+        for scan in scans
+        if scan.mode != "sample" and scan.high_water_key is not None
+    ]
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            table_name VARCHAR PRIMARY KEY,
+            high_water_key INTEGER,
+            checked_at TIMESTAMP
+        );
+        """
+    )
+    if rows:
+        conn.executemany(f"INSERT OR REPLACE INTO {WATERMARK_TABLE} VALUES (?, ?, ?)", rows)
+
+
+def shift_date_key(date_key: int, days: int) -> int:
+    shifted = date(date_key // 10000, date_key // 100 % 100, date_key % 100) + timedelta(days=days)
+    return int(shifted.strftime("%Y%m%d"))
+
+
+def build_plan(
+    conn: duckdb.DuckDBPyConnection,
+    mode: str,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+    confidence: float = DEFAULT_SAMPLE_CONFIDENCE,
+    margin: float = DEFAULT_SAMPLE_MARGIN,
+    seed: Optional[int] = None,
+    incremental_tables: Optional[Dict[str, Optional[int]]] = None,
+) -> CheckPlan:
+    """Resolve a mode into windows or sample size.
+
+    Incremental windows start ``lookback_days`` before the last covered date
+    key, so late deliveries and reviews on recent orders are re-checked.
+    ``incremental_tables`` restricts windows to the listed tables, each with the
+    earliest date key the window must still reach (e.g. of rows just upserted);
+    every other table is checked in full. By default any table with a
+    watermark gets a window.
+    """
+    if mode not in CHECK_MODES:
+        raise ValueError(f"Unknown check mode: {mode}")
+    if lookback_days < 0:
+        raise ValueError("Check lookback must be zero or positive")
+    since_keys: Dict[str, int] = {}
+    if mode == "incremental":
+        for table, key in read_watermarks(conn).items():
+            if table not in INCREMENTAL_DATE_KEYS:
+                continue
+            if incremental_tables is not None and table not in incremental_tables:
+                continue
+            since_key = shift_date_key(key, -lookback_days)
+            earliest = (incremental_tables or {}).get(table)
+            since_keys[table] = since_key if earliest is None else min(since_key, earliest)
+    return CheckPlan(
+        mode=mode,
+        since_keys=since_keys,
+        sample_rows=sample_size(confidence, margin) if mode == "sample" else 0,
+        confidence=confidence,
+        seed=random.randrange(2**31) if seed is None else seed,
+    )
+
+
+def describe_plan(plan: CheckPlan) -> str:
+    if plan.mode == "sample":
+        return (
+            f"sample of {plan.sample_rows:,} rows per table "
+            f"({plan.confidence:.0%} confidence, seed {plan.seed})"
+        )
+    if plan.mode == "incremental":
+        windows = ", ".join(f"{table} >= {key}" for table, key in sorted(plan.since_keys.items()))
+        return f"incremental ({windows or 'no watermark yet, full scan'})"
+    return "full"
+
+
+def format_check_failure(
+    check_name: str, check_mode: str, observed_value: Optional[str], rate_high: Optional[float]
+) -> str:
+    line = f"{check_name}: {observed_value}"
+    if check_mode != "full":
+        line += f" ({check_mode}"
+        line += f", violation rate up to {rate_high:.2%})" if rate_high is not None else ")"
+    return line
+
+
+def add_check_arguments(
+    parser: argparse.ArgumentParser, default_mode: str, extra_modes: Tuple[str, ...] = ()
+) -> None:
+    parser.add_argument(
+        "--check-mode",
+        choices=(*extra_modes, *CHECK_MODES),
+        default=default_mode,
+        help=(
+            "full: every row; incremental: rows since the last checked date key "
+            "(checks without incremental support, tables without a date key and, in "
+            "run_pipeline.py, tables not upserted by --incremental-models run in "
+            "full); sample: a random sample with confidence bounds (unique and "
+            "row_count checks have no sampled form and still scan in full) "
+            f"(default: {default_mode})."
+        ),
+    )
+    parser.add_argument(
+        "--check-lookback-days",
+        type=int,
+        default=DEFAULT_LOOKBACK_DAYS,
+        help=(
+            "Days before the last checked date key that incremental checks re-scan "
+            f"(default: {DEFAULT_LOOKBACK_DAYS})."
+        ),
+    )
+    parser.add_argument(
+        "--sample-confidence",
+        type=float,
+        default=DEFAULT_SAMPLE_CONFIDENCE,
+        help=f"Confidence level of sampled checks (default: {DEFAULT_SAMPLE_CONFIDENCE:g}).",
+    )
+    parser.add_argument(
+        "--sample-margin",
+        type=float,
+        default=DEFAULT_SAMPLE_MARGIN,
+        help=(
+            "Largest error on sampled violation rates; sets the sample size "
+            f"(default: {DEFAULT_SAMPLE_MARGIN:g})."
+        ),
+    )
+    parser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=None,
+        help="Seed for the check sample (default: random each run).",
+    )
+
+
+def plan_from_args(
+    conn: duckdb.DuckDBPyConnection,
+    args: argparse.Namespace,
+    incremental_tables: Optional[Dict[str, Optional[int]]] = None,
+) -> CheckPlan:
+    return build_plan(
+        conn,
+        args.check_mode,
+        lookback_days=args.check_lookback_days,
+        confidence=args.sample_confidence,
+        margin=args.sample_margin,
+        seed=args.sample_seed,
+        incremental_tables=incremental_tables,
+    )
+
+
+def write_check_results(
+    conn: duckdb.DuckDBPyConnection, scans: Iterable[TableScan]
+) -> None:
+    checked_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = sorted(
+        (
+            [
+                result.check_name,
+                result.check_type,
+                result.table_name,
+                result.check_mode,
+                result.passed,
+                result.observed_value,
+                result.rows_checked,
+                result.violation_rate_low,
+                result.violation_rate_high,
+                result.duration_s,
+                checked_at,
+            ]
+            for scan in scans
+            for result in scan.results
+        ),
+        key=lambda row: row[0],
+    )
+    conn.execute(
+        f"""
+        CREATE OR REPLACE TABLE {QUALITY_TABLE} (
+            check_name VARCHAR,
+            check_type VARCHAR,
+            table_name VARCHAR,
+            check_mode VARCHAR,
+            passed BOOLEAN,
+            observed_value VARCHAR,
+            rows_checked BIGINT,
+            violation_rate_low DOUBLE,
+            violation_rate_high DOUBLE,
+            duration_s DOUBLE,
+            checked_at TIMESTAMP
+        );
+        """
+    )
+    if rows:
+        conn.executemany(
+            f"INSERT INTO {QUALITY_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
@@ -3,31 +3,253 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
 
 import duckdb
 
+from drift_monitor import (
+    DEFAULT_HISTORY_RUNS,
+    DEFAULT_THRESHOLDS,
+    DRIFT_REPORT_TABLE,
+    drift_unresolved,
+    format_drift,
+    parse_thresholds,
+    profiled_relations,
+    run_drift_monitor,
+)
+from pipeline_profiler import PipelineProfiler, write_report
+from quality_checks import (
+    DEFAULT_CHECK_MODE,
+    QUALITY_CHECKS,
+    INCREMENTAL_DATE_KEYS,
+    QUALITY_TABLE,
+    CheckPlan,
+    add_check_arguments,
+    checked_relations,
+    describe_plan,
+    format_check_failure,
+    plan_from_args,
+    registry_hash,
+    run_quality_checks,
+    write_check_results,
+    write_watermarks,
+)
+
+
+RAW_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass(frozen=True)
+class RawTableSpec:
+    """Declared layout of one raw CSV, applied directly by ``read_csv``."""
+
+    table_name: str
+    columns: Tuple[Tuple[str, str], ...]
+    timestamp_format: str = RAW_TIMESTAMP_FORMAT
+    null_markers: Tuple[str, ...] = ("",)
+    # Natural key whose values are recorded in raw._changed_keys when rows change.
+    change_key: Optional[str] = None
+
 
 RAW_FILE_TO_TABLE = {
-    "olist_customers_dataset.csv": "customers",
-    "olist_geolocation_dataset.csv": "geolocation",
-    "olist_order_items_dataset.csv": "order_items",
-    "olist_order_payments_dataset.csv": "order_payments",
-    "olist_order_reviews_dataset.csv": "order_reviews",
-    "olist_orders_dataset.csv": "orders",
-    "olist_products_dataset.csv": "products",
-    "olist_sellers_dataset.csv": "sellers",
-    "product_category_name_translation.csv": "product_category_name_translation",
+    "olist_customers_dataset.csv": RawTableSpec(
+        "customers",
+        (
+            ("customer_id", "VARCHAR"),
+            ("customer_unique_id", "VARCHAR"),
+            ("customer_zip_code_prefix", "INTEGER"),
+            ("customer_city", "VARCHAR"),
+            ("customer_state", "VARCHAR"),
+        ),
+        change_key="customer_id",
+    ),
+    "olist_geolocation_dataset.csv": RawTableSpec(
+        "geolocation",
+        (
+            ("geolocation_zip_code_prefix", "INTEGER"),
+            ("geolocation_lat", "DOUBLE"),
+            ("geolocation_lng", "DOUBLE"),
+            ("geolocation_city", "VARCHAR"),
+            ("geolocation_state", "VARCHAR"),
+        ),
+        change_key="geolocation_zip_code_prefix",
+    ),
+    "olist_order_items_dataset.csv": RawTableSpec(
+        "order_items",
+        (
+            ("order_id", "VARCHAR"),
+            ("order_item_id", "INTEGER"),
+            ("product_id", "VARCHAR"),
+            ("seller_id", "VARCHAR"),
+            ("shipping_limit_date", "TIMESTAMP"),
+            ("price", "DOUBLE"),
+            ("freight_value", "DOUBLE"),
+        ),
+        change_key="order_id",
+    ),
+    "olist_order_payments_dataset.csv": RawTableSpec(
+        "order_payments",
+        (
+            ("order_id", "VARCHAR"),
+            ("payment_sequential", "INTEGER"),
+            ("payment_type", "VARCHAR"),
+            ("payment_installments", "INTEGER"),
+            ("payment_value", "DOUBLE"),
+        ),
+        change_key="order_id",
+    ),
+    "olist_order_reviews_dataset.csv": RawTableSpec(
+        "order_reviews",
+        (
+            ("review_id", "VARCHAR"),
+            ("order_id", "VARCHAR"),
+            ("review_score", "INTEGER"),
+            ("review_comment_title", "VARCHAR"),
+            ("review_comment_message", "VARCHAR"),
+            ("review_creation_date", "TIMESTAMP"),
+            ("review_answer_timestamp", "TIMESTAMP"),
+        ),
+        change_key="order_id",
+    ),
+    "olist_orders_dataset.csv": RawTableSpec(
+        "orders",
+        (
+            ("order_id", "VARCHAR"),
+            ("customer_id", "VARCHAR"),
+            ("order_status", "VARCHAR"),
+            ("order_purchase_timestamp", "TIMESTAMP"),
+            ("order_approved_at", "TIMESTAMP"),
+            ("order_delivered_carrier_date", "TIMESTAMP"),
+            ("order_delivered_customer_date", "TIMESTAMP"),
+            ("order_estimated_delivery_date", "TIMESTAMP"),
+        ),
+        change_key="order_id",
+    ),
+    "olist_products_dataset.csv": RawTableSpec(
+        "products",
+        (
+            ("product_id", "VARCHAR"),
+            ("product_category_name", "VARCHAR"),
+            ("product_name_lenght", "INTEGER"),
+            ("product_description_lenght", "INTEGER"),
+            ("product_photos_qty", "INTEGER"),
+            ("product_weight_g", "DOUBLE"),
+            ("product_length_cm", "DOUBLE"),
+            ("product_height_cm", "DOUBLE"),
+            ("product_width_cm", "DOUBLE"),
+        ),
+        change_key="product_id",
+    ),
+    "olist_sellers_dataset.csv": RawTableSpec(
+        "sellers",
+        (
+            ("seller_id", "VARCHAR"),
+            ("seller_zip_code_prefix", "INTEGER"),
+            ("seller_city", "VARCHAR"),
+            ("seller_state", "VARCHAR"),
+        ),
+        change_key="seller_id",
+    ),
+    "product_category_name_translation.csv": RawTableSpec(
+        "product_category_name_translation",
+        (
+            ("product_category_name", "VARCHAR"),
+            ("product_category_name_english", "VARCHAR"),
+        ),
+        change_key="product_category_name",
+    ),
 }
 
-SQL_MODEL_FILES = [
-    "10_staging.sql",
-    "20_dimensions.sql",
-    "30_facts.sql",
-    "40_dashboard_views.sql",
-    "50_quality_checks.sql",
-]
+REJECTS_TABLE = "raw._rejects"
+CHANGED_KEYS_TABLE = "raw._changed_keys"
+PREVIOUS_TABLE_SUFFIX = "__previous"
+REJECT_ERRORS_TEMP_TABLE = "raw_load_reject_errors"
+REJECT_SCANS_TEMP_TABLE = "raw_load_reject_scans"
+REJECT_RECOVERED_TEMP_TABLE = "raw_load_recovered"
+REJECT_LINE_COLUMN = "_reject_line"
+
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
+
+# Parquet is listed first so views are evaluated once into Parquet and any
+# further formats are copied from that file instead of re-running the view.
+EXPORT_FORMATS = ("parquet", "csv")
+PARQUET_COMPRESSIONS = ("uncompressed", "snappy", "gzip", "zstd", "lz4", "brotli")
+DEFAULT_PARQUET_ROW_GROUP_SIZE = 122880
+
+# Fact tables that --partition-facts writes as hive-style Parquet datasets,
+# partitioned by purchase year/month derived from purchase_date_key.
+PARTITIONED_EXPORT_OBJECTS = ("mart.fact_orders", "mart.fact_order_items")
+EXPORT_PARTITIONS_TABLE = "mart._export_partitions"
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+LOAD_MANIFEST_TABLE = "raw._load_manifest"
+MODEL_MANIFEST_TABLE = "mart._model_manifest"
+# Export objects rebuilt since their files were last written. Kept in the
+# warehouse so a run that fails after its models (quality gate, drift check,
+# an export) still exports them on the next run, when nothing is rebuilt.
+PENDING_EXPORTS_TABLE = "mart._pending_exports"
+
+RELATION_PATTERN = re.compile(r"\b(raw|stg|mart)\.([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+TARGET_PATTERN = re.compile(
+    r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(TABLE|VIEW)\s+(\w+\.\w+)",
+    re.IGNORECASE,
+)
+
+CREATE_TABLE_AS_PATTERN = re.compile(
+    r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?TABLE\s+\w+\.\w+\s+AS\s+",
+    re.IGNORECASE,
+)
+# Model SQL placeholder for date-chunked builds: ``{{ chunk_filter(<date_key expr>) }}``
+# restricts rows to one chunk.
+CHUNK_FILTER_PATTERN = re.compile(r"\{\{\s*chunk_filter\((.+?)\)\s*\}\}", re.DOTALL)
+# ``{{ key_map(<key column>) }}`` names the persistent key map of a KEY_MAPS entry;
+# new natural keys are added to it before the statement runs.
+KEY_MAP_PATTERN = re.compile(r"\{\{\s*key_map\(\s*(\w+)\s*\)\s*\}\}")
+# ``{{ upsert_filter(<alias>.<key>, <schema>.<changes>) }}`` marks a table that can be
+# maintained in place: with --incremental-models only rows whose key is listed in
+# the changes relation are deleted and rebuilt.
+UPSERT_FILTER_PATTERN = re.compile(
+    r"\{\{\s*upsert_filter\(\s*((?:\w+\.)?(\w+))\s*,\s*(\w+\.\w+)\s*\)\s*\}\}"
+)
+CHUNK_CALENDAR_TABLE = "mart.dim_time"
+
+
+@dataclass(frozen=True)
+class KeyMapSpec:
+    """Persistent natural key -> surrogate key assignments for one key column."""
+
+    key_column: str
+    natural_keys: Tuple[str, ...]
+    source: str
+
+    @property
+    def table(self) -> str:
+        return f"mart._key_map_{self.key_column[: -len('_sk')]}"
+
+
+KEY_MAPS = {
+    spec.key_column: spec
+    for spec in (
+        KeyMapSpec("customer_sk", ("customer_id",), "stg.customers"),
+        KeyMapSpec("product_sk", ("product_id",), "stg.products"),
+        KeyMapSpec("seller_sk", ("seller_id",), "stg.sellers"),
+        KeyMapSpec("review_sk", ("order_id",), "stg.order_reviews_latest"),
+        KeyMapSpec("order_sk", ("order_id",), "stg.orders"),
+        KeyMapSpec("order_item_sk", ("order_id", "order_item_id"), "stg.order_items"),
+    )
+}
+
+HASH_CHUNK_BYTES = 1024 * 1024
 
 EXPORT_OBJECTS = [
     "mart.dim_customer",
@@ -51,6 +273,16 @@ EXPORT_OBJECTS = [
 ]
 
 
+def parse_formats(value: str) -> Tuple[str, ...]:
+    requested = {item.strip().lower() for item in value.split(",") if item.strip()}
+    unknown = requested - set(EXPORT_FORMATS)
+    if unknown or not requested:
+        raise argparse.ArgumentTypeError(
+            f"formats must be a comma-separated subset of {','.join(EXPORT_FORMATS)}"
+        )
+    return tuple(fmt for fmt in EXPORT_FORMATS if fmt in requested)
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Build Olist warehouse in DuckDB.")
     parser.add_argument(
@@ -73,6 +305,112 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Do not fail the run even if quality checks fail.",
     )
+    add_check_arguments(parser, DEFAULT_CHECK_MODE)
+    parser.add_argument(
+        "--drift-history",
+        type=int,
+        default=DEFAULT_HISTORY_RUNS,
+        help=(
+            "Number of previous profile snapshots the drift baseline is built from "
+            f"(default: {DEFAULT_HISTORY_RUNS})."
+        ),
+    )
+    parser.add_argument(
+        "--drift-threshold",
+        action="append",
+        default=[],
+        metavar="FAMILY=VALUE",
+        help=(
+            "Override a drift threshold; repeatable. Families: "
+            f"{', '.join(f'{family} ({value:g})' for family, value in DEFAULT_THRESHOLDS.items())}."
+        ),
+    )
+    parser.add_argument(
+        "--fail-on-drift",
+        action="store_true",
+        help="Fail the run when any profiled metric drifts beyond its threshold.",
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Reload every raw file and re-run every model, ignoring the load manifest.",
+    )
+    parser.add_argument(
+        "--incremental-models",
+        action="store_true",
+        help=(
+            "Upsert only the changed keys of fact and dimension tables instead of "
+            "rebuilding them; raw files are diffed against their previous load."
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="Maximum number of model statements or exports executed concurrently.",
+    )
+    parser.add_argument(
+        "--formats",
+        type=parse_formats,
+        default=EXPORT_FORMATS,
+        help="Comma-separated export formats (parquet,csv).",
+    )
+    parser.add_argument(
+        "--parquet-compression",
+        choices=PARQUET_COMPRESSIONS,
+        default="snappy",
+        help="Compression codec for Parquet exports.",
+    )
+    parser.add_argument(
+        "--parquet-row-group-size",
+        type=int,
+        default=DEFAULT_PARQUET_ROW_GROUP_SIZE,
+        help="Rows per Parquet row group.",
+    )
+    parser.add_argument(
+        "--partition-facts",
+        action="store_true",
+        help=(
+            "Export fact tables as hive-partitioned Parquet datasets by purchase "
+            "year/month, rewriting only partitions whose content changed."
+        ),
+    )
+    parser.add_argument(
+        "--report-path",
+        default=None,
+        help="JSON run report path (default: pipeline_report.json next to --db-path).",
+    )
+    parser.add_argument(
+        "--profile-slowest",
+        type=int,
+        default=0,
+        help="Capture DuckDB query profiles and keep the N slowest model statements.",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        default=None,
+        help="DuckDB memory limit such as 3GB; larger operators spill to --temp-dir.",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="DuckDB worker threads per query (default: DuckDB picks one per core).",
+    )
+    parser.add_argument(
+        "--temp-dir",
+        default=None,
+        help="Directory for DuckDB spill files (default: <db-path>.tmp).",
+    )
+    parser.add_argument(
+        "--fact-chunk-months",
+        type=int,
+        default=0,
+        help=(
+            "Build fact tables in purchase-date windows of N months to bound peak "
+            "memory (default: 0, single pass)."
+        ),
+    )
     return parser.parse_args()
 
 
@@ -80,6 +418,34 @@ def quote_path(path: Path) -> str:
     return path.as_posix().replace("'", "''")
 
 
+def configure_connection(
+    conn: duckdb.DuckDBPyConnection,
+    memory_limit: Optional[str],
+    threads: Optional[int],
+    temp_dir: Optional[str],
+) -> None:
+    """Apply memory, thread and spill settings before any work is scheduled."""
+    settings: Dict[str, str] = {}
+    if memory_limit:
+        settings["memory_limit"] = "'" + memory_limit.replace("'", "''") + "'"
+    if threads is not None:
+        if threads < 1:
+            raise ValueError("--threads must be at least 1")
+        settings["threads"] = str(threads)
+    if temp_dir:
+        Path(temp_dir).mkdir(parents=True, exist_ok=True)
+        settings["temp_directory"] = f"'{quote_path(Path(temp_dir))}'"
+    if not settings:
+        return
+
+    applied = []
+    for name, value in settings.items():
+        conn.execute(f"SET {name} = {value};")
+        current = conn.execute("SELECT current_setting(?)", [name]).fetchone()[0]
+        applied.append(f"{name}={current}")
+    print(f"[config] {', '.join(applied)}")
+
+
 def ensure_required_files(raw_dir: Path) -> None:
     missing = [name for name in RAW_FILE_TO_TABLE if not (raw_dir / name).exists()]
     if missing:
@@ -96,55 +462,1279 @@ def create_schemas(conn: duckdb.DuckDBPyConnection) -> None:
     conn.execute("CREATE SCHEMA IF NOT EXISTS mart;")
 
 
-def load_raw_tables(conn: duckdb.DuckDBPyConnection, raw_dir: Path) -> None:
-    for file_name, table_name in RAW_FILE_TO_TABLE.items():
-        file_path = raw_dir / file_name
-        quoted_file = quote_path(file_path)
+@dataclass(frozen=True)
+class FileFingerprint:
+    file_name: str
+    table_name: str
+    file_size: int
+    file_mtime: float
+    content_hash: Optional[str]
+
+
+@dataclass(frozen=True)
+class ModelStatement:
+    model_name: str
+    position: int
+    kind: str
+    target: str
+    sources: FrozenSet[str]
+    sql: str
+
+    @property
+    def statement_hash(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    @property
+    def is_chunked(self) -> bool:
+        return CHUNK_FILTER_PATTERN.search(self.sql) is not None
+
+    @property
+    def key_maps(self) -> List[KeyMapSpec]:
+        return [KEY_MAPS[key] for key in KEY_MAP_PATTERN.findall(self.sql)]
+
+    @property
+    def upsert_key(self) -> Optional[Tuple[str, str]]:
+        """(key column, relation listing changed keys) for upsertable statements."""
+        match = UPSERT_FILTER_PATTERN.search(self.sql)
+        return (match.group(2), match.group(3).lower()) if match else None
+
+    def render(self, chunk: Optional["DateKeyChunk"] = None, upsert: bool = False) -> str:
+        """SQL with placeholders filled; the default covers every row."""
+        chunk = chunk or DateKeyChunk()
+        sql = CHUNK_FILTER_PATTERN.sub(lambda m: chunk.predicate(m.group(1).strip()), self.sql)
+        sql = UPSERT_FILTER_PATTERN.sub(
+            lambda m: f"{m.group(1)} IN (SELECT {m.group(2)} FROM {m.group(3)})"
+            if upsert
+            else "TRUE",
+            sql,
+        )
+        return KEY_MAP_PATTERN.sub(lambda m: KEY_MAPS[m.group(1)].table, sql)
+
+
+@dataclass(frozen=True)
+class DateKeyChunk:
+    """Window of ``YYYYMMDD`` date keys; an open lower bound also takes NULL keys."""
+
+    low: Optional[int] = None
+    high: Optional[int] = None
+
+    def predicate(self, expr: str) -> str:
+        if self.low is None and self.high is None:
+            return "TRUE"
+        if self.low is None:
+            return f"({expr} IS NULL OR {expr} < {self.high})"
+        if self.high is None:
+            return f"({expr} >= {self.low})"
+        return f"({expr} >= {self.low} AND {expr} < {self.high})"
+
+
+@dataclass(frozen=True)
+class ExportOptions:
+    formats: Tuple[str, ...] = EXPORT_FORMATS
+    parquet_compression: str = "snappy"
+    parquet_row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE
+    partition_facts: bool = False
+
+    def is_partitioned(self, object_name: str) -> bool:
+        return self.partition_facts and object_name in PARTITIONED_EXPORT_OBJECTS
+
+    def copy_clause(self, fmt: str) -> str:
+        if fmt == "parquet":
+            return (
+                f"(FORMAT PARQUET, COMPRESSION {self.parquet_compression}, "
+                f"ROW_GROUP_SIZE {self.parquet_row_group_size})"
+            )
+        return "(HEADER, DELIMITER ',')"
+
+
+@dataclass(frozen=True)
+class PartitionState:
+    object_name: str
+    purchase_year: Optional[int]
+    purchase_month: Optional[int]
+    row_count: int
+    content_checksum: str
+
+    @property
+    def period_key(self) -> int:
+        if self.purchase_year is None:
+            return -1
+        return self.purchase_year * 100 + self.purchase_month
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    object_name: str
+    started: float
+    finished: float
+    rows: Optional[int]
+    written: str
+    partition_states: Optional[List[PartitionState]] = None
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+@dataclass(frozen=True)
+class NodeTiming:
+    target: str
+    model_name: str
+    started: float
+    finished: float
+    rows: Optional[int] = None
+    profile_path: Optional[Path] = None
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_relations(conn: duckdb.DuckDBPyConnection) -> Set[str]:
+    rows = conn.execute(
+        "SELECT table_schema || '.' || table_name FROM information_schema.tables"
+    ).fetchall()
+    return {row[0].lower() for row in rows}
+
+
+def relation_kinds(conn: duckdb.DuckDBPyConnection) -> Dict[str, str]:
+    rows = conn.execute(
+        """
+        SELECT
+            table_schema || '.' || table_name,
+            CASE WHEN table_type = 'VIEW' THEN 'VIEW' ELSE 'TABLE' END
+        FROM information_schema.tables
+        """
+    ).fetchall()
+    return {name.lower(): kind for name, kind in rows}
+
+
+def read_load_manifest(conn: duckdb.DuckDBPyConnection) -> Dict[str, FileFingerprint]:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {LOAD_MANIFEST_TABLE} (
+            file_name VARCHAR PRIMARY KEY,
+            table_name VARCHAR,
+            file_size BIGINT,
+            file_mtime DOUBLE,
+            content_hash VARCHAR,
+            loaded_at TIMESTAMP
+        );
+        """
+    )
+    rows = conn.execute(
+        f"""
+        SELECT file_name, table_name, file_size, file_mtime, content_hash
+        FROM {LOAD_MANIFEST_TABLE}
+        """
+    ).fetchall()
+    return {row[0]: FileFingerprint(*row) for row in rows}
+
+
+def write_load_manifest(
+    conn: duckdb.DuckDBPyConnection, fingerprints: Iterable[FileFingerprint]
+) -> None:
+    loaded_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    for fp in fingerprints:
+        conn.execute(
+            f"INSERT OR REPLACE INTO {LOAD_MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+            [fp.file_name, fp.table_name, fp.file_size, fp.file_mtime, fp.content_hash, loaded_at],
+        )
+
+
+def fingerprint_raw_file(
+    raw_dir: Path, file_name: str, table_name: str, previous: Optional[FileFingerprint]
+) -> FileFingerprint:
+    """Fingerprint a raw file, hashing its content only when size or mtime moved."""
+    file_path = raw_dir / file_name
+    stat = file_path.stat()
+    if (
+        previous is not None
+        and previous.file_size == stat.st_size
+        and previous.file_mtime == stat.st_mtime
+    ):
+        return previous
+    return FileFingerprint(
+        file_name=file_name,
+        table_name=table_name,
+        file_size=stat.st_size,
+        file_mtime=stat.st_mtime,
+        content_hash=hash_file(file_path),
+    )
+
+
+def raw_table_matches_spec(conn: duckdb.DuckDBPyConnection, spec: RawTableSpec) -> bool:
+    rows = conn.execute(
+        """
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = 'raw' AND table_name = ?
+        ORDER BY ordinal_position
+        """,
+        [spec.table_name],
+    ).fetchall()
+    return [(name, dtype.upper()) for name, dtype in rows] == list(spec.columns)
+
+
+def _null_markers_sql(spec: RawTableSpec) -> str:
+    return ", ".join("'" + marker.replace("'", "''") + "'" for marker in spec.null_markers)
+
+
+def raw_read_sql(file_path: Path, spec: RawTableSpec) -> str:
+    column_list = ",\n                ".join(name for name, _ in spec.columns)
+    column_types = ", ".join(f"'{name}': '{dtype}'" for name, dtype in spec.columns)
+    null_markers = _null_markers_sql(spec)
+    return f"""
+            SELECT
+                {column_list}
+            FROM read_csv(
+                '{quote_path(file_path)}',
+                header = true,
+                types = {{{column_types}}},
+                timestampformat = '{spec.timestamp_format}',
+                nullstr = [{null_markers}],
+                store_rejects = true,
+                rejects_table = '{REJECT_ERRORS_TEMP_TABLE}',
+                rejects_scan = '{REJECT_SCANS_TEMP_TABLE}'
+            )
+    """
+
+
+def recover_rejected_rows(conn: duckdb.DuckDBPyConnection, spec: RawTableSpec) -> List[int]:
+    """Append rejected lines of the last raw load with their unparseable values nulled.
+
+    The rejected records are re-read as text and each typed column is parsed with
+    ``TRY_STRPTIME`` / ``TRY_CAST``, so one bad optional value does not drop the
+    row. Records that are malformed as CSV (wrong number of fields) stay out.
+    Returns the reject line numbers that were recovered.
+    """
+    rejected = conn.execute(
+        f"""
+        SELECT DISTINCT line, csv_line
+        FROM temp.main.{REJECT_ERRORS_TEMP_TABLE}
+        ORDER BY line
+        """
+    ).fetchall()
+    if not rejected:
+        return []
+
+    columns = [REJECT_LINE_COLUMN, *(name for name, _ in spec.columns)]
+    parsed: List[str] = []
+    for name, dtype in spec.columns:
+        value = f"NULLIF(TRIM({name}), '')"
+        if dtype == "VARCHAR":
+            parsed.append(name)
+        elif dtype == "TIMESTAMP":
+            parsed.append(f"TRY_STRPTIME({value}, '{spec.timestamp_format}') AS {name}")
+        else:
+            parsed.append(f"TRY_CAST({value} AS {dtype}) AS {name}")
+    text_types = ", ".join(f"'{name}': 'VARCHAR'" for name in columns[1:])
+    with tempfile.TemporaryDirectory(prefix="olist_rejects_") as tmp:
+        lines_path = Path(tmp) / f"{spec.table_name}.csv"
+        with lines_path.open("w", encoding="utf-8", newline="") as f:
+            f.write(",".join(columns) + "\n")
+            for line, csv_line in rejected:
+                f.write(f"{line},{csv_line}\n")
         conn.execute(
             f"""
-            CREATE OR REPLACE TABLE raw.{table_name} AS
-            SELECT *
-            FROM read_csv_auto(
-                '{quoted_file}',
+            CREATE OR REPLACE TEMP TABLE {REJECT_RECOVERED_TEMP_TABLE} AS
+            SELECT {REJECT_LINE_COLUMN}, {", ".join(parsed)}
+            FROM read_csv(
+                '{quote_path(lines_path)}',
                 header = true,
-                all_varchar = true,
-                sample_size = -1
-            );
+                types = {{'{REJECT_LINE_COLUMN}': 'BIGINT', {text_types}}},
+                nullstr = [{_null_markers_sql(spec)}],
+                ignore_errors = true
+            )
             """
         )
-        print(f"[raw] loaded raw.{table_name} <- {file_name}")
+    recovered = f"temp.main.{REJECT_RECOVERED_TEMP_TABLE}"
+    conn.execute(
+        f"INSERT INTO raw.{spec.table_name} "
+        f"SELECT * EXCLUDE ({REJECT_LINE_COLUMN}) FROM {recovered}"
+    )
+    lines = conn.execute(f"SELECT {REJECT_LINE_COLUMN} FROM {recovered}").fetchall()
+    conn.execute(f"DROP TABLE {recovered};")
+    return [row[0] for row in lines]
 
 
-def execute_models(conn: duckdb.DuckDBPyConnection, model_paths: Iterable[Path]) -> None:
+def collect_rejects(
+    conn: duckdb.DuckDBPyConnection, table_name: str, recovered_lines: Sequence[int] = ()
+) -> int:
+    """Move parse rejects of the last raw load into ``raw._rejects``.
+
+    Returns the number of rejected rows left out of the raw table.
+    """
+    conn.execute(f"DELETE FROM {REJECTS_TABLE} WHERE table_name = ?", [table_name])
+    conn.execute(
+        f"""
+        INSERT INTO {REJECTS_TABLE}
+        SELECT
+            ? AS table_name,
+            line,
+            column_name,
+            CAST(error_type AS VARCHAR) AS error_type,
+            csv_line,
+            error_message,
+            ? AS loaded_at,
+            list_contains(?, line) AS recovered
+        FROM temp.main.{REJECT_ERRORS_TEMP_TABLE}
+        """,
+        [table_name, datetime.now(timezone.utc).replace(tzinfo=None), list(recovered_lines)],
+    )
+    dropped_rows = conn.execute(
+        f"""
+        SELECT COUNT(DISTINCT line)
+        FROM temp.main.{REJECT_ERRORS_TEMP_TABLE}
+        WHERE NOT list_contains(?, line)
+        """,
+        [list(recovered_lines)],
+    ).fetchone()[0]
+    conn.execute(f"DROP TABLE IF EXISTS temp.main.{REJECT_ERRORS_TEMP_TABLE};")
+    conn.execute(f"DROP TABLE IF EXISTS temp.main.{REJECT_SCANS_TEMP_TABLE};")
+    return dropped_rows
+
+
+def record_changed_keys(conn: duckdb.DuckDBPyConnection, spec: RawTableSpec) -> int:
+    """Diff a reloaded raw table against its previous copy into ``raw._changed_keys``.
+
+    Rows are compared per key through a row count and a sum of row hashes, which
+    streams both tables once into small per-key aggregates instead of matching
+    every row as ``EXCEPT ALL`` would. Keys of added, removed and modified rows
+    are recorded; the previous copy is dropped afterwards. Returns the number of
+    distinct changed keys.
+    """
+    relation = f"raw.{spec.table_name}"
+    previous = f"{relation}{PREVIOUS_TABLE_SUFFIX}"
+    row_hash = f"hash({', '.join(name for name, _ in spec.columns)})"
+
+    def key_digests(table: str) -> str:
+        return f"""
+            SELECT
+                {spec.change_key} AS change_key,
+                COUNT(*) AS row_count,
+                SUM(CAST({row_hash} AS HUGEINT)) AS row_hash_sum
+            FROM {table}
+            WHERE {spec.change_key} IS NOT NULL
+            GROUP BY {spec.change_key}
+        """
+
+    changed = conn.execute(
+        f"""
+        INSERT INTO {CHANGED_KEYS_TABLE}
+        SELECT ? AS table_name, CAST(change_key AS VARCHAR) AS key_value
+        FROM ({key_digests(relation)}) AS cur
+        FULL OUTER JOIN ({key_digests(previous)}) AS prev
+            USING (change_key)
+        WHERE cur.row_count IS DISTINCT FROM prev.row_count
+           OR cur.row_hash_sum IS DISTINCT FROM prev.row_hash_sum
+        """,
+        [relation],
+    ).fetchone()[0]
+    conn.execute(f"DROP TABLE {previous};")
+    return changed
+
+
+def changed_keys_known(conn: duckdb.DuckDBPyConnection) -> bool:
+    """False when a raw table was reloaded without a diff since the last good build."""
+    unknown = conn.execute(
+        f"SELECT COUNT(*) FROM {CHANGED_KEYS_TABLE} WHERE key_value IS NULL"
+    ).fetchone()[0]
+    return unknown == 0
+
+
+def clear_changed_keys(conn: duckdb.DuckDBPyConnection) -> None:
+    conn.execute(f"DELETE FROM {CHANGED_KEYS_TABLE};")
+
+
+def load_raw_tables(
+    conn: duckdb.DuckDBPyConnection,
+    raw_dir: Path,
+    full_refresh: bool = False,
+    profiler: Optional[PipelineProfiler] = None,
+    track_changes: bool = False,
+) -> tuple[Set[str], List[FileFingerprint]]:
+    """Load changed raw files and return the changed relations plus new fingerprints.
+
+    Files are parsed straight into their declared types. Values that fail to
+    parse are recorded in ``raw._rejects``; their rows are kept with those
+    values nulled unless the record itself is malformed. The manifest
+    is not written here; callers persist the returned fingerprints once
+    downstream models succeed so a failed run is retried on the next build.
+
+    With ``track_changes`` the keys of changed rows are appended to
+    ``raw._changed_keys``; a table loaded without a previous copy to diff against
+    is recorded with a NULL key instead, meaning every key may have changed.
+    Callers clear the table once the models built from it succeed.
+    """
+    manifest = read_load_manifest(conn)
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {CHANGED_KEYS_TABLE} (
+            table_name VARCHAR,
+            key_value VARCHAR
+        );
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {REJECTS_TABLE} (
+            table_name VARCHAR,
+            line BIGINT,
+            column_name VARCHAR,
+            error_type VARCHAR,
+            csv_line VARCHAR,
+            error_message VARCHAR,
+            loaded_at TIMESTAMP,
+            recovered BOOLEAN
+        );
+        ALTER TABLE {REJECTS_TABLE} ADD COLUMN IF NOT EXISTS recovered BOOLEAN;
+        """
+    )
+    changed_relations: Set[str] = set()
+    fingerprints: List[FileFingerprint] = []
+
+    for file_name, spec in RAW_FILE_TO_TABLE.items():
+        relation = f"raw.{spec.table_name}"
+        previous = manifest.get(file_name)
+        fingerprint = fingerprint_raw_file(raw_dir, file_name, spec.table_name, previous)
+        if fingerprint != previous:
+            fingerprints.append(fingerprint)
+
+        unchanged = (
+            not full_refresh
+            and previous is not None
+            and previous.content_hash == fingerprint.content_hash
+            and raw_table_matches_spec(conn, spec)
+        )
+        if unchanged:
+            print(f"[raw] skipped {relation} (unchanged {file_name})")
+            continue
+
+        started = time.perf_counter()
+        diff_previous = (
+            track_changes
+            and not full_refresh
+            and spec.change_key is not None
+            and raw_table_matches_spec(conn, spec)
+        )
+        if diff_previous:
+            conn.execute(f"DROP TABLE IF EXISTS {relation}{PREVIOUS_TABLE_SUFFIX};")
+            conn.execute(
+                f"ALTER TABLE {relation} RENAME TO {spec.table_name}{PREVIOUS_TABLE_SUFFIX};"
+            )
+        conn.execute(
+            f"CREATE OR REPLACE TABLE {relation} AS {raw_read_sql(raw_dir / file_name, spec)};"
+        )
+        recovered_lines = recover_rejected_rows(conn, spec)
+        rejected_rows = collect_rejects(conn, spec.table_name, recovered_lines)
+        if diff_previous:
+            changed_keys = record_changed_keys(conn, spec)
+            changed_note = f" ({changed_keys} changed keys)"
+        else:
+            conn.execute(f"INSERT INTO {CHANGED_KEYS_TABLE} VALUES (?, NULL)", [relation])
+            changed_note = ""
+        if profiler is not None:
+            row_count = conn.execute(f"SELECT COUNT(*) FROM {relation}").fetchone()[0]
+            profiler.record("raw", relation, started, time.perf_counter(), row_count)
+        changed_relations.add(relation)
+        if fingerprint == previous:
+            fingerprints.append(fingerprint)
+        rejected_note = f" ({rejected_rows} rejected rows)" if rejected_rows else ""
+        if recovered_lines:
+            rejected_note += f" ({len(recovered_lines)} rows kept with unparseable values nulled)"
+        print(f"[raw] loaded {relation} <- {file_name}{changed_note}{rejected_note}")
+
+    return changed_relations, fingerprints
+
+
+def split_sql_statements(sql_text: str) -> List[str]:
+    """Split a model file on top-level semicolons, dropping ``--`` comments."""
+    statements: List[str] = []
+    buffer: List[str] = []
+    in_string = False
+    i = 0
+    while i < len(sql_text):
+        ch = sql_text[i]
+        if not in_string and sql_text.startswith("--", i):
+            newline = sql_text.find("\n", i)
+            i = len(sql_text) if newline == -1 else newline
+            continue
+        if ch == "'":
+            in_string = not in_string
+        if ch == ";" and not in_string:
+            statement = "".join(buffer).strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+        else:
+            buffer.append(ch)
+        i += 1
+    tail = "".join(buffer).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def parse_model_statements(model_paths: Iterable[Path]) -> List[ModelStatement]:
+    statements: List[ModelStatement] = []
+    key_map_users: Dict[str, str] = {}
     for model_path in model_paths:
         sql_text = model_path.read_text(encoding="utf-8")
-        conn.execute(sql_text)
-        print(f"[model] executed {model_path.name}")
+        for position, sql in enumerate(split_sql_statements(sql_text), start=1):
+            match = TARGET_PATTERN.match(sql)
+            if match is None:
+                raise ValueError(
+                    f"{model_path.name} statement {position} does not create a "
+                    "schema-qualified table or view."
+                )
+            kind = match.group(1).upper()
+            target = match.group(2).lower()
+            sources = frozenset(
+                f"{schema}.{name}".lower() for schema, name in RELATION_PATTERN.findall(sql)
+            ) - {target}
+            if CHUNK_FILTER_PATTERN.search(sql):
+                if CREATE_TABLE_AS_PATTERN.match(sql) is None:
+                    raise ValueError(
+                        f"{model_path.name} statement {position} uses chunk_filter but is "
+                        "not a CREATE TABLE ... AS statement."
+                    )
+                # Chunk boundaries are read from the calendar, so it must be built first.
+                sources = sources | {CHUNK_CALENDAR_TABLE}
+            if UPSERT_FILTER_PATTERN.search(sql) and CREATE_TABLE_AS_PATTERN.match(sql) is None:
+                raise ValueError(
+                    f"{model_path.name} statement {position} uses upsert_filter but is "
+                    "not a CREATE TABLE ... AS statement."
+                )
+            for key in KEY_MAP_PATTERN.findall(sql):
+                if key not in KEY_MAPS:
+                    raise ValueError(
+                        f"{model_path.name} statement {position} uses unknown key map {key!r}."
+                    )
+                if key in key_map_users:
+                    raise ValueError(
+                        f"Key map {key!r} is used by both {key_map_users[key]} and "
+                        f"{model_path.name} statement {position}; keys are assigned by one "
+                        "statement only."
+                    )
+                key_map_users[key] = f"{model_path.name} statement {position}"
+                # New keys are read from the key map's source before the statement runs.
+                sources = sources | {KEY_MAPS[key].source}
+            statements.append(
+                ModelStatement(
+                    model_name=model_path.name,
+                    position=position,
+                    kind=kind,
+                    target=target,
+                    sources=sources,
+                    sql=sql,
+                )
+            )
+    return statements
 
 
-def export_objects(conn: duckdb.DuckDBPyConnection, export_dir: Path) -> None:
-    export_dir.mkdir(parents=True, exist_ok=True)
+def read_model_manifest(conn: duckdb.DuckDBPyConnection) -> Dict[str, str]:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MODEL_MANIFEST_TABLE} (
+            target_name VARCHAR PRIMARY KEY,
+            statement_hash VARCHAR,
+            executed_at TIMESTAMP
+        );
+        """
+    )
+    rows = conn.execute(
+        f"SELECT target_name, statement_hash FROM {MODEL_MANIFEST_TABLE}"
+    ).fetchall()
+    return dict(rows)
+
+
+def record_model_manifest(
+    conn: duckdb.DuckDBPyConnection, statements: Iterable[ModelStatement]
+) -> None:
+    executed_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = [[statement.target, statement.statement_hash, executed_at] for statement in statements]
+    if rows:
+        conn.executemany(f"INSERT OR REPLACE INTO {MODEL_MANIFEST_TABLE} VALUES (?, ?, ?)", rows)
+
+
+def build_dependency_graph(statements: Iterable[ModelStatement]) -> Dict[str, Set[str]]:
+    """Map each statement target to the targets it reads within ``statements``."""
+    statements = list(statements)
+    producers: Set[str] = set()
+    for statement in statements:
+        if statement.target in producers:
+            raise ValueError(f"Model target defined more than once: {statement.target}")
+        producers.add(statement.target)
+    return {
+        statement.target: {source for source in statement.sources if source in producers}
+        for statement in statements
+    }
+
+
+def topological_order(statements: Iterable[ModelStatement]) -> List[ModelStatement]:
+    """Order statements so every producer precedes its readers (ties keep file order)."""
+    statements = list(statements)
+    graph = build_dependency_graph(statements)
+    by_target = {statement.target: statement for statement in statements}
+    remaining = {target: set(deps) for target, deps in graph.items()}
+    ordered: List[ModelStatement] = []
+    while remaining:
+        ready = [s.target for s in statements if s.target in remaining and not remaining[s.target]]
+        if not ready:
+            cycle = ", ".join(sorted(remaining))
+            raise ValueError(f"Dependency cycle between model statements: {cycle}")
+        for target in ready:
+            ordered.append(by_target[target])
+            del remaining[target]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return ordered
+
+
+def select_dirty_statements(
+    conn: duckdb.DuckDBPyConnection,
+    statements: List[ModelStatement],
+    changed_relations: Set[str],
+    full_refresh: bool = False,
+) -> List[ModelStatement]:
+    """Pick statements downstream of changed relations, edited SQL or missing targets."""
+    previous_hashes = read_model_manifest(conn)
+    existing = list_relations(conn)
+    dirty_relations = set(changed_relations)
+    selected: List[ModelStatement] = []
+    for statement in topological_order(statements):
+        if (
+            full_refresh
+            or statement.target not in existing
+            or previous_hashes.get(statement.target) != statement.statement_hash
+            or statement.sources & dirty_relations
+        ):
+            selected.append(statement)
+            dirty_relations.add(statement.target)
+    return selected
+
+
+def select_upsert_targets(
+    conn: duckdb.DuckDBPyConnection,
+    dirty_statements: List[ModelStatement],
+    full_refresh: bool = False,
+) -> Set[str]:
+    """Dirty tables that can upsert their changed keys instead of being rebuilt.
+
+    A table qualifies when it uses ``upsert_filter``, already exists with the
+    same SQL, every raw change since the last good build has known keys, and no
+    upsertable table it reads is being rebuilt (any of its rows may have changed).
+    """
+    if full_refresh or not changed_keys_known(conn):
+        return set()
+    previous_hashes = read_model_manifest(conn)
+    kinds = relation_kinds(conn)
+    rebuilt: Set[str] = set()
+    upserts: Set[str] = set()
+    for statement in topological_order(dirty_statements):
+        if statement.upsert_key is None:
+            continue
+        if (
+            kinds.get(statement.target) == "TABLE"
+            and previous_hashes.get(statement.target) == statement.statement_hash
+            and not statement.sources & rebuilt
+        ):
+            upserts.add(statement.target)
+        else:
+            rebuilt.add(statement.target)
+    return upserts
+
+
+def assign_surrogate_keys(cursor: duckdb.DuckDBPyConnection, spec: KeyMapSpec) -> int:
+    """Give natural keys first seen in ``spec.source`` the next surrogate keys.
+
+    Existing assignments never change, including for keys no longer in the
+    source, so a key that comes back gets its old surrogate. Only the new keys
+    are sorted. Returns the number of keys added.
+    """
+    natural_keys = ", ".join(spec.natural_keys)
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {spec.table} AS
+        SELECT {natural_keys}, CAST(NULL AS BIGINT) AS {spec.key_column}
+        FROM {spec.source}
+        LIMIT 0;
+        """
+    )
+    offset = cursor.execute(
+        f"SELECT COALESCE(MAX({spec.key_column}), 0) FROM {spec.table}"
+    ).fetchone()[0]
+    not_null = " AND ".join(f"{key} IS NOT NULL" for key in spec.natural_keys)
+    return cursor.execute(
+        f"""
+        INSERT INTO {spec.table}
+        SELECT {natural_keys}, {offset} + ROW_NUMBER() OVER (ORDER BY {natural_keys})
+        FROM (
+            SELECT {natural_keys} FROM {spec.source} WHERE {not_null}
+            EXCEPT
+            SELECT {natural_keys} FROM {spec.table}
+        )
+        """
+    ).fetchone()[0]
+
+
+def date_key_chunks(
+    conn: duckdb.DuckDBPyConnection, chunk_months: int
+) -> List[DateKeyChunk]:
+    """Split the calendar into windows of ``chunk_months`` months.
+
+    The first window is open below and the last open above, so together they
+    cover every key, including NULL and dates outside the calendar.
+    """
+    months = [
+        row[0]
+        for row in conn.execute(
+            f"SELECT DISTINCT date_key // 100 FROM {CHUNK_CALENDAR_TABLE} ORDER BY 1"
+        ).fetchall()
+    ]
+    starts = [month * 100 for month in months[chunk_months::chunk_months]]
+    bounds: List[Optional[int]] = [None, *starts, None]
+    return [DateKeyChunk(low, high) for low, high in zip(bounds, bounds[1:])]
+
+
+def _execute_chunked(
+    cursor: duckdb.DuckDBPyConnection, statement: ModelStatement, chunk_months: int
+) -> None:
+    """Build a table one date window at a time: CREATE from the first, INSERT the rest."""
+    chunks = date_key_chunks(cursor, chunk_months)
+    print(
+        f"[model] building {statement.target} in {len(chunks)} chunk(s) "
+        f"of {chunk_months} month(s)"
+    )
+    body = CREATE_TABLE_AS_PATTERN.sub("", statement.render(chunks[0]), count=1)
+    cursor.execute(f"CREATE OR REPLACE TABLE {statement.target} AS {body}")
+    for chunk in chunks[1:]:
+        body = CREATE_TABLE_AS_PATTERN.sub("", statement.render(chunk), count=1)
+        cursor.execute(f"INSERT INTO {statement.target} {body}")
+
+
+def _execute_upsert(cursor: duckdb.DuckDBPyConnection, statement: ModelStatement) -> None:
+    """Replace the rows of changed keys in one transaction."""
+    key, changes = statement.upsert_key
+    body = CREATE_TABLE_AS_PATTERN.sub("", statement.render(upsert=True), count=1)
+    cursor.begin()
+    try:
+        deleted = cursor.execute(
+            f"DELETE FROM {statement.target} WHERE {key} IN (SELECT {key} FROM {changes})"
+        ).fetchone()[0]
+        inserted = cursor.execute(f"INSERT INTO {statement.target} {body}").fetchone()[0]
+        cursor.commit()
+    except Exception:
+        cursor.rollback()
+        raise
+    print(
+        f"[model] upserted {statement.target} on {key}: "
+        f"{deleted} rows replaced by {inserted}"
+    )
+
+
+def _run_statement(
+    conn: duckdb.DuckDBPyConnection,
+    statement: ModelStatement,
+    existing_kind: Optional[str] = None,
+    profile_dir: Optional[Path] = None,
+    chunk_months: int = 0,
+    upsert: bool = False,
+) -> NodeTiming:
+    cursor = conn.cursor()
+    profile_path = None
+    try:
+        started = time.perf_counter()
+        if existing_kind is not None and existing_kind != statement.kind:
+            # CREATE OR REPLACE cannot swap a table for a view (or back).
+            cursor.execute(f"DROP {existing_kind} IF EXISTS {statement.target};")
+        if profile_dir is not None:
+            profile_path = profile_dir / f"{statement.target}.json"
+            cursor.execute("SET enable_profiling = 'json';")
+            cursor.execute(f"SET profiling_output = '{quote_path(profile_path)}';")
+        for spec in statement.key_maps:
+            added = assign_surrogate_keys(cursor, spec)
+            if added:
+                print(f"[model] assigned {added} new {spec.key_column} keys in {spec.table}")
+        if upsert:
+            _execute_upsert(cursor, statement)
+        elif chunk_months > 0 and statement.is_chunked:
+            _execute_chunked(cursor, statement, chunk_months)
+        else:
+            cursor.execute(statement.render())
+        finished = time.perf_counter()
+        if profile_dir is not None:
+            cursor.execute("PRAGMA disable_profiling;")
+        rows = None
+        if statement.kind == "TABLE":
+            rows = cursor.execute(f"SELECT COUNT(*) FROM {statement.target}").fetchone()[0]
+    finally:
+        cursor.close()
+    return NodeTiming(
+        statement.target, statement.model_name, started, finished, rows, profile_path
+    )
+
+
+def execute_models(
+    conn: duckdb.DuckDBPyConnection,
+    statements: Iterable[ModelStatement],
+    jobs: int = 1,
+    profile_dir: Optional[Path] = None,
+    chunk_months: int = 0,
+    upsert_targets: FrozenSet[str] = frozenset(),
+) -> List[NodeTiming]:
+    """Run statements as a DAG on per-statement cursors, at most ``jobs`` at a time.
+
+    With ``profile_dir`` set, each statement's DuckDB JSON profile is written there.
+    With ``chunk_months`` set, statements using ``chunk_filter`` are built in
+    date windows of that many months. Targets in ``upsert_targets`` only replace
+    the rows of their changed keys.
+    """
+    statements = list(statements)
+    by_target = {statement.target: statement for statement in statements}
+    remaining = build_dependency_graph(statements)
+    existing_kinds = relation_kinds(conn)
+    timings: List[NodeTiming] = []
+
+    pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+    running: Dict[Future, str] = {}
+    try:
+        while remaining or running:
+            ready = [
+                s.target for s in statements if s.target in remaining and not remaining[s.target]
+            ]
+            for target in ready:
+                del remaining[target]
+                future = pool.submit(
+                    _run_statement,
+                    conn,
+                    by_target[target],
+                    existing_kinds.get(target),
+                    profile_dir,
+                    chunk_months,
+                    target in upsert_targets,
+                )
+                running[future] = target
+            if not running:
+                cycle = ", ".join(sorted(remaining))
+                raise ValueError(f"Dependency cycle between model statements: {cycle}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                target = running.pop(future)
+                timing = future.result()
+                statement = by_target[target]
+                timings.append(timing)
+                for deps in remaining.values():
+                    deps.discard(target)
+                print(
+                    f"[model] executed {statement.model_name}: {statement.target} "
+                    f"({timing.duration:.3f}s)"
+                )
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        record_model_manifest(conn, [by_target[timing.target] for timing in timings])
+        mark_pending_exports(conn, [timing.target for timing in timings])
+
+    return timings
+
+
+def critical_path(
+    statements: Iterable[ModelStatement], timings: Iterable[NodeTiming]
+) -> tuple[float, List[str]]:
+    """Longest chain of executed statements by summed duration."""
+    statements = list(statements)
+    graph = build_dependency_graph(statements)
+    durations = {timing.target: timing.duration for timing in timings}
+    best: Dict[str, tuple[float, List[str]]] = {}
+    for statement in topological_order(statements):
+        upstream = max(
+            (best[dep] for dep in graph[statement.target] if dep in best),
+            key=lambda item: item[0],
+            default=(0.0, []),
+        )
+        best[statement.target] = (
+            upstream[0] + durations.get(statement.target, 0.0),
+            upstream[1] + [statement.target],
+        )
+    return max(best.values(), key=lambda item: item[0], default=(0.0, []))
+
+
+def print_model_timings(
+    statements: Iterable[ModelStatement], timings: List[NodeTiming]
+) -> None:
+    if not timings:
+        return
+    wall_time = max(timing.finished for timing in timings) - min(
+        timing.started for timing in timings
+    )
+    serial_time = sum(timing.duration for timing in timings)
+    path_time, path = critical_path(statements, timings)
+    print(
+        f"[model] {len(timings)} statements in {wall_time:.3f}s wall "
+        f"({serial_time:.3f}s serial)"
+    )
+    print(f"[model] critical path {path_time:.3f}s: {' -> '.join(path)}")
+
+
+def export_paths(
+    export_dir: Path, object_name: str, options: ExportOptions
+) -> Dict[str, Path]:
+    short_name = object_name.split(".")[1]
+    paths = {fmt: export_dir / f"{short_name}.{fmt}" for fmt in options.formats}
+    if "parquet" in paths and options.is_partitioned(object_name):
+        paths["parquet"] = export_dir / short_name
+    return paths
+
+
+def stale_export_objects(
+    export_dir: Path, rebuilt_relations: Set[str], options: ExportOptions = ExportOptions()
+) -> List[str]:
+    """Objects rebuilt since their last export, plus any whose export files are missing."""
+    stale: List[str] = []
     for object_name in EXPORT_OBJECTS:
-        short_name = object_name.split(".")[1]
-        parquet_path = export_dir / f"{short_name}.parquet"
-        csv_path = export_dir / f"{short_name}.csv"
-        quoted_parquet = quote_path(parquet_path)
-        quoted_csv = quote_path(csv_path)
+        paths = export_paths(export_dir, object_name, options).values()
+        files_present = all(path.exists() for path in paths)
+        if object_name in rebuilt_relations or not files_present:
+            stale.append(object_name)
+    return stale
 
-        conn.execute(
-            f"COPY (SELECT * FROM {object_name}) TO '{quoted_parquet}' (FORMAT PARQUET);"
+
+def read_pending_exports(conn: duckdb.DuckDBPyConnection) -> Set[str]:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {PENDING_EXPORTS_TABLE} (object_name VARCHAR PRIMARY KEY);"
+    )
+    rows = conn.execute(f"SELECT object_name FROM {PENDING_EXPORTS_TABLE}").fetchall()
+    return {row[0] for row in rows}
+
+
+def mark_pending_exports(conn: duckdb.DuckDBPyConnection, relations: Iterable[str]) -> None:
+    """Remember rebuilt export objects until their files have been rewritten."""
+    read_pending_exports(conn)
+    rows = [[name] for name in sorted(set(relations) & set(EXPORT_OBJECTS))]
+    if rows:
+        conn.executemany(f"INSERT OR REPLACE INTO {PENDING_EXPORTS_TABLE} VALUES (?)", rows)
+
+
+def clear_pending_exports(
+    conn: duckdb.DuckDBPyConnection, object_names: Iterable[str]
+) -> None:
+    rows = [[name] for name in object_names]
+    if rows:
+        conn.executemany(f"DELETE FROM {PENDING_EXPORTS_TABLE} WHERE object_name = ?", rows)
+
+
+def list_views(conn: duckdb.DuckDBPyConnection) -> Set[str]:
+    rows = conn.execute(
+        """
+        SELECT table_schema || '.' || table_name
+        FROM information_schema.tables
+        WHERE table_type = 'VIEW'
+        """
+    ).fetchall()
+    return {row[0].lower() for row in rows}
+
+
+def read_partition_manifest(
+    conn: duckdb.DuckDBPyConnection,
+) -> Dict[str, Dict[int, PartitionState]]:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {EXPORT_PARTITIONS_TABLE} (
+            object_name VARCHAR,
+            purchase_year INTEGER,
+            purchase_month INTEGER,
+            row_count BIGINT,
+            content_checksum VARCHAR,
+            exported_at TIMESTAMP
+        );
+        """
+    )
+    rows = conn.execute(
+        f"""
+        SELECT object_name, purchase_year, purchase_month, row_count, content_checksum
+        FROM {EXPORT_PARTITIONS_TABLE}
+        """
+    ).fetchall()
+    manifest: Dict[str, Dict[int, PartitionState]] = {}
+    for row in rows:
+        state = PartitionState(*row)
+        manifest.setdefault(state.object_name, {})[state.period_key] = state
+    return manifest
+
+
+def write_partition_manifest(
+    conn: duckdb.DuckDBPyConnection, object_name: str, states: List[PartitionState]
+) -> None:
+    exported_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    conn.execute(f"DELETE FROM {EXPORT_PARTITIONS_TABLE} WHERE object_name = ?", [object_name])
+    if states:
+        conn.executemany(
+            f"INSERT INTO {EXPORT_PARTITIONS_TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                [
+                    s.object_name,
+                    s.purchase_year,
+                    s.purchase_month,
+                    s.row_count,
+                    s.content_checksum,
+                    exported_at,
+                ]
+                for s in states
+            ],
         )
-        conn.execute(
-            f"COPY (SELECT * FROM {object_name}) TO '{quoted_csv}' (HEADER, DELIMITER ',');"
+
+
+def partition_dir(dataset_dir: Path, year: Optional[int], month: Optional[int]) -> Path:
+    def segment(name: str, value: Optional[int]) -> str:
+        return f"{name}={HIVE_DEFAULT_PARTITION if value is None else value}"
+
+    return dataset_dir / segment("purchase_year", year) / segment("purchase_month", month)
+
+
+def export_partitioned_parquet(
+    cursor: duckdb.DuckDBPyConnection,
+    object_name: str,
+    dataset_dir: Path,
+    options: ExportOptions,
+    previous: Dict[int, PartitionState],
+) -> tuple[List[PartitionState], int]:
+    """Rewrite only the year/month partitions whose row count or checksum moved."""
+    rows = cursor.execute(
+        f"""
+        SELECT
+            CAST(purchase_date_key // 10000 AS INTEGER) AS purchase_year,
+            CAST((purchase_date_key // 100) % 100 AS INTEGER) AS purchase_month,
+            COUNT(*) AS row_count,
+            CAST(SUM(CAST(HASH(f) AS HUGEINT)) AS VARCHAR) AS content_checksum
+        FROM {object_name} f
+        GROUP BY 1, 2
+        """
+    ).fetchall()
+    states = [PartitionState(object_name, *row) for row in rows]
+    current_keys = {state.period_key for state in states}
+    changed = [
+        state
+        for state in states
+        if previous.get(state.period_key) != state
+        or not partition_dir(dataset_dir, state.purchase_year, state.purchase_month).exists()
+    ]
+
+    for key, state in previous.items():
+        if key not in current_keys:
+            shutil.rmtree(
+                partition_dir(dataset_dir, state.purchase_year, state.purchase_month),
+                ignore_errors=True,
+            )
+    if not changed:
+        return states, 0
+
+    for state in changed:
+        shutil.rmtree(
+            partition_dir(dataset_dir, state.purchase_year, state.purchase_month),
+            ignore_errors=True,
         )
-        print(f"[export] {object_name} -> {short_name}.parquet/.csv")
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    changed_keys = ", ".join(str(state.period_key) for state in changed)
+    cursor.execute(
+        f"""
+        COPY (
+            SELECT
+                *,
+                CAST(purchase_date_key // 10000 AS INTEGER) AS purchase_year,
+                CAST((purchase_date_key // 100) % 100 AS INTEGER) AS purchase_month
+            FROM {object_name}
+            WHERE COALESCE(purchase_date_key // 100, -1) IN ({changed_keys})
+        ) TO '{quote_path(dataset_dir)}' (
+            FORMAT PARQUET,
+            PARTITION_BY (purchase_year, purchase_month),
+            OVERWRITE_OR_IGNORE,
+            COMPRESSION {options.parquet_compression},
+            ROW_GROUP_SIZE {options.parquet_row_group_size}
+        );
+        """
+    )
+    return states, len(changed)
+
+
+def export_object(
+    conn: duckdb.DuckDBPyConnection,
+    object_name: str,
+    export_dir: Path,
+    options: ExportOptions,
+    is_view: bool,
+    previous_partitions: Optional[Dict[int, PartitionState]] = None,
+) -> ExportResult:
+    """Write one object in every requested format, evaluating views only once."""
+    started = time.perf_counter()
+    rows: Optional[int] = None
+    written: List[str] = []
+    partition_states: Optional[List[PartitionState]] = None
+    cursor = conn.cursor()
+    try:
+        source = object_name
+        for fmt, path in export_paths(export_dir, object_name, options).items():
+            if fmt == "parquet" and options.is_partitioned(object_name):
+                path.with_suffix(".parquet").unlink(missing_ok=True)
+                partition_states, rewritten = export_partitioned_parquet(
+                    cursor, object_name, path, options, previous_partitions or {}
+                )
+                written.append(
+                    f"{path.name}/ ({rewritten}/{len(partition_states)} partitions)"
+                )
+                continue
+            quoted_path = quote_path(path)
+            copied = cursor.execute(
+                f"COPY (SELECT * FROM {source}) TO '{quoted_path}' {options.copy_clause(fmt)};"
+            ).fetchone()
+            if rows is None and copied is not None:
+                rows = copied[0]
+            written.append(path.name)
+            if is_view and fmt == "parquet":
+                source = f"read_parquet('{quoted_path}')"
+    finally:
+        cursor.close()
+    return ExportResult(
+        object_name=object_name,
+        started=started,
+        finished=time.perf_counter(),
+        rows=rows,
+        written=", ".join(written),
+        partition_states=partition_states,
+    )
+
+
+def export_objects(
+    conn: duckdb.DuckDBPyConnection,
+    export_dir: Path,
+    object_names: Iterable[str],
+    options: ExportOptions = ExportOptions(),
+    jobs: int = 1,
+) -> List[ExportResult]:
+    export_dir.mkdir(parents=True, exist_ok=True)
+    results: List[ExportResult] = []
+    views = list_views(conn)
+    partition_manifest = read_partition_manifest(conn) if options.partition_facts else {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {
+            pool.submit(
+                export_object,
+                conn,
+                object_name,
+                export_dir,
+                options,
+                object_name in views,
+                partition_manifest.get(object_name),
+            ): object_name
+            for object_name in object_names
+        }
+        for future in futures:
+            result = future.result()
+            if result.partition_states is not None:
+                write_partition_manifest(conn, result.object_name, result.partition_states)
+            results.append(result)
+            print(
+                f"[export] {result.object_name} -> {result.written} "
+                f"({result.duration:.3f}s)"
+            )
+    return results
+
+
+def quality_checks_stale(
+    conn: duckdb.DuckDBPyConnection,
+    rebuilt_relations: Set[str],
+    mode: str,
+    full_refresh: bool = False,
+) -> bool:
+    """Re-check after a checked table is rebuilt, the registry or mode changes, or
+    the results table is missing.
+    """
+    return (
+        full_refresh
+        or QUALITY_TABLE not in list_relations(conn)
+        or read_model_manifest(conn).get(QUALITY_TABLE) != registry_hash(QUALITY_CHECKS, mode)
+        or bool(rebuilt_relations & checked_relations(QUALITY_CHECKS))
+    )
+
+
+def upserted_check_windows(
+    conn: duckdb.DuckDBPyConnection,
+    statements: Iterable[ModelStatement],
+    upsert_targets: Set[str],
+) -> Dict[str, Optional[int]]:
+    """Tables that may be checked incrementally, with the earliest upserted date key.
+
+    Only tables maintained by upsert qualify; every rebuilt table is checked in
+    full. A table whose upserted rows include a NULL date key is left out, as no
+    date window would cover them. Must run before ``clear_changed_keys``.
+    """
+    windows: Dict[str, Optional[int]] = {}
+    for statement in statements:
+        date_key = INCREMENTAL_DATE_KEYS.get(statement.target)
+        if statement.target not in upsert_targets or date_key is None:
+            continue
+        key, changes = statement.upsert_key
+        earliest, undated = conn.execute(
+            f"""
+            SELECT MIN({date_key}), COUNT(*) FILTER (WHERE {date_key} IS NULL)
+            FROM {statement.target}
+            WHERE {key} IN (SELECT {key} FROM {changes})
+            """
+        ).fetchone()
+        if not undated:
+            windows[statement.target] = earliest
+    return windows
+
+
+def evaluate_quality_checks(
+    conn: duckdb.DuckDBPyConnection,
+    profiler: PipelineProfiler,
+    plan: CheckPlan,
+    jobs: int = 1,
+) -> None:
+    started = time.perf_counter()
+    print(f"[quality] checking in {describe_plan(plan)} mode")
+    scans = run_quality_checks(conn, QUALITY_CHECKS, jobs=jobs, plan=plan)
+    write_check_results(conn, scans)
+    write_watermarks(conn, scans)
+    conn.execute(
+        f"INSERT OR REPLACE INTO {MODEL_MANIFEST_TABLE} VALUES (?, ?, ?)",
+        [
+            QUALITY_TABLE,
+            registry_hash(QUALITY_CHECKS, plan.mode),
+            datetime.now(timezone.utc).replace(tzinfo=None),
+        ],
+    )
+    mark_pending_exports(conn, [QUALITY_TABLE])
+    for scan in scans:
+        profiler.record(
+            "quality",
+            f"checks/{scan.table}/{scan.mode}",
+            scan.started,
+            scan.finished,
+            len(scan.results),
+        )
+    check_count = sum(len(scan.results) for scan in scans)
+    print(
+        f"[quality] evaluated {check_count} checks with {len(scans)} table scans "
+        f"in {time.perf_counter() - started:.3f}s"
+    )
 
 
 def run_quality_gate(conn: duckdb.DuckDBPyConnection, allow_failures: bool) -> None:
     failed_checks = conn.execute(
-        """
-        SELECT check_name, observed_value
-        FROM mart.data_quality_checks
+        f"""
+        SELECT check_name, check_mode, observed_value, violation_rate_high
+        FROM {QUALITY_TABLE}
         WHERE passed = FALSE
         ORDER BY check_name
         """
@@ -152,8 +1742,8 @@ def run_quality_gate(conn: duckdb.DuckDBPyConnection, allow_failures: bool) -> N
 
     if failed_checks:
         print("[quality] failed checks detected:")
-        for check_name, observed_value in failed_checks:
-            print(f" - {check_name}: {observed_value}")
+        for check_name, check_mode, observed_value, rate_high in failed_checks:
+            print(f" - {format_check_failure(check_name, check_mode, observed_value, rate_high)}")
         if not allow_failures:
             raise RuntimeError(
                 "Warehouse quality checks failed. Re-run with "
@@ -163,6 +1753,56 @@ def run_quality_gate(conn: duckdb.DuckDBPyConnection, allow_failures: bool) -> N
         print("[quality] all checks passed")
 
 
+def drift_stale(
+    conn: duckdb.DuckDBPyConnection, rebuilt_relations: Set[str], full_refresh: bool = False
+) -> bool:
+    """Snapshot again when a profiled table was rebuilt, no report exists yet or
+    the last check failed on drift.
+    """
+    return (
+        full_refresh
+        or DRIFT_REPORT_TABLE not in list_relations(conn)
+        or bool(rebuilt_relations & profiled_relations())
+        or drift_unresolved(conn)
+    )
+
+
+def run_drift_check(
+    conn: duckdb.DuckDBPyConnection,
+    profiler: PipelineProfiler,
+    history: int,
+    thresholds: Dict[str, float],
+    fail_on_drift: bool,
+) -> None:
+    with profiler.step("drift", "drift_monitor") as counter:
+        results = run_drift_monitor(
+            conn,
+            profiler.run_id,
+            history=history,
+            thresholds=thresholds,
+            keep_drifted=not fail_on_drift,
+        )
+        counter.rows = len(results)
+    drifted = [result for result in results if result.status == "drift"]
+    baseline_runs = max((result.baseline_runs for result in results), default=0)
+    if baseline_runs == 0:
+        print(f"[drift] recorded first profile snapshot ({len(results)} metrics)")
+    elif drifted:
+        print(f"[drift] {len(drifted)} of {len(results)} metrics drifted from the baseline:")
+        for result in drifted:
+            print(f" - {format_drift(result)}")
+        if fail_on_drift:
+            raise RuntimeError(
+                f"Profiled metrics drifted; see {DRIFT_REPORT_TABLE}. "
+                "Re-run without --fail-on-drift to bypass."
+            )
+    else:
+        print(
+            f"[drift] {len(results)} metrics within thresholds "
+            f"(baseline of {baseline_runs} runs)"
+        )
+
+
 def print_run_summary(conn: duckdb.DuckDBPyConnection) -> None:
     summary = conn.execute(
         """
@@ -196,21 +1836,122 @@ def main() -> None:
     ensure_required_files(raw_dir)
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    model_paths = [sql_dir / model_name for model_name in SQL_MODEL_FILES]
-    for model_path in model_paths:
-        if not model_path.exists():
-            raise FileNotFoundError(f"Missing SQL model file: {model_path}")
+    model_paths = sorted(sql_dir.glob("*.sql"))
+    if not model_paths:
+        raise FileNotFoundError(f"No SQL model files found in {sql_dir}")
+
+    statements = parse_model_statements(model_paths)
+
+    report_path = (
+        Path(args.report_path) if args.report_path else db_path.parent / "pipeline_report.json"
+    )
+
+    if args.fact_chunk_months < 0:
+        raise ValueError("--fact-chunk-months must be zero or positive")
+    if args.drift_history < 1:
+        raise ValueError("--drift-history must be at least 1")
+    drift_thresholds = parse_thresholds(args.drift_threshold)
 
     conn = duckdb.connect(database=str(db_path))
+    configure_connection(conn, args.memory_limit, args.threads, args.temp_dir)
+    create_schemas(conn)
+    profiler = PipelineProfiler(conn)
+    profiler.start()
+    status = "failed"
     try:
-        create_schemas(conn)
-        load_raw_tables(conn, raw_dir)
-        execute_models(conn, model_paths)
-        run_quality_gate(conn, allow_failures=args.allow_quality_failures)
-        export_objects(conn, export_dir)
+        changed_relations, fingerprints = load_raw_tables(
+            conn,
+            raw_dir,
+            full_refresh=args.full_refresh,
+            profiler=profiler,
+            track_changes=args.incremental_models,
+        )
+        dirty_statements = select_dirty_statements(
+            conn, statements, changed_relations, full_refresh=args.full_refresh
+        )
+        upsert_targets: Set[str] = set()
+        if args.incremental_models:
+            upsert_targets = select_upsert_targets(
+                conn, dirty_statements, full_refresh=args.full_refresh
+            )
+        if not dirty_statements:
+            print("[model] all models up to date")
+        with tempfile.TemporaryDirectory(prefix="olist_profiles_") as profile_tmp:
+            profile_dir = Path(profile_tmp) if args.profile_slowest > 0 else None
+            timings = execute_models(
+                conn,
+                dirty_statements,
+                jobs=args.jobs,
+                profile_dir=profile_dir,
+                chunk_months=args.fact_chunk_months,
+                upsert_targets=frozenset(upsert_targets),
+            )
+            for timing in timings:
+                profiler.record(
+                    "model", timing.target, timing.started, timing.finished, timing.rows
+                )
+            slowest = sorted(timings, key=lambda t: t.duration, reverse=True)
+            for timing in slowest[: max(args.profile_slowest, 0)]:
+                if timing.profile_path is not None:
+                    profiler.add_profile(timing.target, timing.profile_path)
+        print_model_timings(dirty_statements, timings)
+        check_windows = upserted_check_windows(conn, dirty_statements, upsert_targets)
+        write_load_manifest(conn, fingerprints)
+        clear_changed_keys(conn)
+        rebuilt_relations = {statement.target for statement in dirty_statements}
+        if args.full_refresh:
+            args.check_mode = "full"
+        if read_model_manifest(conn).get(QUALITY_TABLE) != registry_hash(
+            QUALITY_CHECKS, args.check_mode
+        ):
+            # New checks or a new mode have never seen the older rows.
+            check_windows = {}
+        if quality_checks_stale(
+            conn, rebuilt_relations, args.check_mode, full_refresh=args.full_refresh
+        ):
+            plan = plan_from_args(conn, args, incremental_tables=check_windows)
+            evaluate_quality_checks(conn, profiler, plan, jobs=args.jobs)
+            rebuilt_relations.add(QUALITY_TABLE)
+        else:
+            print("[quality] checks up to date")
+        with profiler.step("quality", "quality_gate") as counter:
+            run_quality_gate(conn, allow_failures=args.allow_quality_failures)
+            counter.rows = conn.execute(f"SELECT COUNT(*) FROM {QUALITY_TABLE}").fetchone()[0]
+        if drift_stale(conn, rebuilt_relations, full_refresh=args.full_refresh):
+            run_drift_check(
+                conn,
+                profiler,
+                history=args.drift_history,
+                thresholds=drift_thresholds,
+                fail_on_drift=args.fail_on_drift,
+            )
+        else:
+            print("[drift] profiles up to date")
+        export_options = ExportOptions(
+            formats=args.formats,
+            parquet_compression=args.parquet_compression,
+            parquet_row_group_size=args.parquet_row_group_size,
+            partition_facts=args.partition_facts,
+        )
+        export_results = export_objects(
+            conn,
+            export_dir,
+            stale_export_objects(export_dir, read_pending_exports(conn), export_options),
+            options=export_options,
+            jobs=args.jobs,
+        )
+        clear_pending_exports(conn, [result.object_name for result in export_results])
+        for result in export_results:
+            profiler.record(
+                "export", result.object_name, result.started, result.finished, result.rows
+            )
         print_run_summary(conn)
+        status = "succeeded"
     finally:
+        report = profiler.finish(status, vars(args))
+        write_report(report, report_path)
         conn.close()
+        print(f"[profile] run {profiler.run_id} {status}; report -> {report_path}")
 
     print("[done] warehouse build complete")
 
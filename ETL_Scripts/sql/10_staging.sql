@@ -1,32 +1,35 @@
 -- 10_staging.sql
--- Type casting, cleaning, and reusable aggregates.
+-- Cleaning over typed raw tables, and reusable aggregates.
+-- Raw tables are parsed into declared types at load time (RAW_FILE_TO_TABLE
+-- in run_pipeline.py), so staging only trims and normalizes text. Models read
+-- by several downstream statements are tables; the rest are views.
 
 CREATE OR REPLACE TABLE stg.orders AS
 SELECT
     NULLIF(TRIM(order_id), '') AS order_id,
     NULLIF(TRIM(customer_id), '') AS customer_id,
     LOWER(NULLIF(TRIM(order_status), '')) AS order_status,
-    TRY_STRPTIME(NULLIF(TRIM(order_purchase_timestamp), ''), '%Y-%m-%d %H:%M:%S') AS order_purchase_ts,
-    TRY_STRPTIME(NULLIF(TRIM(order_approved_at), ''), '%Y-%m-%d %H:%M:%S') AS order_approved_ts,
-    TRY_STRPTIME(NULLIF(TRIM(order_delivered_carrier_date), ''), '%Y-%m-%d %H:%M:%S') AS order_delivered_carrier_ts,
-    TRY_STRPTIME(NULLIF(TRIM(order_delivered_customer_date), ''), '%Y-%m-%d %H:%M:%S') AS order_delivered_customer_ts,
-    TRY_STRPTIME(NULLIF(TRIM(order_estimated_delivery_date), ''), '%Y-%m-%d %H:%M:%S') AS order_estimated_delivery_ts
+    order_purchase_timestamp AS order_purchase_ts,
+    order_approved_at AS order_approved_ts,
+    order_delivered_carrier_date AS order_delivered_carrier_ts,
+    order_delivered_customer_date AS order_delivered_customer_ts,
+    order_estimated_delivery_date AS order_estimated_delivery_ts
 FROM raw.orders;
 
-CREATE OR REPLACE TABLE stg.customers AS
+CREATE OR REPLACE VIEW stg.customers AS
 SELECT
     NULLIF(TRIM(customer_id), '') AS customer_id,
     NULLIF(TRIM(customer_unique_id), '') AS customer_unique_id,
-    TRY_CAST(NULLIF(TRIM(customer_zip_code_prefix), '') AS INTEGER) AS customer_zip_code_prefix,
+    customer_zip_code_prefix,
     LOWER(NULLIF(TRIM(customer_city), '')) AS customer_city,
     UPPER(NULLIF(TRIM(customer_state), '')) AS customer_state
 FROM raw.customers;
 
-CREATE OR REPLACE TABLE stg.geolocation AS
+CREATE OR REPLACE VIEW stg.geolocation AS
 SELECT
-    TRY_CAST(NULLIF(TRIM(geolocation_zip_code_prefix), '') AS INTEGER) AS geolocation_zip_code_prefix,
-    TRY_CAST(NULLIF(TRIM(geolocation_lat), '') AS DOUBLE) AS geolocation_lat,
-    TRY_CAST(NULLIF(TRIM(geolocation_lng), '') AS DOUBLE) AS geolocation_lng,
+    geolocation_zip_code_prefix,
+    geolocation_lat,
+    geolocation_lng,
     LOWER(NULLIF(TRIM(geolocation_city), '')) AS geolocation_city,
     UPPER(NULLIF(TRIM(geolocation_state), '')) AS geolocation_state
 FROM raw.geolocation;
@@ -42,7 +45,7 @@ FROM stg.geolocation
 WHERE geolocation_zip_code_prefix IS NOT NULL
 GROUP BY geolocation_zip_code_prefix;
 
-CREATE OR REPLACE TABLE stg.products AS
+CREATE OR REPLACE VIEW stg.products AS
 SELECT
     NULLIF(TRIM(p.product_id), '') AS product_id,
     COALESCE(
@@ -50,21 +53,21 @@ SELECT
         NULLIF(TRIM(p.product_category_name), ''),
         'unknown'
     ) AS product_category,
-    TRY_CAST(NULLIF(TRIM(p.product_name_lenght), '') AS INTEGER) AS product_name_length,
-    TRY_CAST(NULLIF(TRIM(p.product_description_lenght), '') AS INTEGER) AS product_description_length,
-    TRY_CAST(NULLIF(TRIM(p.product_photos_qty), '') AS INTEGER) AS product_photos_qty,
-    TRY_CAST(NULLIF(TRIM(p.product_weight_g), '') AS DOUBLE) AS product_weight_g,
-    TRY_CAST(NULLIF(TRIM(p.product_length_cm), '') AS DOUBLE) AS product_length_cm,
-    TRY_CAST(NULLIF(TRIM(p.product_height_cm), '') AS DOUBLE) AS product_height_cm,
-    TRY_CAST(NULLIF(TRIM(p.product_width_cm), '') AS DOUBLE) AS product_width_cm
+    p.product_name_lenght AS product_name_length,
+    p.product_description_lenght AS product_description_length,
+    p.product_photos_qty,
+    p.product_weight_g,
+    p.product_length_cm,
+    p.product_height_cm,
+    p.product_width_cm
 FROM raw.products p
 LEFT JOIN raw.product_category_name_translation t
     ON p.product_category_name = t.product_category_name;
 
-CREATE OR REPLACE TABLE stg.sellers AS
+CREATE OR REPLACE VIEW stg.sellers AS
 SELECT
     NULLIF(TRIM(seller_id), '') AS seller_id,
-    TRY_CAST(NULLIF(TRIM(seller_zip_code_prefix), '') AS INTEGER) AS seller_zip_code_prefix,
+    seller_zip_code_prefix,
     LOWER(NULLIF(TRIM(seller_city), '')) AS seller_city,
     UPPER(NULLIF(TRIM(seller_state), '')) AS seller_state
 FROM raw.sellers;
@@ -72,32 +75,32 @@ FROM raw.sellers;
 CREATE OR REPLACE TABLE stg.order_items AS
 SELECT
     NULLIF(TRIM(order_id), '') AS order_id,
-    TRY_CAST(NULLIF(TRIM(order_item_id), '') AS INTEGER) AS order_item_id,
+    order_item_id,
     NULLIF(TRIM(product_id), '') AS product_id,
     NULLIF(TRIM(seller_id), '') AS seller_id,
-    TRY_STRPTIME(NULLIF(TRIM(shipping_limit_date), ''), '%Y-%m-%d %H:%M:%S') AS shipping_limit_ts,
-    TRY_CAST(NULLIF(TRIM(price), '') AS DOUBLE) AS price,
-    TRY_CAST(NULLIF(TRIM(freight_value), '') AS DOUBLE) AS freight_value
+    shipping_limit_date AS shipping_limit_ts,
+    price,
+    freight_value
 FROM raw.order_items;
 
 CREATE OR REPLACE TABLE stg.order_payments AS
 SELECT
     NULLIF(TRIM(order_id), '') AS order_id,
-    TRY_CAST(NULLIF(TRIM(payment_sequential), '') AS INTEGER) AS payment_sequential,
+    payment_sequential,
     LOWER(NULLIF(TRIM(payment_type), '')) AS payment_type,
-    TRY_CAST(NULLIF(TRIM(payment_installments), '') AS INTEGER) AS payment_installments,
-    TRY_CAST(NULLIF(TRIM(payment_value), '') AS DOUBLE) AS payment_value
+    payment_installments,
+    payment_value
 FROM raw.order_payments;
 
-CREATE OR REPLACE TABLE stg.order_reviews AS
+CREATE OR REPLACE VIEW stg.order_reviews AS
 SELECT
     NULLIF(TRIM(review_id), '') AS review_id,
     NULLIF(TRIM(order_id), '') AS order_id,
-    TRY_CAST(NULLIF(TRIM(review_score), '') AS INTEGER) AS review_score,
+    review_score,
     NULLIF(TRIM(review_comment_title), '') AS review_comment_title,
     NULLIF(TRIM(review_comment_message), '') AS review_comment_message,
-    TRY_STRPTIME(NULLIF(TRIM(review_creation_date), ''), '%Y-%m-%d %H:%M:%S') AS review_creation_ts,
-    TRY_STRPTIME(NULLIF(TRIM(review_answer_timestamp), ''), '%Y-%m-%d %H:%M:%S') AS review_answer_ts
+    review_creation_date AS review_creation_ts,
+    review_answer_timestamp AS review_answer_ts
 FROM raw.order_reviews;
 
 CREATE OR REPLACE TABLE stg.order_reviews_latest AS
@@ -189,3 +192,48 @@ LEFT JOIN stg.order_primary_seller ps
     ON ia.order_id = ps.order_id
 LEFT JOIN stg.sellers s
     ON ps.primary_seller_id = s.seller_id;
+
+-- Keys whose dimension or fact rows may differ from the last build, read from
+-- raw._changed_keys (filled by run_pipeline.py when raw files are diffed on load).
+-- Tables using upsert_filter rebuild only these keys under --incremental-models.
+
+CREATE OR REPLACE VIEW stg.changed_customers AS
+SELECT NULLIF(TRIM(key_value), '') AS customer_id
+FROM raw._changed_keys
+WHERE table_name = 'raw.customers'
+UNION
+SELECT c.customer_id
+FROM stg.customers c
+JOIN raw._changed_keys k
+    ON k.table_name = 'raw.geolocation'
+   AND CAST(c.customer_zip_code_prefix AS VARCHAR) = k.key_value;
+
+CREATE OR REPLACE VIEW stg.changed_products AS
+SELECT NULLIF(TRIM(key_value), '') AS product_id
+FROM raw._changed_keys
+WHERE table_name = 'raw.products'
+UNION
+SELECT NULLIF(TRIM(p.product_id), '') AS product_id
+FROM raw.products p
+JOIN raw._changed_keys k
+    ON k.table_name = 'raw.product_category_name_translation'
+   AND p.product_category_name = k.key_value;
+
+CREATE OR REPLACE VIEW stg.changed_sellers AS
+SELECT NULLIF(TRIM(key_value), '') AS seller_id
+FROM raw._changed_keys
+WHERE table_name = 'raw.sellers';
+
+CREATE OR REPLACE VIEW stg.changed_orders AS
+SELECT NULLIF(TRIM(key_value), '') AS order_id
+FROM raw._changed_keys
+WHERE table_name IN ('raw.orders', 'raw.order_items', 'raw.order_payments', 'raw.order_reviews')
+UNION
+SELECT o.order_id
+FROM stg.orders o
+WHERE o.customer_id IN (SELECT customer_id FROM stg.changed_customers)
+UNION
+SELECT oi.order_id
+FROM stg.order_items oi
+WHERE oi.seller_id IN (SELECT seller_id FROM stg.changed_sellers)
+   OR oi.product_id IN (SELECT product_id FROM stg.changed_products);
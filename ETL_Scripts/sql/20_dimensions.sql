@@ -1,9 +1,12 @@
 -- 20_dimensions.sql
 -- Build dimensional models.
+-- key_map / upsert_filter placeholders are filled in by run_pipeline.py. Surrogate
+-- keys come from persistent key maps, so they are stable across builds; with
+-- --incremental-models only the keys listed in the stg.changed_* views are rebuilt.
 
 CREATE OR REPLACE TABLE mart.dim_customer AS
 SELECT
-    ROW_NUMBER() OVER (ORDER BY c.customer_id) AS customer_sk,
+    k.customer_sk,
     c.customer_id,
     c.customer_unique_id,
     c.customer_zip_code_prefix,
@@ -12,13 +15,16 @@ SELECT
     g.geo_lat,
     g.geo_lng
 FROM stg.customers c
+LEFT JOIN {{ key_map(customer_sk) }} k
+    ON c.customer_id = k.customer_id
 LEFT JOIN stg.geolocation_lookup g
     ON c.customer_zip_code_prefix = g.geolocation_zip_code_prefix
-WHERE c.customer_id IS NOT NULL;
+WHERE c.customer_id IS NOT NULL
+  AND {{ upsert_filter(c.customer_id, stg.changed_customers) }};
 
 CREATE OR REPLACE TABLE mart.dim_product AS
 SELECT
-    ROW_NUMBER() OVER (ORDER BY p.product_id) AS product_sk,
+    k.product_sk,
     p.product_id,
     LOWER(COALESCE(p.product_category, 'unknown')) AS product_category,
     p.product_name_length,
@@ -36,11 +42,14 @@ SELECT
         ELSE NULL
     END AS product_volume_cm3
 FROM stg.products p
-WHERE p.product_id IS NOT NULL;
+LEFT JOIN {{ key_map(product_sk) }} k
+    ON p.product_id = k.product_id
+WHERE p.product_id IS NOT NULL
+  AND {{ upsert_filter(p.product_id, stg.changed_products) }};
 
 CREATE OR REPLACE TABLE mart.dim_review AS
 SELECT
-    ROW_NUMBER() OVER (ORDER BY r.order_id) AS review_sk,
+    k.review_sk,
     r.order_id,
     r.review_id,
     r.review_score,
@@ -49,17 +58,23 @@ SELECT
     LENGTH(COALESCE(r.review_comment_message, '')) AS review_message_length,
     CASE WHEN COALESCE(r.review_score, 0) <= 2 THEN 1 ELSE 0 END AS is_low_score
 FROM stg.order_reviews_latest r
-WHERE r.order_id IS NOT NULL;
+LEFT JOIN {{ key_map(review_sk) }} k
+    ON r.order_id = k.order_id
+WHERE r.order_id IS NOT NULL
+  AND {{ upsert_filter(r.order_id, stg.changed_orders) }};
 
 CREATE OR REPLACE TABLE mart.dim_seller AS
 SELECT
-    ROW_NUMBER() OVER (ORDER BY s.seller_id) AS seller_sk,
+    k.seller_sk,
     s.seller_id,
     s.seller_zip_code_prefix,
     s.seller_city,
     s.seller_state
 FROM stg.sellers s
-WHERE s.seller_id IS NOT NULL;
+LEFT JOIN {{ key_map(seller_sk) }} k
+    ON s.seller_id = k.seller_id
+WHERE s.seller_id IS NOT NULL
+  AND {{ upsert_filter(s.seller_id, stg.changed_sellers) }};
 
 CREATE OR REPLACE TABLE mart.dim_time AS
 WITH all_dates AS (
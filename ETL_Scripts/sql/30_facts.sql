@@ -1,5 +1,8 @@
 -- 30_facts.sql
 -- Build fact tables at order and order-item grain.
+-- chunk_filter / key_map / upsert_filter placeholders are filled in by run_pipeline.py;
+-- with --fact-chunk-months each table is built one purchase-date window at a time,
+-- and with --incremental-models only orders listed in stg.changed_orders are rebuilt.
 
 CREATE OR REPLACE TABLE mart.fact_orders AS
 WITH base AS (
@@ -39,7 +42,7 @@ WITH base AS (
         ON o.order_id = os.order_id
 )
 SELECT
-    ROW_NUMBER() OVER (ORDER BY b.order_id) AS order_sk,
+    k.order_sk,
     b.order_id,
     dc.customer_sk,
     ds.seller_sk AS primary_seller_sk,
@@ -105,17 +108,21 @@ SELECT
     END AS freight_to_gmv_ratio,
     COALESCE(b.gross_merchandise_value, 0) - COALESCE(b.total_freight_value, 0) AS contribution_margin_proxy
 FROM base b
+LEFT JOIN {{ key_map(order_sk) }} k
+    ON b.order_id = k.order_id
 LEFT JOIN mart.dim_customer dc
     ON b.customer_id = dc.customer_id
 LEFT JOIN mart.dim_seller ds
     ON b.primary_seller_id = ds.seller_id
 LEFT JOIN mart.dim_review dr
     ON b.order_id = dr.order_id
-WHERE b.order_id IS NOT NULL;
+WHERE b.order_id IS NOT NULL
+  AND {{ chunk_filter(CAST(STRFTIME(CAST(b.order_purchase_ts AS DATE), '%Y%m%d') AS INTEGER)) }}
+  AND {{ upsert_filter(b.order_id, stg.changed_orders) }};
 
 CREATE OR REPLACE TABLE mart.fact_order_items AS
 SELECT
-    ROW_NUMBER() OVER (ORDER BY oi.order_id, oi.order_item_id) AS order_item_sk,
+    k.order_item_sk,
     oi.order_id,
     oi.order_item_id,
     fo.order_sk,
@@ -135,10 +142,15 @@ SELECT
     fo.delay_days,
     fo.is_late_delivery
 FROM stg.order_items oi
+LEFT JOIN {{ key_map(order_item_sk) }} k
+    ON oi.order_id = k.order_id
+   AND oi.order_item_id = k.order_item_id
 LEFT JOIN mart.fact_orders fo
     ON oi.order_id = fo.order_id
 LEFT JOIN mart.dim_product dp
     ON oi.product_id = dp.product_id
 LEFT JOIN mart.dim_seller ds
     ON oi.seller_id = ds.seller_id
-WHERE oi.order_id IS NOT NULL;
+WHERE oi.order_id IS NOT NULL
+  AND {{ chunk_filter(fo.purchase_date_key) }}
+  AND {{ upsert_filter(oi.order_id, stg.changed_orders) }};
@@ -7,6 +7,16 @@ from pathlib import Path
 
 import duckdb
 
+from quality_checks import (
+    QUALITY_CHECKS,
+    QUALITY_TABLE,
+    add_check_arguments,
+    describe_plan,
+    format_check_failure,
+    plan_from_args,
+    run_quality_checks,
+)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Validate Olist warehouse models.")
@@ -15,6 +25,14 @@ def parse_args() -> argparse.Namespace:
         default="data/warehouse/olist.duckdb",
         help="DuckDB database file created by run_pipeline.py",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Tables checked concurrently when re-evaluating checks (default: 1).",
+    )
+    # "stored" reads the results the last pipeline run wrote instead of re-checking.
+    add_check_arguments(parser, "stored", extra_modes=("stored",))
     return parser.parse_args()
 
 
@@ -37,25 +55,41 @@ def main() -> None:
             "mart.vw_exec_summary_monthly",
             "mart.vw_ops_state_bottlenecks",
             "mart.vw_csat_delay_impact",
-            "mart.data_quality_checks",
+            QUALITY_TABLE,
         ]
 
         for object_name in required_objects:
             conn.execute(f"SELECT 1 FROM {object_name} LIMIT 1;")
             print(f"[ok] object exists and queryable: {object_name}")
 
-        failed = conn.execute(
-            """
-            SELECT check_name, observed_value
-            FROM mart.data_quality_checks
-            WHERE passed = FALSE
-            ORDER BY check_name
-            """
-        ).fetchall()
+        if args.check_mode == "stored":
+            failed = conn.execute(
+                f"""
+                SELECT check_name, check_mode, observed_value, violation_rate_high
+                FROM {QUALITY_TABLE}
+                WHERE passed = FALSE
+                ORDER BY check_name
+                """
+            ).fetchall()
+        else:
+            plan = plan_from_args(conn, args)
+            print(f"[ok] re-evaluating quality checks in {describe_plan(plan)} mode")
+            scans = run_quality_checks(conn, QUALITY_CHECKS, jobs=args.jobs, plan=plan)
+            failed = sorted(
+                (
+                    result.check_name,
+                    result.check_mode,
+                    result.observed_value,
+                    result.violation_rate_high,
+                )
+                for scan in scans
+                for result in scan.results
+                if result.passed is False
+            )
         if failed:
             print("[fail] data quality checks:")
-            for check_name, observed_value in failed:
-                print(f" - {check_name}: {observed_value}")
+            for check_name, check_mode, observed_value, rate_high in failed:
+                print(f" - {format_check_failure(check_name, check_mode, observed_value, rate_high)}")
             raise RuntimeError("Quality check failures detected.")
 
         null_purchase_dates = conn.execute(
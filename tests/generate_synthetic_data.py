@@ -0,0 +1,558 @@
+"""Generate Olist-shaped raw CSVs at an arbitrary order volume for benchmarking."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "ETL_Scripts"))
+
+from run_pipeline import RAW_FILE_TO_TABLE, RAW_TIMESTAMP_FORMAT, quote_path  # noqa: E402
+
+
+DEFAULT_ORDERS = 1_000_000
+DEFAULT_SEED = 42
+DEFAULT_START_DATE = date(2016, 9, 4)
+DEFAULT_END_DATE = date(2018, 9, 3)
+
+# Entity ratios observed in the public Olist dataset (~99.4k orders).
+PRODUCTS_PER_ORDER = 0.33
+SELLERS_PER_ORDER = 0.031
+ZIP_PREFIX_COUNT = 19_000
+GEOLOCATION_ROWS_PER_ZIP_PER_100K_ORDERS = 52
+
+WEIGHT_RESOLUTION = 1000
+UNIFORM_MODULUS = 1_000_003
+
+# state, customer share, seller share, zip prefix range, capital lat/lng, capital.
+STATES: Tuple[Tuple[str, float, float, int, int, float, float, str], ...] = (
+    ("SP", 0.420, 0.597, 1000, 19999, -23.55, -46.63, "sao paulo"),
+    ("RJ", 0.129, 0.055, 20000, 28999, -22.91, -43.17, "rio de janeiro"),
+    ("MG", 0.117, 0.079, 30000, 39999, -19.92, -43.94, "belo horizonte"),
+    ("RS", 0.055, 0.042, 90000, 99999, -30.03, -51.23, "porto alegre"),
+    ("PR", 0.051, 0.112, 80000, 87999, -25.43, -49.27, "curitiba"),
+    ("SC", 0.037, 0.061, 88000, 89999, -27.60, -48.55, "florianopolis"),
+    ("BA", 0.034, 0.006, 40000, 48999, -12.97, -38.50, "salvador"),
+    ("DF", 0.021, 0.010, 70000, 72799, -15.79, -47.88, "brasilia"),
+    ("ES", 0.020, 0.007, 29000, 29999, -20.32, -40.34, "vitoria"),
+    ("GO", 0.020, 0.013, 72800, 76799, -16.68, -49.25, "goiania"),
+    ("PE", 0.017, 0.003, 50000, 56999, -8.05, -34.88, "recife"),
+    ("CE", 0.013, 0.004, 60000, 63999, -3.73, -38.52, "fortaleza"),
+    ("PA", 0.010, 0.001, 66000, 68899, -1.46, -48.50, "belem"),
+    ("MT", 0.009, 0.002, 78000, 78899, -15.60, -56.10, "cuiaba"),
+    ("MA", 0.0075, 0.001, 65000, 65999, -2.53, -44.30, "sao luis"),
+    ("MS", 0.007, 0.002, 79000, 79999, -20.44, -54.65, "campo grande"),
+    ("PB", 0.0054, 0.002, 58000, 58999, -7.12, -34.86, "joao pessoa"),
+    ("PI", 0.005, 0.001, 64000, 64999, -5.09, -42.80, "teresina"),
+    ("RN", 0.0049, 0.002, 59000, 59999, -5.79, -35.21, "natal"),
+    ("AL", 0.0042, 0.001, 57000, 57999, -9.67, -35.74, "maceio"),
+    ("SE", 0.0034, 0.001, 49000, 49999, -10.91, -37.07, "aracaju"),
+    ("TO", 0.0028, 0.001, 77000, 77999, -10.18, -48.33, "palmas"),
+    ("RO", 0.0025, 0.001, 76800, 76999, -8.76, -63.90, "porto velho"),
+    ("AM", 0.0015, 0.001, 69000, 69299, -3.12, -60.02, "manaus"),
+    ("AC", 0.0008, 0.0005, 69900, 69999, -9.97, -67.81, "rio branco"),
+    ("AP", 0.0007, 0.0005, 68900, 68999, 0.03, -51.07, "macapa"),
+    ("RR", 0.0005, 0.0005, 69300, 69399, 2.82, -60.67, "boa vista"),
+)
+
+# Portuguese name, English translation (None when Olist ships no translation), share.
+CATEGORIES: Tuple[Tuple[str, Optional[str], float], ...] = (
+    ("cama_mesa_banho", "bed_bath_table", 0.100),
+    ("beleza_saude", "health_beauty", 0.090),
+    ("esporte_lazer", "sports_leisure", 0.080),
+    ("moveis_decoracao", "furniture_decor", 0.075),
+    ("informatica_acessorios", "computers_accessories", 0.070),
+    ("utilidades_domesticas", "housewares", 0.065),
+    ("relogios_presentes", "watches_gifts", 0.055),
+    ("telefonia", "telephony", 0.040),
+    ("ferramentas_jardim", "garden_tools", 0.040),
+    ("automotivo", "auto", 0.040),
+    ("brinquedos", "toys", 0.038),
+    ("cool_stuff", "cool_stuff", 0.035),
+    ("perfumaria", "perfumery", 0.030),
+    ("bebes", "baby", 0.028),
+    ("eletronicos", "electronics", 0.025),
+    ("papelaria", "stationery", 0.022),
+    ("fashion_bolsas_e_acessorios", "fashion_bags_accessories", 0.018),
+    ("pet_shop", "pet_shop", 0.017),
+    ("moveis_escritorio", "office_furniture", 0.015),
+    ("consoles_games", "consoles_games", 0.010),
+    ("malas_acessorios", "luggage_accessories", 0.010),
+    ("construcao_ferramentas_construcao", "construction_tools_construction", 0.009),
+    ("eletrodomesticos", "home_appliances", 0.007),
+    ("instrumentos_musicais", "musical_instruments", 0.006),
+    ("eletroportateis", "small_appliances", 0.006),
+    ("casa_construcao", "home_construction", 0.005),
+    ("livros_interesse_geral", "books_general_interest", 0.005),
+    ("alimentos", "food", 0.004),
+    ("moveis_sala", "furniture_living_room", 0.004),
+    ("casa_conforto", "home_confort", 0.004),
+    ("bebidas", "drinks", 0.003),
+    ("audio", "audio", 0.003),
+    ("climatizacao", "air_conditioning", 0.003),
+    ("pc_gamer", None, 0.001),
+)
+UNCATEGORIZED_PRODUCT_SHARE = 0.018
+
+ORDER_STATUSES = (
+    ("delivered", 0.970),
+    ("shipped", 0.011),
+    ("canceled", 0.006),
+    ("unavailable", 0.006),
+    ("invoiced", 0.003),
+    ("processing", 0.003),
+    ("approved", 0.001),
+)
+PAYMENT_TYPES = (
+    ("credit_card", 0.760),
+    ("boleto", 0.195),
+    ("debit_card", 0.015),
+    ("voucher", 0.030),
+)
+CREDIT_CARD_INSTALLMENTS = (
+    (1, 0.49),
+    (2, 0.12),
+    (3, 0.10),
+    (4, 0.07),
+    (5, 0.05),
+    (6, 0.04),
+    (8, 0.04),
+    (10, 0.07),
+    (12, 0.02),
+)
+VOUCHER_SPLIT_SHARE = 0.03
+# Review score mix for on-time versus late (or undelivered) orders.
+ON_TIME_REVIEW_SCORES = ((1, 0.07), (2, 0.03), (3, 0.08), (4, 0.20), (5, 0.62))
+LATE_REVIEW_SCORES = ((1, 0.46), (2, 0.10), (3, 0.12), (4, 0.13), (5, 0.19))
+MISSING_REVIEW_SHARE = 0.008
+POSITIVE_COMMENTS = (
+    "produto chegou antes do prazo",
+    "otimo produto, recomendo",
+    "entrega rapida e bem embalado",
+    "muito bom, conforme anunciado",
+)
+NEGATIVE_COMMENTS = (
+    "produto nao chegou ate agora",
+    "entrega atrasada, nao recomendo",
+    "veio com defeito",
+    "recebi apenas um dos produtos",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Write synthetic Olist raw CSVs with referential integrity at a chosen scale."
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        required=True,
+        help="Directory that receives the nine raw CSV files.",
+    )
+    parser.add_argument(
+        "--orders",
+        type=int,
+        default=DEFAULT_ORDERS,
+        help=(
+            "Number of orders to generate; the public dataset has ~100k, so 1000000 "
+            f"and 10000000 give 10x and 100x volume (default: {DEFAULT_ORDERS})."
+        ),
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help=f"Seed for every generated value; same seed, same files (default: {DEFAULT_SEED}).",
+    )
+    parser.add_argument(
+        "--start-date",
+        type=date.fromisoformat,
+        default=DEFAULT_START_DATE,
+        help=f"First purchase date (default: {DEFAULT_START_DATE.isoformat()}).",
+    )
+    parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        default=DEFAULT_END_DATE,
+        help=f"Last purchase date (default: {DEFAULT_END_DATE.isoformat()}).",
+    )
+    args = parser.parse_args()
+    if args.orders <= 0:
+        parser.error("--orders must be positive")
+    if args.end_date <= args.start_date:
+        parser.error("--end-date must be after --start-date")
+    return args
+
+
+def sql_literal(value: object) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value)
+
+
+def sql_list(values: Sequence[object]) -> str:
+    return "[" + ", ".join(sql_literal(value) for value in values) + "]"
+
+
+def weighted_list(values: Sequence[object], weights: Sequence[float]) -> str:
+    """Expand weights into a SQL list literal sampled with one uniform draw.
+
+    Every value keeps at least one slot so rare states and categories still
+    appear at small scales.
+    """
+    total = sum(weights)
+    slots = [max(1, round(weight / total * WEIGHT_RESOLUTION)) for weight in weights]
+    expanded: List[object] = []
+    for value, count in zip(values, slots):
+        expanded.extend([value] * count)
+    return sql_list(expanded)
+
+
+def define_generators(
+    conn: duckdb.DuckDBPyConnection,
+    orders: int,
+    seed: int,
+    start_date: date,
+    end_date: date,
+) -> None:
+    """Register the reference tables and macros every generated file draws from.
+
+    Each value is a pure function of the row index and the seed, so child
+    files (items, payments, reviews) recompute the parent order attributes
+    they need instead of joining a materialized order table.
+    """
+    product_count = max(10, round(orders * PRODUCTS_PER_ORDER))
+    seller_count = max(3, round(orders * SELLERS_PER_ORDER))
+    span_seconds = int((end_date - start_date).total_seconds())
+
+    state_rows = ", ".join(
+        "(" + ", ".join(sql_literal(value) for value in (index, *state)) + ")"
+        for index, state in enumerate(STATES)
+    )
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE state_ref AS
+        SELECT
+            *,
+            GREATEST(1, CAST(ROUND(customer_share * {ZIP_PREFIX_COUNT}) AS INTEGER)) AS zip_slots
+        FROM (VALUES {state_rows}) AS s(
+            state_index, state, customer_share, seller_share,
+            zip_low, zip_high, capital_lat, capital_lng, capital
+        );
+        """
+    )
+
+    uniform = f"(hash(key, salt, {seed}) % {UNIFORM_MODULUS}) / {UNIFORM_MODULUS}.0"
+    macros = [
+        f"u(key, salt) AS {uniform}",
+        f"normal(key, salt) AS "
+        f"sqrt(-2 * ln(GREATEST(u(key, salt || ':a'), 1e-9))) * cos(2 * pi() * u(key, salt || ':b'))",
+        f"pick(choices, draw) AS choices[1 + CAST(floor(draw * len(choices)) AS INTEGER)]",
+        f"entity_id(kind, key) AS md5(concat(kind, '-', {seed}, '-', key))",
+        f"customer_state_index(i) AS pick({weighted_list(range(len(STATES)), [s[1] for s in STATES])}, u(i, 'customer_state'))",
+        f"seller_state_index(s) AS pick({weighted_list(range(len(STATES)), [s[2] for s in STATES])}, u(s, 'seller_state'))",
+        f"purchase_ts(i) AS TIMESTAMP '{start_date.isoformat()}' "
+        f"+ to_seconds(CAST(sqrt(u(i, 'purchase')) * {span_seconds} AS BIGINT))",
+        f"order_status(i) AS pick({weighted_list(*zip(*ORDER_STATUSES))}, u(i, 'status'))",
+        "approved_ts(i) AS CASE WHEN order_status(i) <> 'canceled' "
+        "THEN purchase_ts(i) + to_seconds(CAST(u(i, 'approve') * 172800 AS BIGINT)) END",
+        "carrier_ts(i) AS CASE WHEN order_status(i) IN ('delivered', 'shipped') "
+        "THEN approved_ts(i) + to_seconds(CAST((1 + u(i, 'carrier') * 4) * 86400 AS BIGINT)) END",
+        "delivered_ts(i) AS CASE WHEN order_status(i) = 'delivered' "
+        "THEN carrier_ts(i) + to_seconds(CAST((1 - 7 * ln(GREATEST(u(i, 'transit'), 1e-9))) * 86400 AS BIGINT)) END",
+        "estimated_ts(i) AS date_trunc('day', purchase_ts(i)) "
+        "+ to_days(CAST(15 + floor(u(i, 'estimate') * 20) AS INTEGER))",
+        "is_late(i) AS COALESCE(delivered_ts(i) > estimated_ts(i), order_status(i) <> 'delivered')",
+        "item_count(i) AS CASE "
+        "WHEN order_status(i) = 'unavailable' THEN 0 "
+        "WHEN u(i, 'items') < 0.900 THEN 1 "
+        "WHEN u(i, 'items') < 0.975 THEN 2 "
+        "WHEN u(i, 'items') < 0.995 THEN 3 "
+        "ELSE 4 + CAST(floor(u(i, 'items_tail') * 3) AS INTEGER) END",
+        # Half of multi-item orders repeat the first product, as Olist does for quantities.
+        f"item_product(i, j) AS CAST(floor(pow(u(i * 8 + CASE WHEN j > 0 AND u(i, 'repeat') < 0.5 "
+        f"THEN 0 ELSE j END, 'product'), 2) * {product_count}) AS BIGINT)",
+        f"product_seller(p) AS CAST(floor(pow(u(p, 'seller'), 1.5) * {seller_count}) AS BIGINT)",
+        "product_price(p) AS ROUND(GREATEST(0.85, exp(4.3 + 0.9 * normal(p, 'price'))), 2)",
+        "item_freight(i, j) AS ROUND(8 + exp(2.6 + 0.5 * normal(i * 8 + j, 'freight')), 2)",
+        "order_total(i) AS ROUND(list_sum(list_transform(range(item_count(i)), "
+        "lambda j: product_price(item_product(i, j)) + item_freight(i, j))), 2)",
+    ]
+    for macro in macros:
+        conn.execute(f"CREATE TEMP MACRO {macro}")
+
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE zip_ref AS
+        SELECT
+            s.state_index,
+            s.state,
+            slot,
+            s.zip_low + slot * ((s.zip_high - s.zip_low) // s.zip_slots) AS zip_prefix,
+            CASE
+                WHEN slot < GREATEST(1, s.zip_slots // 3) THEN s.capital
+                ELSE 'municipio ' || lower(s.state) || ' ' || CAST(slot AS VARCHAR)
+            END AS city,
+            s.capital_lat + (u(s.state_index * 100000 + slot, 'zip_lat') - 0.5) * 3 AS center_lat,
+            s.capital_lng + (u(s.state_index * 100000 + slot, 'zip_lng') - 0.5) * 3 AS center_lng
+        FROM state_ref AS s, range(s.zip_slots) AS z(slot);
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE category_ref AS
+        SELECT * FROM (VALUES {", ".join(
+            "(" + ", ".join(sql_literal(v) for v in (index, name, english)) + ")"
+            for index, (name, english, _) in enumerate(CATEGORIES)
+        )}) AS c(category_index, category_name, category_name_english);
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TEMP MACRO product_category_index(p) AS CASE
+            WHEN u(p, 'uncategorized') < {UNCATEGORIZED_PRODUCT_SHARE} THEN NULL
+            ELSE pick({weighted_list(range(len(CATEGORIES)), [c[2] for c in CATEGORIES])}, u(p, 'category'))
+        END;
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE scale AS
+        SELECT
+            {orders}::BIGINT AS orders,
+            {product_count}::BIGINT AS products,
+            {seller_count}::BIGINT AS sellers,
+            GREATEST(1, CAST(ROUND({GEOLOCATION_ROWS_PER_ZIP_PER_100K_ORDERS} * {orders} / 100000.0) AS INTEGER))
+                AS geolocation_rows_per_zip;
+        """
+    )
+
+
+def entity_queries() -> dict:
+    """SELECT statements producing each raw file, keyed by file name."""
+    zip_pick = (
+        "JOIN state_ref AS s ON s.state_index = {state_index} "
+        "JOIN zip_ref AS z ON z.state_index = s.state_index "
+        "AND z.slot = CAST(floor(u({key}, '{salt}') * s.zip_slots) AS INTEGER)"
+    )
+    return {
+        "olist_customers_dataset.csv": f"""
+            SELECT
+                entity_id('customer', o.i) AS customer_id,
+                -- ~3% of customers return with a new customer_id per order.
+                entity_id('unique', CASE WHEN u(o.i, 'repeat_customer') < 0.03
+                    THEN CAST(floor(u(o.i, 'repeat_of') * o.i) AS BIGINT) ELSE o.i END)
+                    AS customer_unique_id,
+                z.zip_prefix AS customer_zip_code_prefix,
+                z.city AS customer_city,
+                z.state AS customer_state
+            FROM range((SELECT orders FROM scale)) AS o(i)
+            {zip_pick.format(state_index="customer_state_index(o.i)", key="o.i", salt="customer_zip")}
+            ORDER BY o.i
+        """,
+        "olist_geolocation_dataset.csv": """
+            SELECT
+                z.zip_prefix AS geolocation_zip_code_prefix,
+                ROUND(z.center_lat + (u(z.zip_prefix * 10000 + g.k, 'geo_lat') - 0.5) * 0.05, 8)
+                    AS geolocation_lat,
+                ROUND(z.center_lng + (u(z.zip_prefix * 10000 + g.k, 'geo_lng') - 0.5) * 0.05, 8)
+                    AS geolocation_lng,
+                z.city AS geolocation_city,
+                z.state AS geolocation_state
+            FROM zip_ref AS z, range((SELECT geolocation_rows_per_zip FROM scale)) AS g(k)
+            ORDER BY z.zip_prefix, g.k
+        """,
+        "olist_order_items_dataset.csv": """
+            SELECT
+                entity_id('order', i) AS order_id,
+                j + 1 AS order_item_id,
+                entity_id('product', item_product(i, j)) AS product_id,
+                entity_id('seller', product_seller(item_product(i, j))) AS seller_id,
+                approved_ts(i) + to_days(6) AS shipping_limit_date,
+                product_price(item_product(i, j)) AS price,
+                item_freight(i, j) AS freight_value
+            FROM (
+                SELECT i, unnest(range(item_count(i))) AS j
+                FROM range((SELECT orders FROM scale)) AS o(i)
+            )
+            ORDER BY i, j
+        """,
+        "olist_order_payments_dataset.csv": f"""
+            WITH payments AS (
+                SELECT
+                    i,
+                    order_total(i) AS total,
+                    pick({weighted_list(*zip(*PAYMENT_TYPES))}, u(i, 'payment_type')) AS payment_type,
+                    u(i, 'voucher_split') < {VOUCHER_SPLIT_SHARE} AS has_voucher
+                FROM range((SELECT orders FROM scale)) AS o(i)
+            )
+            SELECT
+                entity_id('order', i) AS order_id,
+                s.seq + 1 AS payment_sequential,
+                CASE WHEN s.seq = 0 THEN payment_type ELSE 'voucher' END AS payment_type,
+                CASE
+                    WHEN s.seq = 0 AND payment_type = 'credit_card'
+                        THEN pick({weighted_list(*zip(*CREDIT_CARD_INSTALLMENTS))}, u(i, 'installments'))
+                    ELSE 1
+                END AS payment_installments,
+                CASE
+                    WHEN NOT has_voucher THEN total
+                    WHEN s.seq = 0 THEN ROUND(total - ROUND(total * 0.2, 2), 2)
+                    ELSE ROUND(total * 0.2, 2)
+                END AS payment_value
+            FROM payments, range(2) AS s(seq)
+            WHERE s.seq = 0 OR has_voucher
+            ORDER BY i, s.seq
+        """,
+        "olist_order_reviews_dataset.csv": f"""
+            WITH reviews AS (
+                SELECT
+                    i,
+                    CASE
+                        WHEN is_late(i) THEN pick({weighted_list(*zip(*LATE_REVIEW_SCORES))}, u(i, 'score'))
+                        ELSE pick({weighted_list(*zip(*ON_TIME_REVIEW_SCORES))}, u(i, 'score'))
+                    END AS review_score,
+                    date_trunc('day', COALESCE(delivered_ts(i), estimated_ts(i))) + to_days(1)
+                        AS review_creation_date
+                FROM range((SELECT orders FROM scale)) AS o(i)
+                WHERE u(i, 'review') >= {MISSING_REVIEW_SHARE}
+            )
+            SELECT
+                entity_id('review', i) AS review_id,
+                entity_id('order', i) AS order_id,
+                review_score,
+                CASE WHEN u(i, 'comment_title') < 0.12
+                    THEN CASE WHEN review_score >= 4 THEN 'recomendo' ELSE 'nao recomendo' END
+                END AS review_comment_title,
+                CASE WHEN u(i, 'comment') < 0.41
+                    THEN CASE WHEN review_score >= 4
+                        THEN pick({sql_list(POSITIVE_COMMENTS)}, u(i, 'comment_text'))
+                        ELSE pick({sql_list(NEGATIVE_COMMENTS)}, u(i, 'comment_text'))
+                    END
+                END AS review_comment_message,
+                review_creation_date,
+                review_creation_date + to_seconds(CAST(u(i, 'answer') * 259200 AS BIGINT))
+                    AS review_answer_timestamp
+            FROM reviews
+            ORDER BY i
+        """,
+        "olist_orders_dataset.csv": """
+            SELECT
+                entity_id('order', i) AS order_id,
+                entity_id('customer', i) AS customer_id,
+                order_status(i) AS order_status,
+                purchase_ts(i) AS order_purchase_timestamp,
+                approved_ts(i) AS order_approved_at,
+                carrier_ts(i) AS order_delivered_carrier_date,
+                delivered_ts(i) AS order_delivered_customer_date,
+                estimated_ts(i) AS order_estimated_delivery_date
+            FROM range((SELECT orders FROM scale)) AS o(i)
+            ORDER BY i
+        """,
+        "olist_products_dataset.csv": """
+            WITH products AS (
+                SELECT p, product_category_index(p) AS category_index
+                FROM range((SELECT products FROM scale)) AS r(p)
+            )
+            SELECT
+                entity_id('product', p) AS product_id,
+                c.category_name AS product_category_name,
+                CASE WHEN c.category_name IS NOT NULL
+                    THEN 20 + CAST(floor(u(p, 'name_length') * 45) AS INTEGER) END
+                    AS product_name_lenght,
+                CASE WHEN c.category_name IS NOT NULL
+                    THEN CAST(GREATEST(4, exp(6.4 + 0.7 * normal(p, 'description'))) AS INTEGER) END
+                    AS product_description_lenght,
+                CASE WHEN c.category_name IS NOT NULL
+                    THEN 1 + CAST(floor(pow(u(p, 'photos'), 2.5) * 6) AS INTEGER) END
+                    AS product_photos_qty,
+                ROUND(GREATEST(50, exp(6.6 + 1.2 * normal(p, 'weight')))) AS product_weight_g,
+                ROUND(GREATEST(7, exp(3.2 + 0.5 * normal(p, 'length')))) AS product_length_cm,
+                ROUND(GREATEST(2, exp(2.5 + 0.7 * normal(p, 'height')))) AS product_height_cm,
+                ROUND(GREATEST(6, exp(3.0 + 0.5 * normal(p, 'width')))) AS product_width_cm
+            FROM products
+            LEFT JOIN category_ref AS c ON c.category_index = products.category_index
+            ORDER BY p
+        """,
+        "olist_sellers_dataset.csv": f"""
+            SELECT
+                entity_id('seller', r.sid) AS seller_id,
+                z.zip_prefix AS seller_zip_code_prefix,
+                z.city AS seller_city,
+                z.state AS seller_state
+            FROM range((SELECT sellers FROM scale)) AS r(sid)
+            {zip_pick.format(state_index="seller_state_index(r.sid)", key="r.sid", salt="seller_zip")}
+            ORDER BY r.sid
+        """,
+        "product_category_name_translation.csv": """
+            SELECT
+                category_name AS product_category_name,
+                category_name_english AS product_category_name_english
+            FROM category_ref
+            WHERE category_name_english IS NOT NULL
+            ORDER BY category_index
+        """,
+    }
+
+
+def check_columns(conn: duckdb.DuckDBPyConnection, file_name: str, query: str) -> None:
+    expected = [name for name, _ in RAW_FILE_TO_TABLE[file_name].columns]
+    actual = [row[0] for row in conn.execute(f"DESCRIBE {query}").fetchall()]
+    if actual != expected:
+        raise RuntimeError(
+            f"Synthetic {file_name} columns {actual} do not match the raw spec {expected}."
+        )
+
+
+def main() -> None:
+    args = parse_args()
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = duckdb.connect()
+    try:
+        define_generators(conn, args.orders, args.seed, args.start_date, args.end_date)
+        products, sellers = conn.execute("SELECT products, sellers FROM scale").fetchone()
+        print(
+            f"[synthetic] {args.orders:,} orders, {products:,} products, "
+            f"{sellers:,} sellers (seed {args.seed})"
+        )
+
+        queries = entity_queries()
+        missing = sorted(set(RAW_FILE_TO_TABLE) - set(queries))
+        if missing:
+            raise RuntimeError(f"No synthetic generator for raw files: {missing}")
+
+        total_start = time.perf_counter()
+        for file_name in sorted(RAW_FILE_TO_TABLE):
+            query = queries[file_name]
+            check_columns(conn, file_name, query)
+            target = args.output_dir / file_name
+            started = time.perf_counter()
+            rows = conn.execute(
+                f"""
+                COPY ({query}) TO '{quote_path(target)}'
+                (HEADER, DELIMITER ',', TIMESTAMPFORMAT '{RAW_TIMESTAMP_FORMAT}');
+                """
+            ).fetchone()[0]
+            print(
+                f"[synthetic] {file_name}: {rows:,} rows in {time.perf_counter() - started:.2f}s"
+            )
+        print(
+            f"[synthetic] wrote {len(queries)} files to {args.output_dir} "
+            f"in {time.perf_counter() - total_start:.2f}s"
+        )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""Time every pipeline and dashboard stage at several data scales and gate regressions."""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "ETL_Scripts"))
+
+from run_pipeline import parse_model_statements  # noqa: E402
+
+
+DEFAULT_SCALES = (10_000, 100_000)
+DEFAULT_SEED = 42
+DEFAULT_REPEAT = 1
+DEFAULT_JOBS = 1
+DEFAULT_MAX_REGRESSION_PCT = 25.0
+DEFAULT_MIN_STAGE_SECONDS = 0.05
+DEFAULT_WORK_DIR = ROOT / "tests" / ".tmp" / "benchmarks"
+DEFAULT_BASELINE = ROOT / "tests" / "benchmark_baseline.json"
+
+GENERATED_MARKER = ".generated"
+
+Stages = Dict[str, float]
+
+
+def parse_scales(value: str) -> Tuple[int, ...]:
+    try:
+        scales = tuple(int(item) for item in value.split(",") if item.strip())
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"Invalid scale list: {value!r}") from exc
+    if not scales or any(scale <= 0 for scale in scales):
+        raise argparse.ArgumentTypeError("Scales must be positive order counts.")
+    return scales
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark raw load, SQL models, quality gate, exports and dashboard "
+            "queries on synthetic data, then compare against a baseline file."
+        )
+    )
+    parser.add_argument(
+        "--scales",
+        type=parse_scales,
+        default=DEFAULT_SCALES,
+        help="Comma-separated order counts to benchmark (default: 10000,100000).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help=f"Synthetic data seed (default: {DEFAULT_SEED}).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Runs per scale; each stage reports the median (default: 1).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=(
+            "--jobs passed to run_pipeline.py. Model stages are summed statement "
+            f"durations, so keep this fixed between baseline and run (default: {DEFAULT_JOBS})."
+        ),
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=DEFAULT_WORK_DIR,
+        help="Scratch directory for synthetic data and warehouses (reused across runs).",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help="Baseline JSON to compare against; written when it does not exist yet.",
+    )
+    parser.add_argument(
+        "--results-path",
+        type=Path,
+        default=None,
+        help="Where to write this run's results (default: <work-dir>/benchmark_results.json).",
+    )
+    parser.add_argument(
+        "--max-regression-pct",
+        type=float,
+        default=DEFAULT_MAX_REGRESSION_PCT,
+        help=(
+            "Fail when a stage is slower than its baseline by more than this percentage "
+            f"(default: {DEFAULT_MAX_REGRESSION_PCT:g})."
+        ),
+    )
+    parser.add_argument(
+        "--min-stage-seconds",
+        type=float,
+        default=DEFAULT_MIN_STAGE_SECONDS,
+        help=(
+            "Ignore stages whose baseline is faster than this, as they are dominated by noise "
+            f"(default: {DEFAULT_MIN_STAGE_SECONDS:g})."
+        ),
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Overwrite the baseline with this run instead of comparing.",
+    )
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+
+def ensure_synthetic_data(raw_dir: Path, orders: int, seed: int) -> None:
+    marker = raw_dir / GENERATED_MARKER
+    expected = f"orders={orders} seed={seed}"
+    if marker.exists() and marker.read_text(encoding="utf-8") == expected:
+        return
+    if raw_dir.exists():
+        shutil.rmtree(raw_dir)
+    cmd = [
+        sys.executable,
+        str(ROOT / "tests" / "generate_synthetic_data.py"),
+        "--output-dir",
+        str(raw_dir),
+        "--orders",
+        str(orders),
+        "--seed",
+        str(seed),
+    ]
+    print(f"[bench] generating {orders:,} synthetic orders -> {raw_dir}")
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    marker.write_text(expected, encoding="utf-8")
+
+
+def model_files_by_target() -> Dict[str, str]:
+    model_paths = sorted((ROOT / "ETL_Scripts" / "sql").glob("*.sql"))
+    return {
+        statement.target: statement.model_name
+        for statement in parse_model_statements(model_paths)
+    }
+
+
+def run_pipeline(raw_dir: Path, run_dir: Path, jobs: int) -> Stages:
+    """Build a fresh warehouse and fold its profiling report into stages."""
+    if run_dir.exists():
+        shutil.rmtree(run_dir)
+    report_path = run_dir / "pipeline_report.json"
+    cmd = [
+        sys.executable,
+        str(ROOT / "ETL_Scripts" / "run_pipeline.py"),
+        "--raw-dir",
+        str(raw_dir),
+        "--db-path",
+        str(run_dir / "olist.duckdb"),
+        "--export-dir",
+        str(run_dir / "exports"),
+        "--report-path",
+        str(report_path),
+        "--jobs",
+        str(jobs),
+    ]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+
+    model_files = model_files_by_target()
+    stages: Stages = {"pipeline_total": report["run"]["duration_s"]}
+    for step in report["steps"]:
+        phase = step["phase"]
+        if phase == "raw":
+            name = "raw_load"
+        elif phase == "model":
+            name = f"model/{model_files.get(step['step_name'], step['step_name'])}"
+        elif phase == "quality":
+            name = "quality_gate"
+        elif phase == "drift":
+            name = "drift_monitor"
+        elif phase == "export":
+            name = "export"
+        else:
+            continue
+        stages[name] = stages.get(name, 0.0) + step["duration_s"]
+    return stages
+
+
+def time_static_queries(db_path: Path) -> Stages:
+    sys.path.insert(0, str(ROOT / "web_dashboard_static"))
+    generate_data = importlib.import_module("generate_data")
+
+    stages: Stages = {}
+    with generate_data.connect_sources(db_path) as conn, open(
+        os.devnull, "w", encoding="utf-8"
+    ) as sink:
+        started = time.perf_counter()
+        generate_data.materialize_clean_orders(conn)
+        stages["static_query/clean_orders"] = time.perf_counter() - started
+        # Sequential on purpose: per-query timings stay comparable across runs.
+        for name, query in generate_data.QUERY_MAP.items():
+            started = time.perf_counter()
+            generate_data.stream_dataset(conn, name, query, sink)
+            stages[f"static_query/{name}"] = time.perf_counter() - started
+    return stages
+
+
+def dashboard_loader() -> Optional[Callable[[str, str], object]]:
+    sys.path.insert(0, str(ROOT / "web_dashboard"))
+    try:
+        app = importlib.import_module("app")
+    except ImportError as exc:
+        print(f"[bench] skipping dashboard/load_datasets: {exc}")
+        return None
+    # Time the undecorated loader so every call is a cold load.
+    return getattr(app.load_datasets, "__wrapped__", app.load_datasets)
+
+
+def time_dashboard_load(
+    loader: Optional[Callable[[str, str], object]], run_dir: Path
+) -> Stages:
+    if loader is None:
+        return {}
+    started = time.perf_counter()
+    loader(str(run_dir / "olist.duckdb"), str(run_dir / "exports"))
+    return {"dashboard/load_datasets": time.perf_counter() - started}
+
+
+def benchmark_scale(
+    orders: int,
+    args: argparse.Namespace,
+    loader: Optional[Callable[[str, str], object]],
+) -> Stages:
+    raw_dir = args.work_dir / f"raw_{orders}"
+    run_dir = args.work_dir / f"run_{orders}"
+    ensure_synthetic_data(raw_dir, orders, args.seed)
+
+    samples: Dict[str, List[float]] = {}
+    for attempt in range(1, args.repeat + 1):
+        stages = run_pipeline(raw_dir, run_dir, args.jobs)
+        stages.update(time_static_queries(run_dir / "olist.duckdb"))
+        stages.update(time_dashboard_load(loader, run_dir))
+        for name, seconds in stages.items():
+            samples.setdefault(name, []).append(seconds)
+        print(
+            f"[bench] {orders:,} orders run {attempt}/{args.repeat}: "
+            f"pipeline {stages['pipeline_total']:.2f}s"
+        )
+    return {name: statistics.median(values) for name, values in sorted(samples.items())}
+
+
+def environment() -> Dict[str, object]:
+    return {
+        "python": platform.python_version(),
+        "duckdb": duckdb.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(
+    results: Dict[str, object],
+    baseline: Dict[str, object],
+    max_regression_pct: float,
+    min_stage_seconds: float,
+) -> List[str]:
+    """Return one message per stage that regressed beyond the threshold."""
+    if baseline.get("environment") != results["environment"]:
+        print(
+            "[bench] warning: baseline was recorded on a different environment "
+            f"({baseline.get('environment')})"
+        )
+    if baseline.get("settings") != results["settings"]:
+        print(
+            "[bench] warning: baseline settings differ "
+            f"({baseline.get('settings')} vs {results['settings']})"
+        )
+
+    regressions: List[str] = []
+    for scale, current in results["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if previous is None:
+            print(f"[bench] no baseline for {scale} orders; skipping comparison")
+            continue
+        for stage, seconds in current.items():
+            base = previous.get(stage)
+            if base is None or base < min_stage_seconds:
+                continue
+            change_pct = (seconds - base) / base * 100
+            line = (
+                f"{scale} orders {stage}: {seconds:.3f}s "
+                f"(baseline {base:.3f}s, {change_pct:+.1f}%)"
+            )
+            print(f"[bench] {line}")
+            if change_pct > max_regression_pct:
+                regressions.append(line)
+    return regressions
+
+
+def write_json(payload: Dict[str, object], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main() -> None:
+    args = parse_args()
+    args.work_dir.mkdir(parents=True, exist_ok=True)
+    results_path = args.results_path or args.work_dir / "benchmark_results.json"
+
+    loader = dashboard_loader()
+    results: Dict[str, object] = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": environment(),
+        "settings": {"seed": args.seed, "jobs": args.jobs, "repeat": args.repeat},
+        "scales": {
+            str(orders): benchmark_scale(orders, args, loader) for orders in args.scales
+        },
+    }
+    write_json(results, results_path)
+    print(f"[bench] results -> {results_path}")
+
+    if args.update_baseline or not args.baseline.exists():
+        write_json(results, args.baseline)
+        print(f"[bench] baseline written -> {args.baseline}")
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(
+        results, baseline, args.max_regression_pct, args.min_stage_seconds
+    )
+    if regressions:
+        print(
+            f"[bench] {len(regressions)} stage(s) regressed by more than "
+            f"{args.max_regression_pct:g}%:"
+        )
+        for line in regressions:
+            print(f" - {line}")
+        raise SystemExit(1)
+    print("[bench] no stage regressed beyond the threshold")
+
+
+if __name__ == "__main__":
+    main()
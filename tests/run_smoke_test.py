@@ -56,10 +56,49 @@ def main() -> None:
                 "Expected one_star_rate=1.0 for late_over_5_days in fixture data"
             )
 
-        print("[smoke] pipeline smoke test passed")
+        manifest_count = conn.execute(
+            "SELECT COUNT(*) FROM raw._load_manifest"
+        ).fetchone()[0]
+        if manifest_count != 9:
+            raise AssertionError(f"Expected 9 load manifest rows, got {manifest_count}")
+
+        run_status = conn.execute(
+            "SELECT status, step_count FROM mart._pipeline_runs"
+        ).fetchone()
+        if run_status is None or run_status[0] != "succeeded" or run_status[1] == 0:
+            raise AssertionError(f"Expected one succeeded profiled run, got {run_status}")
     finally:
         conn.close()
 
+    print("[smoke] re-running pipeline to check incremental skip")
+    rerun = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    if "[model] all models up to date" not in rerun.stdout:
+        raise AssertionError("Expected unchanged raw files to skip every model on re-run")
+
+    print("[smoke] re-running pipeline with a new review to check upserts")
+    changed_raw_dir = temp_dir / "raw_changed"
+    shutil.copytree(fixture_dir, changed_raw_dir)
+    with (changed_raw_dir / "olist_order_reviews_dataset.csv").open("a", encoding="utf-8") as f:
+        f.write("r3,o1,2,late update,changed my mind,2018-01-20 00:00:00,2018-01-21 00:00:00\n")
+    upsert_cmd = [*cmd, "--raw-dir", str(changed_raw_dir), "--incremental-models"]
+    upsert_run = subprocess.run(upsert_cmd, check=True, capture_output=True, text=True)
+    if "[model] upserted mart.fact_orders on order_id: 1 rows replaced by 1" not in upsert_run.stdout:
+        raise AssertionError("Expected the changed review to upsert a single fact_orders row")
+
+    conn = duckdb.connect(str(db_path))
+    try:
+        orders = conn.execute(
+            "SELECT order_id, order_sk, review_score FROM mart.fact_orders ORDER BY order_id"
+        ).fetchall()
+        if orders != [("o1", 1, 2), ("o2", 2, 1)]:
+            raise AssertionError(
+                f"Expected the upserted review score for o1 under a stable order_sk, got {orders}"
+            )
+    finally:
+        conn.close()
+
+    print("[smoke] pipeline smoke test passed")
+
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import duckdb
 import pandas as pd
 import plotly.express as px
+import pyarrow as pa
+import pyarrow.parquet as pq
 import plotly.graph_objects as go
 import streamlit as st
 
@@ -14,6 +26,16 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_DB_PATH = PROJECT_ROOT / "data/warehouse/olist.duckdb"
 DEFAULT_EXPORT_DIR = PROJECT_ROOT / "data/exports"
 
+# Bump when the cached frame layout changes so older files are never read back.
+CACHE_VERSION = 1
+CACHE_DIR_NAME = "dashboard_cache"
+DEFAULT_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+STALE_TEMP_SECONDS = 60 * 60
+DEFAULT_QUERY_WORKERS = 4
+FILTER_CACHE_ENTRIES = 64
+SNAPSHOT_ATTR = "snapshot_written_at"
+
 
 QUERY_MAP = {
     "exec_monthly": """
@@ -74,6 +96,241 @@ EXPORT_FILE_MAP = {
     "csat_kpis": "vw_csat_kpis",
 }
 
+# Filtered counterparts of the QUERY_MAP views, computed from the fact tables.
+# ``{{ order_filter }}`` is replaced by OrderFilters.predicate(); values are
+# always bound as named parameters.
+FILTERED_ORDERS_CTE = """
+    filtered_orders AS (
+        SELECT f.*, DATE_TRUNC('month', t.full_date)::DATE AS month_start
+        FROM mart.fact_orders f
+        LEFT JOIN mart.dim_time t
+            ON f.purchase_date_key = t.date_key
+        WHERE {{ order_filter }}
+    )
+"""
+
+FILTERED_QUERY_MAP = {
+    "exec_monthly": """
+        WITH {{ filtered_orders }},
+        monthly AS (
+            SELECT
+                month_start,
+                SUM(gmv) AS gmv,
+                COUNT(*) AS order_count,
+                SUM(gmv) / NULLIF(COUNT(*), 0) AS aov
+            FROM filtered_orders
+            WHERE COALESCE(order_status, 'unknown') NOT IN ('canceled', 'unavailable')
+              AND purchase_date_key IS NOT NULL
+            GROUP BY month_start
+        )
+        SELECT
+            month_start,
+            gmv,
+            order_count,
+            aov,
+            (order_count - LAG(order_count, 12) OVER (ORDER BY month_start))
+                / NULLIF(LAG(order_count, 12) OVER (ORDER BY month_start), 0)
+                AS yoy_order_growth_pct
+        FROM monthly
+        ORDER BY month_start
+    """,
+    "exec_payment_mix": """
+        WITH {{ filtered_orders }}
+        SELECT
+            main_payment_type AS payment_type,
+            COUNT(*) AS order_count,
+            SUM(gmv) AS gmv,
+            SUM(payment_value) AS payment_value,
+            COUNT(*)::DOUBLE / NULLIF(SUM(COUNT(*)) OVER (), 0) AS order_share_pct
+        FROM filtered_orders
+        WHERE COALESCE(order_status, 'unknown') NOT IN ('canceled', 'unavailable')
+        GROUP BY main_payment_type
+        ORDER BY order_count DESC
+    """,
+    "exec_category_perf": """
+        WITH {{ filtered_orders }}
+        SELECT
+            COALESCE(i.product_category, 'unknown') AS product_category,
+            COUNT(DISTINCT i.order_id) AS order_count,
+            SUM(i.item_price) AS category_gmv,
+            SUM(i.item_freight_value) AS category_freight,
+            SUM(i.item_contribution_margin_proxy) AS contribution_margin_proxy,
+            AVG(i.item_price) AS avg_item_price
+        FROM mart.fact_order_items i
+        SEMI JOIN filtered_orders fo
+            ON i.order_id = fo.order_id
+        GROUP BY COALESCE(i.product_category, 'unknown')
+        ORDER BY category_gmv DESC
+    """,
+    "ops_state_bottlenecks": """
+        WITH {{ filtered_orders }}
+        SELECT
+            COALESCE(customer_state, 'UNKNOWN') AS customer_state,
+            COUNT(*) AS order_count,
+            AVG(delivery_days) AS avg_delivery_days,
+            AVG(delay_days) AS avg_delay_days,
+            1 - AVG(CASE WHEN is_late_delivery = 1 THEN 1.0 ELSE 0.0 END) AS on_time_rate,
+            AVG(freight_to_gmv_ratio) AS avg_freight_to_gmv_ratio,
+            AVG(CASE WHEN delay_days >= 5 THEN 1.0 ELSE 0.0 END) AS severe_delay_rate
+        FROM filtered_orders
+        WHERE delivery_days IS NOT NULL
+        GROUP BY COALESCE(customer_state, 'UNKNOWN')
+        ORDER BY severe_delay_rate DESC, avg_delay_days DESC
+    """,
+    "ops_monthly": """
+        WITH {{ filtered_orders }}
+        SELECT
+            month_start,
+            COUNT(*) AS order_count,
+            AVG(delivery_days) AS avg_delivery_days,
+            AVG(delay_days) AS avg_delay_days,
+            1 - AVG(CASE WHEN is_late_delivery = 1 THEN 1.0 ELSE 0.0 END) AS on_time_rate,
+            AVG(freight_to_gmv_ratio) AS avg_freight_to_gmv_ratio
+        FROM filtered_orders
+        WHERE purchase_date_key IS NOT NULL
+          AND delivery_days IS NOT NULL
+        GROUP BY month_start
+        ORDER BY month_start
+    """,
+    "csat_delay_impact": """
+        WITH {{ filtered_orders }},
+        bucketed AS (
+            SELECT
+                CASE
+                    WHEN delay_days IS NULL THEN 'unknown'
+                    WHEN delay_days <= 0 THEN 'on_time_or_early'
+                    WHEN delay_days BETWEEN 1 AND 2 THEN 'late_1_2_days'
+                    WHEN delay_days BETWEEN 3 AND 5 THEN 'late_3_5_days'
+                    ELSE 'late_over_5_days'
+                END AS delay_bucket,
+                review_score
+            FROM filtered_orders
+            WHERE review_score IS NOT NULL
+        )
+        SELECT
+            delay_bucket,
+            COUNT(*) AS review_count,
+            AVG(review_score) AS avg_review_score,
+            AVG(CASE WHEN review_score = 1 THEN 1.0 ELSE 0.0 END) AS one_star_rate,
+            AVG(CASE WHEN review_score <= 2 THEN 1.0 ELSE 0.0 END) AS low_score_rate
+        FROM bucketed
+        GROUP BY delay_bucket
+        ORDER BY
+            CASE delay_bucket
+                WHEN 'on_time_or_early' THEN 1
+                WHEN 'late_1_2_days' THEN 2
+                WHEN 'late_3_5_days' THEN 3
+                WHEN 'late_over_5_days' THEN 4
+                ELSE 5
+            END
+    """,
+    "csat_state_payment": """
+        WITH {{ filtered_orders }}
+        SELECT
+            COALESCE(customer_state, 'UNKNOWN') AS customer_state,
+            COALESCE(main_payment_type, 'unknown') AS payment_type,
+            COUNT(*) AS order_count,
+            AVG(delay_days) AS avg_delay_days,
+            AVG(review_score) AS avg_review_score,
+            AVG(CASE WHEN review_score <= 2 THEN 1.0 ELSE 0.0 END) AS low_score_rate
+        FROM filtered_orders
+        WHERE review_score IS NOT NULL
+        GROUP BY
+            COALESCE(customer_state, 'UNKNOWN'),
+            COALESCE(main_payment_type, 'unknown')
+        ORDER BY order_count DESC
+    """,
+    "review_distribution": """
+        WITH {{ filtered_orders }}
+        SELECT review_score, COUNT(*) AS review_count
+        FROM filtered_orders
+        WHERE review_score IS NOT NULL
+        GROUP BY review_score
+        ORDER BY review_score
+    """,
+    "csat_kpis": """
+        WITH {{ filtered_orders }}
+        SELECT
+            AVG(review_score) AS avg_review_score,
+            AVG(CASE WHEN review_score = 1 THEN 1.0 ELSE 0.0 END) AS one_star_rate,
+            AVG(CASE WHEN review_score <= 2 THEN 1.0 ELSE 0.0 END) AS low_score_rate
+        FROM filtered_orders
+        WHERE review_score IS NOT NULL
+    """,
+}
+
+FILTER_OPTIONS_QUERY_MAP = {
+    "date_range": """
+        SELECT MIN(t.full_date) AS min_date, MAX(t.full_date) AS max_date
+        FROM mart.fact_orders f
+        JOIN mart.dim_time t
+            ON f.purchase_date_key = t.date_key
+    """,
+    "states": """
+        SELECT DISTINCT COALESCE(customer_state, 'UNKNOWN') AS value
+        FROM mart.fact_orders
+        ORDER BY value
+    """,
+    "payment_types": """
+        SELECT DISTINCT COALESCE(main_payment_type, 'unknown') AS value
+        FROM mart.fact_orders
+        ORDER BY value
+    """,
+}
+
+
+@dataclass(frozen=True)
+class OrderFilters:
+    """Sidebar selections; empty fields mean "no restriction"."""
+
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    states: Tuple[str, ...] = ()
+    payment_types: Tuple[str, ...] = ()
+
+    @property
+    def active(self) -> bool:
+        return bool(self.start_date or self.end_date or self.states or self.payment_types)
+
+    def predicate(self) -> Tuple[str, Dict[str, object]]:
+        clauses: List[str] = []
+        params: Dict[str, object] = {}
+        if self.start_date is not None:
+            clauses.append("f.purchase_date_key >= $start_key")
+            params["start_key"] = int(self.start_date.strftime("%Y%m%d"))
+        if self.end_date is not None:
+            clauses.append("f.purchase_date_key <= $end_key")
+            params["end_key"] = int(self.end_date.strftime("%Y%m%d"))
+        if self.states:
+            clauses.append("list_contains($states, COALESCE(f.customer_state, 'UNKNOWN'))")
+            params["states"] = list(self.states)
+        if self.payment_types:
+            clauses.append(
+                "list_contains($payment_types, COALESCE(f.main_payment_type, 'unknown'))"
+            )
+            params["payment_types"] = list(self.payment_types)
+        return " AND ".join(clauses) or "TRUE", params
+
+    def describe(self) -> str:
+        parts = []
+        if self.start_date or self.end_date:
+            parts.append(f"{self.start_date or '…'} to {self.end_date or '…'}")
+        if self.states:
+            parts.append("states " + ", ".join(self.states))
+        if self.payment_types:
+            parts.append("payment " + ", ".join(self.payment_types))
+        return "Filtered: " + "; ".join(parts)
+
+
+def filtered_queries(filters: OrderFilters) -> Tuple[Dict[str, str], Dict[str, object]]:
+    predicate, params = filters.predicate()
+    cte = FILTERED_ORDERS_CTE.replace("{{ order_filter }}", predicate)
+    queries = {
+        name: query.replace("{{ filtered_orders }}", cte.strip())
+        for name, query in FILTERED_QUERY_MAP.items()
+    }
+    return queries, params
+
 
 st.set_page_config(
     page_title="Olist Online Dashboard",
@@ -82,23 +339,262 @@ st.set_page_config(
 )
 
 
-def _load_from_db(db_path: Path) -> Dict[str, pd.DataFrame]:
+def warehouse_signature(db_path: Path) -> Optional[str]:
+    """Identify one build of the warehouse by file size and modification time.
+
+    The WAL is included so uncheckpointed writes also change the signature.
+    """
+    parts = []
+    for path in (db_path, db_path.with_name(db_path.name + ".wal")):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        parts.append(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return "|".join(parts) or None
+
+
+@dataclass
+class DatasetCache:
+    """Parquet files of query results shared by every app process on a host.
+
+    Entries live in one directory per warehouse and are keyed on the warehouse
+    signature plus the query text, so a rebuilt warehouse or an edited query
+    simply stops matching. Files are written to a temp name and renamed into
+    place, which keeps concurrent readers and writers safe without locks.
+    Eviction drops entries older than ``ttl_seconds`` (by write time) and then
+    the least recently read ones until the directory fits ``max_bytes``.
+    """
+
+    cache_dir: Path
+    ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS
+    max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+
+    @classmethod
+    def for_warehouse(cls, db_path: Path) -> "DatasetCache":
+        cache_dir = os.environ.get("OLIST_CACHE_DIR")
+        ttl = os.environ.get("OLIST_CACHE_TTL_SECONDS")
+        max_mb = os.environ.get("OLIST_CACHE_MAX_MB")
+        return cls(
+            cache_dir=Path(cache_dir) if cache_dir else db_path.parent / CACHE_DIR_NAME,
+            ttl_seconds=float(ttl) if ttl else DEFAULT_CACHE_TTL_SECONDS,
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_CACHE_MAX_BYTES,
+        )
+
+    def warehouse_dir(self, db_path: Path) -> Path:
+        digest = hashlib.sha256(str(db_path.resolve()).encode("utf-8")).hexdigest()[:12]
+        return self.cache_dir / digest
+
+    def entry_path(self, db_path: Path, signature: str, name: str, query: str) -> Path:
+        payload = json.dumps(
+            [CACHE_VERSION, signature, name, " ".join(query.split())]
+        ).encode("utf-8")
+        key = hashlib.sha256(payload).hexdigest()[:16]
+        return self.warehouse_dir(db_path) / f"{name}-{key}.parquet"
+
+    def _expired(self, stat: os.stat_result, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - stat.st_mtime > self.ttl_seconds
+
+    def get(self, path: Path) -> Optional[pd.DataFrame]:
+        try:
+            stat = path.stat()
+            if self._expired(stat, time.time()):
+                path.unlink(missing_ok=True)
+                return None
+            frame = pq.read_table(path).to_pandas()
+            # Record the read in atime for LRU eviction; mtime stays the write time.
+            os.utime(path, (time.time(), stat.st_mtime))
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        return frame
+
+    def latest(self, db_path: Path, name: str) -> Optional[pd.DataFrame]:
+        """Return the newest cached result for ``name`` under any signature.
+
+        Used as the last good snapshot while the warehouse cannot be read, so
+        the TTL is deliberately ignored.
+        """
+        candidates = []
+        for path in self.warehouse_dir(db_path).glob(f"{name}-*.parquet"):
+            try:
+                candidates.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        for written_at, path in sorted(candidates, reverse=True):
+            try:
+                frame = pq.read_table(path).to_pandas()
+            except (FileNotFoundError, pa.ArrowInvalid):
+                continue
+            frame.attrs[SNAPSHOT_ATTR] = written_at
+            return frame
+        return None
+
+    def put(self, path: Path, frame: pd.DataFrame) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.stem}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        try:
+            pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), temp_path)
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        # Entries for the same dataset under an older signature can never match again.
+        dataset = path.name.rsplit("-", 1)[0]
+        for stale in path.parent.glob(f"{dataset}-*.parquet"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.suffix == ".tmp":
+                if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    path.unlink(missing_ok=True)
+            elif self._expired(stat, now):
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_atime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class WarehousePool:
+    """Read-only access to one warehouse shared by every session of the server.
+
+    DuckDB keeps a single database instance per file and process, so the pool
+    holds one read-only connection and hands each query its own cursor, which
+    lets independent queries run concurrently. The connection is closed when
+    the last borrower returns it: an idle app never holds the file lock that
+    ``run_pipeline.py`` needs to rebuild the warehouse.
+    """
+
+    def __init__(self, db_path: Path, max_workers: int = DEFAULT_QUERY_WORKERS) -> None:
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._borrowers = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        with self._lock:
+            if self._conn is None:
+                self._conn = duckdb.connect(str(self.db_path), read_only=True)
+            self._borrowers += 1
+            conn = self._conn
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                self._borrowers -= 1
+                if self._borrowers == 0 and self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+    def run_queries(
+        self, queries: Dict[str, str], params: Optional[Dict[str, object]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Run ``queries`` concurrently; ``params`` are bound to every query."""
+        with self.connection() as conn:
+
+            def run(query: str) -> pd.DataFrame:
+                with conn.cursor() as cursor:
+                    return cursor.execute(query, params).df()
+
+            workers = max(1, min(self.max_workers, len(queries)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {name: executor.submit(run, query) for name, query in queries.items()}
+                return {name: future.result() for name, future in futures.items()}
+
+
+@st.cache_resource(show_spinner=False)
+def warehouse_pool(db_path_str: str) -> WarehousePool:
+    return WarehousePool(Path(db_path_str))
+
+
+def snapshot_written_at(data: Dict[str, pd.DataFrame]) -> Optional[float]:
+    """Oldest write time among datasets served from a fallback snapshot."""
+    stamps = [
+        frame.attrs[SNAPSHOT_ATTR] for frame in data.values() if SNAPSHOT_ATTR in frame.attrs
+    ]
+    return min(stamps) if stamps else None
+
+
+def _load_from_db(
+    db_path: Path,
+    cache: Optional[DatasetCache] = None,
+    pool: Optional[WarehousePool] = None,
+) -> Dict[str, pd.DataFrame]:
     data: Dict[str, pd.DataFrame] = {}
-    with duckdb.connect(str(db_path)) as conn:
+    signature = warehouse_signature(db_path) if cache is not None else None
+    entries: Dict[str, Path] = {}
+    if cache is not None and signature is not None:
         for name, query in QUERY_MAP.items():
-            data[name] = conn.execute(query).df()
-    return data
+            entries[name] = cache.entry_path(db_path, signature, name, query)
+            frame = cache.get(entries[name])
+            if frame is not None:
+                data[name] = frame
+
+    missing: List[str] = [name for name in QUERY_MAP if name not in data]
+    if missing:
+        pool = pool or WarehousePool(db_path)
+        try:
+            data.update(pool.run_queries({name: QUERY_MAP[name] for name in missing}))
+        except duckdb.Error:
+            # The ETL holds the write lock (or left the file mid-rebuild):
+            # serve the last good snapshot rather than failing the page.
+            snapshot = {
+                name: cache.latest(db_path, name) if cache is not None else None
+                for name in missing
+            }
+            if any(frame is None for frame in snapshot.values()):
+                raise
+            data.update(snapshot)
+            return {name: data[name] for name in QUERY_MAP}
+        # Only cache when the warehouse did not change while we were reading it.
+        if cache is not None and signature == warehouse_signature(db_path):
+            for name in missing:
+                cache.put(entries[name], data[name])
+            cache.evict()
+
+    return {name: data[name] for name in QUERY_MAP}
+
+
+EXPORT_READERS = (("parquet", "read_parquet($path)"), ("csv", "read_csv_auto($path)"))
+
+
+def _export_source(export_dir: Path, name: str) -> Optional[Tuple[str, Path]]:
+    """Table function and file for one view's export, preferring Parquet over CSV."""
+    for extension, reader in EXPORT_READERS:
+        path = export_dir / f"{EXPORT_FILE_MAP[name]}.{extension}"
+        if path.exists():
+            return reader, path
+    return None
 
 
 def _load_from_exports(export_dir: Path) -> Dict[str, pd.DataFrame]:
-    data: Dict[str, pd.DataFrame] = {}
+    """Run each QUERY_MAP query against its exported file instead of the view.
+
+    DuckDB reads only the projected columns of the Parquet export and keeps
+    DATE columns typed, so frames match the ones loaded from the warehouse.
+    """
+    sources: Dict[str, Tuple[str, Path]] = {}
     missing = []
     for name in QUERY_MAP:
-        csv_path = export_dir / f"{EXPORT_FILE_MAP[name]}.csv"
-        if not csv_path.exists():
-            missing.append(csv_path.name)
+        source = _export_source(export_dir, name)
+        if source is None:
+            missing.append(f"{EXPORT_FILE_MAP[name]}.parquet")
             continue
-        data[name] = pd.read_csv(csv_path)
+        sources[name] = source
 
     if missing:
         missing_list = ", ".join(missing)
@@ -107,18 +603,62 @@ def _load_from_exports(export_dir: Path) -> Dict[str, pd.DataFrame]:
             f"{missing_list}. Run ETL_Scripts/run_pipeline.py first."
         )
 
+    data: Dict[str, pd.DataFrame] = {}
+    with duckdb.connect() as conn:
+        for name, query in QUERY_MAP.items():
+            reader, path = sources[name]
+            export_query = query.replace(f"mart.{EXPORT_FILE_MAP[name]}", reader)
+            data[name] = conn.execute(export_query, {"path": str(path)}).df()
     return data
 
 
 @st.cache_data(show_spinner=False)
-def load_datasets(db_path_str: str, export_dir_str: str) -> Dict[str, pd.DataFrame]:
+def load_datasets(
+    db_path_str: str,
+    export_dir_str: str,
+    warehouse_version: Optional[str] = None,
+    use_disk_cache: bool = True,
+) -> Dict[str, pd.DataFrame]:
+    """Load every dashboard dataset, preferring the warehouse over file exports.
+
+    ``warehouse_version`` is not read here; passing ``warehouse_signature``
+    makes the in-memory cache miss as soon as the warehouse is rebuilt.
+    """
     db_path = Path(db_path_str)
     export_dir = Path(export_dir_str)
     if db_path.exists():
-        return _load_from_db(db_path)
+        cache = DatasetCache.for_warehouse(db_path) if use_disk_cache else None
+        return _load_from_db(db_path, cache, warehouse_pool(db_path_str))
     return _load_from_exports(export_dir)
 
 
+@st.cache_data(show_spinner=False)
+def load_filter_options(
+    db_path_str: str, warehouse_version: Optional[str] = None
+) -> Dict[str, object]:
+    frames = warehouse_pool(db_path_str).run_queries(FILTER_OPTIONS_QUERY_MAP)
+    date_range = frames["date_range"].iloc[0]
+    return {
+        "min_date": None if pd.isna(date_range["min_date"]) else date_range["min_date"].date(),
+        "max_date": None if pd.isna(date_range["max_date"]) else date_range["max_date"].date(),
+        "states": frames["states"]["value"].tolist(),
+        "payment_types": frames["payment_types"]["value"].tolist(),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def load_filtered_datasets(
+    db_path_str: str, filters: OrderFilters, warehouse_version: Optional[str] = None
+) -> Dict[str, pd.DataFrame]:
+    """Aggregate the fact tables under ``filters`` inside DuckDB.
+
+    Memoized per filter combination; the least recently used of the last
+    FILTER_CACHE_ENTRIES combinations are evicted first.
+    """
+    queries, params = filtered_queries(filters)
+    return warehouse_pool(db_path_str).run_queries(queries, params)
+
+
 def _weighted_average(
     frame: pd.DataFrame, value_col: str, weight_col: str
 ) -> float | None:
@@ -143,7 +683,10 @@ def render_sidebar() -> tuple[str, str]:
     db_path = st.sidebar.text_input("DuckDB Path", str(DEFAULT_DB_PATH))
     export_dir = st.sidebar.text_input("Export Directory", str(DEFAULT_EXPORT_DIR))
     st.sidebar.info(
-        "If DuckDB file is unavailable, app will try to load CSV exports from data/exports."
+        "If DuckDB file is unavailable, app will load the Parquet (or CSV) exports "
+        "from data/exports. "
+        "Query results are cached on disk next to the warehouse and refresh automatically "
+        "when it is rebuilt."
     )
     if st.sidebar.button("Refresh Data"):
         st.cache_data.clear()
@@ -151,11 +694,37 @@ def render_sidebar() -> tuple[str, str]:
     return db_path, export_dir
 
 
+def render_filters(options: Optional[Dict[str, object]]) -> OrderFilters:
+    st.sidebar.header("Filters")
+    if options is None or options["min_date"] is None:
+        st.sidebar.caption("Filters need the DuckDB warehouse and are unavailable right now.")
+        return OrderFilters()
+
+    min_date, max_date = options["min_date"], options["max_date"]
+    selected = st.sidebar.date_input(
+        "Purchase date",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date,
+    )
+    # date_input returns a single date while the user is still picking the range.
+    start_date, end_date = (
+        (selected[0], selected[-1]) if isinstance(selected, (tuple, list)) else (selected, None)
+    )
+    states = st.sidebar.multiselect("Customer state", options["states"])
+    payment_types = st.sidebar.multiselect("Payment type", options["payment_types"])
+    return OrderFilters(
+        start_date=None if start_date in (None, min_date) else start_date,
+        end_date=None if end_date in (None, max_date) else end_date,
+        states=tuple(sorted(states)),
+        payment_types=tuple(sorted(payment_types)),
+    )
+
+
 def render_exec_tab(data: Dict[str, pd.DataFrame]) -> None:
     st.subheader("Executive Summary")
 
     monthly = data["exec_monthly"].copy()
-    monthly["month_start"] = pd.to_datetime(monthly["month_start"])
 
     payment_mix = data["exec_payment_mix"].copy()
     category_perf = data["exec_category_perf"].copy()
@@ -237,8 +806,6 @@ def render_ops_tab(data: Dict[str, pd.DataFrame]) -> None:
     ops_monthly = data["ops_monthly"].copy()
     geo_state = data["state_geo_centroid"].copy()
 
-    ops_monthly["month_start"] = pd.to_datetime(ops_monthly["month_start"])
-
     avg_delivery_days = _weighted_average(ops_state, "avg_delivery_days", "order_count")
     on_time_rate = _weighted_average(ops_state, "on_time_rate", "order_count")
     freight_ratio = _weighted_average(
@@ -400,9 +967,18 @@ def render_csat_tab(data: Dict[str, pd.DataFrame]) -> None:
 def main() -> None:
     render_header()
     db_path_str, export_dir_str = render_sidebar()
+    warehouse_version = warehouse_signature(Path(db_path_str))
+
+    options = None
+    if warehouse_version is not None:
+        try:
+            options = load_filter_options(db_path_str, warehouse_version)
+        except duckdb.Error:
+            options = None
+    filters = render_filters(options)
 
     try:
-        data = load_datasets(db_path_str, export_dir_str)
+        data = load_datasets(db_path_str, export_dir_str, warehouse_version)
     except Exception as exc:  # pragma: no cover
         st.error(f"Failed to load datasets: {exc}")
         st.info(
@@ -412,6 +988,23 @@ def main() -> None:
         )
         return
 
+    written_at = snapshot_written_at(data)
+    if written_at is not None:
+        st.warning(
+            "The warehouse is being rebuilt; showing the last good snapshot from "
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(written_at))}."
+        )
+
+    if filters.active:
+        try:
+            data = {
+                **data,
+                **load_filtered_datasets(db_path_str, filters, warehouse_version),
+            }
+            st.caption(filters.describe())
+        except duckdb.Error as exc:
+            st.warning(f"Filters could not be applied, showing all orders: {exc}")
+
     tab_exec, tab_ops, tab_csat = st.tabs(
         ["Executive Summary", "Supply Chain & Operations", "Customer Satisfaction"]
     )
@@ -126,10 +126,21 @@ function setTab(tabId) {
   window.dispatchEvent(new Event("resize"));
 }
 
+function activeTabId() {
+  const activeBtn = document.querySelector(".tab-btn.active");
+  return activeBtn ? activeBtn.dataset.tab : "exec-tab";
+}
+
 function activateTabs() {
   const buttons = document.querySelectorAll(".tab-btn");
   buttons.forEach((btn) => {
-    btn.addEventListener("click", () => setTab(btn.dataset.tab));
+    btn.addEventListener("click", () => {
+      setTab(btn.dataset.tab);
+      // Tabs rendered before their datasets arrived are refreshed once loaded.
+      if (RAW_DATA && pendingDatasets(btn.dataset.tab, getCurrentFilters()).length > 0) {
+        applyAndRender();
+      }
+    });
   });
 }
 
@@ -666,13 +677,14 @@ function computeLatestYoY(periodRows) {
   return null;
 }
 
-function updateFilterSummary(filters, filteredOrderRows) {
+function updateFilterSummary(filters, filteredOrderRows, loadingDatasets = []) {
   const summary = document.getElementById("filter-summary");
   summary.textContent =
     `Date ${filters.startDate} to ${filters.endDate} | ` +
     `States ${filters.stateSet.size}/${META.states.length} | ` +
     `Payments ${filters.paymentSet.size}/${META.payment_types.length} | ` +
-    `Grouped rows ${fmtNumber(filteredOrderRows.length)}`;
+    `Grouped rows ${fmtNumber(filteredOrderRows.length)}` +
+    (loadingDatasets.length > 0 ? ` | Loading ${loadingDatasets.join(", ")}...` : "");
 }
 
 function attachClickHandler(divId, handler) {
@@ -1214,23 +1226,116 @@ function renderCsat(aggregates) {
   }
 }
 
-function buildAggregates(filters) {
-  const filteredOrders = RAW_DATA.orders_base.filter((row) => rowPassesFilter(row, filters));
-  const filteredCategory = RAW_DATA.category_base.filter((row) => rowPassesFilter(row, filters));
-  const filteredDelay = RAW_DATA.delay_bucket_base.filter((row) => rowPassesFilter(row, filters));
-  const filteredReview = RAW_DATA.review_score_base.filter((row) => rowPassesFilter(row, filters));
-  const filteredOrderDetail = RAW_DATA.order_detail_base.filter((row) =>
-    rowPassesFilter(row, filters)
-  );
+function datasetRows(name) {
+  return RAW_DATA[name] || [];
+}
+
+function filterRows(name, filters) {
+  const rows = datasetRows(name);
+  const segments = DATASET_INDEXES.get(name);
+  if (!segments) return rows.filter((row) => rowPassesFilter(row, filters));
+  const filtered = [];
+  segments.forEach(({ start, index }) => {
+    const ids = indexedRowIds(index, filters);
+    for (let i = 0; i < ids.length; i += 1) {
+      filtered.push(rows[start + ids[i]]);
+    }
+  });
+  return filtered;
+}
 
-  const ordersPeriod = aggregateByPeriod(filteredOrders, filters.grain);
+const ROLLUP_CACHE = { source: null, levels: {} };
+
+function addDays(dateStr, days) {
+  return new Date(Date.parse(`${dateStr}T00:00:00Z`) + days * DAY_MS).toISOString().slice(0, 10);
+}
+
+function rollupPeriodStart(level, dateStr) {
+  if (level === "month") return `${dateStr.slice(0, 7)}-01`;
+  // Weeks start on Monday, matching DuckDB's DATE_TRUNC('week', ...).
+  const weekday = new Date(`${dateStr}T00:00:00Z`).getUTCDay();
+  return addDays(dateStr, -((weekday + 6) % 7));
+}
+
+function rollupLevels() {
+  const rows = RAW_DATA.orders_rollup;
+  if (!rows) return {};
+  if (ROLLUP_CACHE.source !== rows) {
+    const levels = {};
+    rows.forEach((row) => {
+      if (!levels[row.rollup]) levels[row.rollup] = [];
+      levels[row.rollup].push(row);
+    });
+    ROLLUP_CACHE.source = rows;
+    ROLLUP_CACHE.levels = levels;
+  }
+  return ROLLUP_CACHE.levels;
+}
+
+function rollupFilters(level, filters) {
+  // Period cells are dated by period start and answer a date range exactly
+  // when it does not cut a period in two; ends beyond the data range count
+  // as aligned.
+  const nextDay = addDays(filters.endDate, 1);
+  const startAligned =
+    filters.startDate <= META.min_date ||
+    rollupPeriodStart(level, filters.startDate) === filters.startDate;
+  const endAligned =
+    filters.endDate >= META.max_date || rollupPeriodStart(level, nextDay) === nextDay;
+  if (!startAligned || !endAligned) return null;
+  return { ...filters, startDate: rollupPeriodStart(level, filters.startDate) };
+}
+
+function selectRollups(filters) {
+  // Pick the smallest orders_rollup level that answers each seller-agnostic
+  // view exactly; null means aggregate the filtered orders_base rows.
+  const levels = rollupLevels();
+  const monthFilters = levels.month ? rollupFilters("month", filters) : null;
+  const weekFilters = !monthFilters && levels.week ? rollupFilters("week", filters) : null;
+  let cells = null;
+  if (monthFilters) {
+    cells = levels.month.filter((row) => rowPassesFilter(row, monthFilters));
+  } else if (weekFilters) {
+    cells = levels.week.filter((row) => rowPassesFilter(row, weekFilters));
+  }
+
+  const fullRange = filters.startDate <= META.min_date && filters.endDate >= META.max_date;
+  const inCountry = (row) => !filters.country || row.country === filters.country;
+  const allStates = META.states.every((state) => filters.stateSet.has(state));
+  const allPayments = META.payment_types.every((payment) => filters.paymentSet.has(payment));
+  const stateMarginal =
+    fullRange && allPayments && levels.state
+      ? levels.state.filter((row) => inCountry(row) && filters.stateSet.has(row.customer_state))
+      : null;
+  const paymentMarginal =
+    fullRange && allStates && levels.payment
+      ? levels.payment.filter((row) => inCountry(row) && filters.paymentSet.has(row.payment_type))
+      : null;
+
+  return {
+    period: monthFilters && filters.grain !== "day" ? cells : null,
+    state: stateMarginal || cells,
+    payment: paymentMarginal || cells,
+    statePayment: cells,
+  };
+}
+
+function buildAggregates(filters) {
+  const filteredOrders = filterRows("orders_base", filters);
+  const filteredCategory = filterRows("category_base", filters);
+  const filteredDelay = filterRows("delay_bucket_base", filters);
+  const filteredReview = filterRows("review_score_base", filters);
+  const filteredOrderDetail = filterRows("order_detail_base", filters);
+
+  const rollups = selectRollups(filters);
+  const ordersPeriod = aggregateByPeriod(rollups.period || filteredOrders, filters.grain);
   const overall = computeOverallMetrics(ordersPeriod);
-  const paymentAgg = aggregateByPayment(filteredOrders);
+  const paymentAgg = aggregateByPayment(rollups.payment || filteredOrders);
   const categoryAgg = aggregateCategory(filteredCategory);
-  const stateAgg = aggregateByState(filteredOrders);
+  const stateAgg = aggregateByState(rollups.state || filteredOrders);
   const delayBucketAgg = aggregateDelayBucket(filteredDelay);
   const reviewDistAgg = aggregateReviewDistribution(filteredReview);
-  const statePaymentAgg = aggregateStatePayment(filteredOrders);
+  const statePaymentAgg = aggregateStatePayment(rollups.statePayment || filteredOrders);
 
   const categoryByStateRows = APP_STATE.selectedCategory
     ? aggregateCategoryByState(filteredCategory, APP_STATE.selectedCategory)
@@ -1243,6 +1348,8 @@ function buildAggregates(filters) {
     : [];
 
   return {
+    filteredOrders,
+    filteredCategory,
     filteredOrdersCount: filteredOrders.length,
     ordersPeriod,
     overall,
@@ -1256,31 +1363,35 @@ function buildAggregates(filters) {
     categoryByStateRows,
     stateByCategoryRows,
     sellerRiskRows,
-    stateGeo: RAW_DATA.state_geo,
+    stateGeo: datasetRows("state_geo"),
   };
 }
 
-function applyAndRender() {
-  const filters = getCurrentFilters();
+function renderDashboard(filters) {
   const uiConfig = getUiConfig();
   const aggregates = buildAggregates(filters);
-  updateFilterSummary(filters, aggregates.filteredOrdersCount);
+  updateFilterSummary(
+    filters,
+    aggregates.filteredOrdersCount,
+    pendingDatasets(activeTabId(), filters)
+  );
 
   if (!APP_STATE.selectedCategory && aggregates.categoryAgg.length > 0) {
     APP_STATE.selectedCategory = aggregates.categoryAgg[0].product_category;
     aggregates.categoryByStateRows = aggregateCategoryByState(
-      RAW_DATA.category_base.filter((row) => rowPassesFilter(row, filters)),
+      aggregates.filteredCategory,
       APP_STATE.selectedCategory
     );
   }
-  if (!APP_STATE.selectedState && aggregates.stateAgg.length > 0) {
-    APP_STATE.selectedState = aggregates.stateAgg[0].customer_state;
+  if (!APP_STATE.selectedState && aggregates.filteredOrders.length > 0) {
+    // First state in row order, whichever rollup stateAgg was built from.
+    APP_STATE.selectedState = aggregates.filteredOrders[0].customer_state;
     aggregates.stateByCategoryRows = aggregateStateByCategory(
-      RAW_DATA.category_base.filter((row) => rowPassesFilter(row, filters)),
+      aggregates.filteredCategory,
       APP_STATE.selectedState
     );
     aggregates.sellerRiskRows = aggregateBySellerForState(
-      RAW_DATA.orders_base.filter((row) => rowPassesFilter(row, filters)),
+      aggregates.filteredOrders,
       APP_STATE.selectedState
     );
   }
@@ -1290,6 +1401,26 @@ function applyAndRender() {
   renderCsat(aggregates);
 }
 
+async function applyAndRender() {
+  const sequence = ++RENDER_SEQUENCE;
+  const filters = getCurrentFilters();
+  const pending = pendingDatasets(activeTabId(), filters);
+  // Paint what is already loaded, then fill in the active tab's remaining datasets.
+  renderDashboard(filters);
+  if (pending.length === 0) return;
+  try {
+    await ensureDatasets(pending, filters);
+  } catch (error) {
+    console.error(error);
+    document.getElementById("filter-summary").textContent +=
+      ` | Failed to load ${pending.join(", ")}`;
+    return;
+  }
+  if (sequence === RENDER_SEQUENCE) {
+    renderDashboard(getCurrentFilters());
+  }
+}
+
 function resetFilters() {
   document.getElementById("filter-country").value = "Brazil";
   document.getElementById("filter-grain").value = "month";
@@ -1317,7 +1448,7 @@ function initializeFilters(meta) {
 }
 
 function getWorstStateGlobal() {
-  const byState = aggregateByState(RAW_DATA.orders_base);
+  const byState = aggregateByState(rollupLevels().state || RAW_DATA.orders_base);
   const candidates = byState.filter((row) => toNumber(row.order_count) >= 80);
   const target = (candidates.length > 0 ? candidates : byState).sort(
     (a, b) => toNumber(b.severe_delay_rate) - toNumber(a.severe_delay_rate)
@@ -1326,7 +1457,7 @@ function getWorstStateGlobal() {
 }
 
 function getHighestRiskCellGlobal() {
-  const byStatePayment = aggregateStatePayment(RAW_DATA.orders_base);
+  const byStatePayment = aggregateStatePayment(rollupLevels().month || RAW_DATA.orders_base);
   const candidates = byStatePayment.filter((row) => toNumber(row.order_count) >= 60);
   const target = (candidates.length > 0 ? candidates : byStatePayment).sort(
     (a, b) => toNumber(b.low_score_rate) - toNumber(a.low_score_rate)
@@ -1368,8 +1499,367 @@ function applyStoryline(mode) {
   applyAndRender();
 }
 
+const COLUMNAR_DATA_URL = "./data/dashboard_data.columnar.json";
+const ROW_DATA_URL = "./data/dashboard_data.json";
+const COLUMNAR_FORMAT = "olist-columnar-v1";
+const TYPED_ARRAYS = {
+  int8: Int8Array,
+  int16: Int16Array,
+  int32: Int32Array,
+  float64: Float64Array,
+};
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+function columnValues(column, buffer) {
+  if (column.data) return column.data;
+  const ArrayType = TYPED_ARRAYS[column.dtype];
+  if (!ArrayType || !buffer) {
+    throw new Error(`Unsupported columnar array: ${column.dtype}`);
+  }
+  return new ArrayType(buffer, column.offset, column.length);
+}
+
+function decodeColumn(column, dictionaries, buffer) {
+  if (column.encoding === "plain" && column.data) return column.data;
+  const values = columnValues(column, buffer);
+  const decoded = new Array(values.length);
+  if (column.encoding === "dict") {
+    const dictionary = dictionaries[column.domain];
+    for (let i = 0; i < values.length; i += 1) {
+      // Null codes are -1 (NaN in binary buffers with nulls); both fail >= 0.
+      decoded[i] = values[i] >= 0 ? dictionary[values[i]] : null;
+    }
+    return decoded;
+  }
+  if (column.encoding === "day") {
+    const epochMs = Date.parse(`${column.epoch}T00:00:00Z`);
+    const labels = [];
+    for (let i = 0; i < values.length; i += 1) {
+      const offset = values[i];
+      if (!(offset >= 0)) {
+        decoded[i] = null;
+        continue;
+      }
+      if (labels[offset] === undefined) {
+        labels[offset] = new Date(epochMs + offset * DAY_MS).toISOString().slice(0, 10);
+      }
+      decoded[i] = labels[offset];
+    }
+    return decoded;
+  }
+  for (let i = 0; i < values.length; i += 1) {
+    const value = values[i];
+    decoded[i] = value === null || Number.isNaN(value) ? null : value;
+  }
+  return decoded;
+}
+
+function decodeDataset(dataset, dictionaries, buffer) {
+  const names = Object.keys(dataset.columns);
+  const columns = names.map((name) => decodeColumn(dataset.columns[name], dictionaries, buffer));
+  const rows = new Array(dataset.rows);
+  for (let i = 0; i < dataset.rows; i += 1) {
+    const row = {};
+    for (let c = 0; c < names.length; c += 1) {
+      row[names[c]] = columns[c][i];
+    }
+    rows[i] = row;
+  }
+  return rows;
+}
+
+// Columns resolved through package indexes, with the filter value sets they
+// are checked against; together they mirror rowPassesFilter.
+const INDEXED_FILTERS = [
+  ["customer_state", (filters) => filters.stateSet],
+  ["payment_type", (filters) => filters.paymentSet],
+  ["country", (filters) => (filters.country ? new Set([filters.country]) : null)],
+];
+// dataset name -> [{ start, index }], one segment per decoded package or shard.
+const DATASET_INDEXES = new Map();
+
+function decodeIndex(dataset, dictionaries, buffer) {
+  if (!dataset.index) return null;
+  const index = { rows: dataset.rows, dateStarts: null, epochMs: 0, columns: {} };
+  const date = dataset.index.date;
+  if (date) {
+    index.dateStarts = date.starts;
+    index.epochMs = Date.parse(`${dataset.columns[date.column].epoch}T00:00:00Z`);
+  }
+  const postings = dataset.index.postings || {};
+  INDEXED_FILTERS.forEach(([name]) => {
+    const column = dataset.columns[name];
+    if (!column || column.encoding !== "dict") return;
+    const posting = postings[name];
+    index.columns[name] = {
+      codes: columnValues(column, buffer),
+      dictionary: dictionaries[column.domain],
+      offsets: posting ? posting.offsets : null,
+      ids: posting ? columnValues(posting, buffer) : null,
+    };
+  });
+  return index;
+}
+
+function lowerBound(values, from, to, target) {
+  let lo = from;
+  let hi = to;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (values[mid] < target) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+function dateRowSpan(index, filters) {
+  if (!index.dateStarts) return [0, index.rows];
+  const starts = index.dateStarts;
+  const last = starts.length - 1;
+  const dayOf = (dateStr) =>
+    Math.round((Date.parse(`${dateStr}T00:00:00Z`) - index.epochMs) / DAY_MS);
+  const clampDay = (day) => Math.min(last, Math.max(0, day));
+  // Rows are date-sorted, so a date range is one contiguous span of row ids.
+  const lo = starts[clampDay(dayOf(filters.startDate))];
+  const hi = starts[clampDay(dayOf(filters.endDate) + 1)];
+  return [lo, Math.max(lo, hi)];
+}
+
+function indexedRowIds(index, filters) {
+  const [lo, hi] = dateRowSpan(index, filters);
+  const active = [];
+  for (const [name, selectedFor] of INDEXED_FILTERS) {
+    const selected = selectedFor(filters);
+    if (!selected) continue;
+    const column = index.columns[name];
+    // rowPassesFilter rejects rows missing a filtered column.
+    if (!column) return [];
+    const mask = new Uint8Array(column.dictionary.length);
+    selected.forEach((value) => {
+      const code = column.dictionary.indexOf(value);
+      if (code >= 0) mask[code] = 1;
+    });
+    // Without postings every dictionary value is assumed present.
+    const present = (code) =>
+      !column.offsets || (code + 1 < column.offsets.length && column.offsets[code + 1] > column.offsets[code]);
+    if (mask.some((flag, code) => !flag && present(code))) {
+      active.push({ column, mask });
+    }
+  }
+
+  // Drive from the posting lists with the fewest ids in the date span and
+  // check the remaining filters against their code arrays.
+  let driver = null;
+  let driverSlices = [];
+  let driverSize = Infinity;
+  active.forEach((constraint) => {
+    const { ids, offsets } = constraint.column;
+    if (!ids) return;
+    const slices = [];
+    let size = 0;
+    constraint.mask.forEach((flag, code) => {
+      if (!flag || code + 1 >= offsets.length) return;
+      const from = lowerBound(ids, offsets[code], offsets[code + 1], lo);
+      const to = lowerBound(ids, from, offsets[code + 1], hi);
+      if (to > from) {
+        slices.push([from, to]);
+        size += to - from;
+      }
+    });
+    if (size < driverSize) {
+      driver = constraint;
+      driverSlices = slices;
+      driverSize = size;
+    }
+  });
+  const checks = active.filter((constraint) => constraint !== driver);
+  const passes = (id) => {
+    for (let c = 0; c < checks.length; c += 1) {
+      if (checks[c].mask[checks[c].column.codes[id]] !== 1) return false;
+    }
+    return true;
+  };
+
+  const rowIds = [];
+  if (!driver) {
+    for (let id = lo; id < hi; id += 1) {
+      if (passes(id)) rowIds.push(id);
+    }
+    return rowIds;
+  }
+  const { ids } = driver.column;
+  driverSlices.forEach(([from, to]) => {
+    for (let k = from; k < to; k += 1) {
+      if (passes(ids[k])) rowIds.push(ids[k]);
+    }
+  });
+  // Postings are ascending per code; merging several codes needs a sort to
+  // keep the dataset's row (date) order.
+  return driverSlices.length > 1 ? Int32Array.from(rowIds).sort() : rowIds;
+}
+
+function decodeColumnarPackage(header, buffer) {
+  const data = { generated_at: header.generated_at, meta: header.meta };
+  Object.entries(header.datasets).forEach(([name, dataset]) => {
+    data[name] = decodeDataset(dataset, header.dictionaries, buffer);
+    const index = decodeIndex(dataset, header.dictionaries, buffer);
+    if (index) DATASET_INDEXES.set(name, [{ start: 0, index }]);
+  });
+  return data;
+}
+
+async function loadColumnarData() {
+  const response = await fetch(COLUMNAR_DATA_URL);
+  if (!response.ok) {
+    throw new Error(`Failed to load columnar data package: ${response.status}`);
+  }
+  const header = await response.json();
+  if (header.format !== COLUMNAR_FORMAT) {
+    throw new Error(`Unsupported data package format: ${header.format}`);
+  }
+  let buffer = null;
+  if (header.buffer) {
+    const bufferResponse = await fetch(new URL(header.buffer, response.url));
+    if (!bufferResponse.ok) {
+      throw new Error(`Failed to load columnar buffer: ${bufferResponse.status}`);
+    }
+    buffer = await bufferResponse.arrayBuffer();
+  }
+  return decodeColumnarPackage(header, buffer);
+}
+
+const MANIFEST_URL = "./data/manifest.json";
+const MANIFEST_FORMAT = "olist-manifest-v1";
+// Needed by every tab and by the storyline shortcuts; loaded for all years up front.
+const CORE_DATASETS = ["orders_base", "orders_rollup", "state_geo"];
+// Fetched when their tab is active, for the years inside the date filter only.
+const TAB_DATASETS = {
+  "exec-tab": ["category_base"],
+  "ops-tab": ["category_base"],
+  "csat-tab": ["delay_bucket_base", "review_score_base", "order_detail_base"],
+};
+const SHARD_STORE = {
+  manifest: null,
+  baseUrl: null,
+  data: null,
+  requests: new Map(),
+  rows: new Map(),
+};
+let RENDER_SEQUENCE = 0;
+
+function shardsFor(name, filters) {
+  const dataset = SHARD_STORE.manifest.datasets[name];
+  if (!dataset) return [];
+  if (!filters) return dataset.shards;
+  const startYear = Number(filters.startDate.slice(0, 4));
+  const endYear = Number(filters.endDate.slice(0, 4));
+  return dataset.shards.filter(
+    (shard) => shard.year === null || (shard.year >= startYear && shard.year <= endYear)
+  );
+}
+
+function pendingDatasets(tabId, filters) {
+  if (!SHARD_STORE.manifest) return [];
+  return (TAB_DATASETS[tabId] || []).filter((name) =>
+    shardsFor(name, filters).some((shard) => !SHARD_STORE.rows.has(shard.path))
+  );
+}
+
+async function fetchShard(name, shard) {
+  const response = await fetch(new URL(shard.path, SHARD_STORE.baseUrl));
+  if (!response.ok) {
+    throw new Error(`Failed to load ${name} shard ${shard.path}: ${response.status}`);
+  }
+  const header = await response.json();
+  if (header.format !== COLUMNAR_FORMAT) {
+    throw new Error(`Unsupported shard format: ${header.format}`);
+  }
+  let buffer = null;
+  if (header.buffer) {
+    const bufferResponse = await fetch(new URL(header.buffer, response.url));
+    if (!bufferResponse.ok) {
+      throw new Error(`Failed to load shard buffer: ${bufferResponse.status}`);
+    }
+    buffer = await bufferResponse.arrayBuffer();
+  }
+  const { dictionaries } = SHARD_STORE.manifest;
+  const decoded = {
+    rows: decodeDataset(header.datasets[name], dictionaries, buffer),
+    index: decodeIndex(header.datasets[name], dictionaries, buffer),
+  };
+  SHARD_STORE.rows.set(shard.path, decoded);
+  return decoded;
+}
+
+function loadShard(name, shard) {
+  if (!SHARD_STORE.requests.has(shard.path)) {
+    const request = fetchShard(name, shard).catch((error) => {
+      SHARD_STORE.requests.delete(shard.path);
+      throw error;
+    });
+    SHARD_STORE.requests.set(shard.path, request);
+  }
+  return SHARD_STORE.requests.get(shard.path);
+}
+
+async function ensureDatasets(names, filters) {
+  if (!SHARD_STORE.manifest) return;
+  await Promise.all(
+    names.map(async (name) => {
+      await Promise.all(shardsFor(name, filters).map((shard) => loadShard(name, shard)));
+      // Rebuild from every loaded shard in manifest (date) order; rows outside
+      // the date filter are dropped by filterRows as before.
+      const loaded = shardsFor(name, null)
+        .filter((shard) => SHARD_STORE.rows.has(shard.path))
+        .map((shard) => SHARD_STORE.rows.get(shard.path));
+      const rows = [];
+      const segments = [];
+      loaded.forEach((decoded) => {
+        segments.push({ start: rows.length, index: decoded.index });
+        for (let i = 0; i < decoded.rows.length; i += 1) rows.push(decoded.rows[i]);
+      });
+      SHARD_STORE.data[name] = rows;
+      if (segments.every((segment) => segment.index)) DATASET_INDEXES.set(name, segments);
+      else DATASET_INDEXES.delete(name);
+    })
+  );
+}
+
+async function loadShardedData() {
+  const response = await fetch(MANIFEST_URL);
+  if (!response.ok) {
+    throw new Error(`Failed to load data manifest: ${response.status}`);
+  }
+  const manifest = await response.json();
+  if (manifest.format !== MANIFEST_FORMAT) {
+    throw new Error(`Unsupported data manifest format: ${manifest.format}`);
+  }
+  SHARD_STORE.manifest = manifest;
+  SHARD_STORE.baseUrl = response.url;
+  SHARD_STORE.data = { generated_at: manifest.generated_at, meta: manifest.meta };
+  try {
+    await ensureDatasets(CORE_DATASETS, null);
+  } catch (error) {
+    SHARD_STORE.manifest = null;
+    throw error;
+  }
+  return SHARD_STORE.data;
+}
+
 async function loadData() {
-  const response = await fetch("./data/dashboard_data.json");
+  try {
+    return await loadShardedData();
+  } catch (error) {
+    console.warn("Sharded data package unavailable, falling back to columnar package.", error);
+  }
+  try {
+    return await loadColumnarData();
+  } catch (error) {
+    console.warn("Columnar data package unavailable, falling back to row JSON.", error);
+  }
+  // Row JSON carries no indexes; drop any left by a partially loaded package.
+  DATASET_INDEXES.clear();
+  const response = await fetch(ROW_DATA_URL);
   if (!response.ok) {
     throw new Error(`Failed to load data package: ${response.status}`);
   }
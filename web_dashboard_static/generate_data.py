@@ -3,44 +3,98 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
-from datetime import datetime, timezone
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Set, TextIO, Tuple, Union
 
 import duckdb
-import pandas as pd
-
-
-BASE_CLEAN_ORDERS_CTE = """
-WITH clean_orders AS (
-    SELECT
-        f.order_id,
-        t.full_date AS purchase_date,
-        COALESCE(f.customer_state, 'UNKNOWN') AS customer_state,
-        COALESCE(f.primary_seller_state, 'UNKNOWN') AS seller_state,
-        COALESCE(f.main_payment_type, 'unknown') AS payment_type,
-        'Brazil' AS country,
-        f.gmv,
-        f.freight_value,
-        COALESCE(f.payment_installments, 0) AS payment_installments,
-        f.is_late_delivery,
-        f.delay_days,
-        f.delivery_days,
-        f.review_score
-    FROM mart.fact_orders f
-    JOIN mart.dim_time t
-      ON f.purchase_date_key = t.date_key
-    WHERE f.purchase_date_key IS NOT NULL
-      AND COALESCE(f.order_status, 'unknown') NOT IN ('canceled', 'unavailable')
-)
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+DEFAULT_BATCH_ROWS = 50_000
+ROW_JSON_SLICE = 4096
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
+WAREHOUSE_ALIAS = "warehouse"
+CLEAN_ORDERS_TABLE = "memory.main.clean_orders"
+PACKAGE_FORMATS = ("rows", "columnar", "shards")
+COLUMNAR_FORMAT = "olist-columnar-v1"
+MANIFEST_FORMAT = "olist-manifest-v1"
+MANIFEST_NAME = "manifest.json"
+SHARD_DIR_NAME = "shards"
+DATE_COLUMN = "purchase_date"
+LOAD_MANIFEST_TABLE = "raw._load_manifest"
+MODEL_MANIFEST_TABLE = "mart._model_manifest"
+# Dictionary columns the dashboard filters on; each gets posting lists.
+POSTING_COLUMNS = ("customer_state", "payment_type")
+SHARD_DIGEST_CHARS = 16
+TEMP_SUFFIX = ".tmp"
+BUFFER_ALIGNMENT = 8
+NUMPY_DTYPES = {"int8": "i1", "int16": "i2", "int32": "i4", "float64": "f8"}
+# A RawJson placeholder as json.dumps writes it; _json_text swaps in the text.
+RAW_JSON_PLACEHOLDER = re.compile(r'"\\u0000(\d+)"')
+
+# Text columns stored as codes; columns naming the same domain share one
+# dictionary, so codes compare across datasets.
+DICTIONARY_DOMAINS = {
+    "customer_state": "state",
+    "seller_state": "state",
+    "payment_type": "payment_type",
+    "country": "country",
+    "product_category": "category",
+    "top_product_category": "category",
+    "delay_bucket": "delay_bucket",
+    "rollup": "rollup",
+}
+
+# meta key -> dataset column whose distinct values populate it.
+META_KEYS = {
+    "states": "customer_state",
+    "seller_states": "seller_state",
+    "categories": "product_category",
+    "payment_types": "payment_type",
+}
+
+
+# Materialized once per run into an in-memory table that every QUERY_MAP
+# query reads, sorted by date so date-ordered scans stay sequential.
+CLEAN_ORDERS_QUERY = """
+SELECT
+    f.order_id,
+    t.full_date AS purchase_date,
+    COALESCE(f.customer_state, 'UNKNOWN') AS customer_state,
+    COALESCE(f.primary_seller_state, 'UNKNOWN') AS seller_state,
+    COALESCE(f.main_payment_type, 'unknown') AS payment_type,
+    'Brazil' AS country,
+    f.gmv,
+    f.freight_value,
+    COALESCE(f.payment_installments, 0) AS payment_installments,
+    f.is_late_delivery,
+    f.delay_days,
+    f.delivery_days,
+    f.review_score
+FROM mart.fact_orders f
+JOIN mart.dim_time t
+  ON f.purchase_date_key = t.date_key
+WHERE f.purchase_date_key IS NOT NULL
+  AND COALESCE(f.order_status, 'unknown') NOT IN ('canceled', 'unavailable')
+ORDER BY purchase_date, f.order_id
 """
 
 
 QUERY_MAP = {
-    "orders_base": (
-        BASE_CLEAN_ORDERS_CTE
-        + """
+    "orders_base": """
         SELECT
             purchase_date,
             customer_state,
@@ -64,11 +118,8 @@ QUERY_MAP = {
         FROM clean_orders
         GROUP BY purchase_date, customer_state, seller_state, payment_type, country
         ORDER BY purchase_date, customer_state, seller_state, payment_type
-        """
-    ),
-    "category_base": (
-        BASE_CLEAN_ORDERS_CTE
-        + """
+        """,
+    "category_base": """
         SELECT
             co.purchase_date,
             co.customer_state,
@@ -94,12 +145,9 @@ QUERY_MAP = {
             co.payment_type,
             co.country,
             COALESCE(foi.product_category, 'unknown')
-        ORDER BY co.purchase_date, co.customer_state, co.payment_type
-        """
-    ),
-    "delay_bucket_base": (
-        BASE_CLEAN_ORDERS_CTE
-        + """
+        ORDER BY co.purchase_date, co.customer_state, co.payment_type, product_category
+        """,
+    "delay_bucket_base": """
         SELECT
             purchase_date,
             customer_state,
@@ -119,12 +167,9 @@ QUERY_MAP = {
             SUM(CASE WHEN review_score <= 2 AND review_score IS NOT NULL THEN 1 ELSE 0 END) AS low_score_count
         FROM clean_orders
         GROUP BY purchase_date, customer_state, payment_type, country, delay_bucket
-        ORDER BY purchase_date, customer_state, payment_type
-        """
-    ),
-    "review_score_base": (
-        BASE_CLEAN_ORDERS_CTE
-        + """
+        ORDER BY purchase_date, customer_state, payment_type, delay_bucket
+        """,
+    "review_score_base": """
         SELECT
             purchase_date,
             customer_state,
@@ -136,22 +181,32 @@ QUERY_MAP = {
         WHERE review_score IS NOT NULL
         GROUP BY purchase_date, customer_state, payment_type, country, review_score
         ORDER BY purchase_date, customer_state, payment_type, review_score
-        """
-    ),
-    "order_detail_base": (
-        BASE_CLEAN_ORDERS_CTE
-        + """
-        , order_top_category AS (
+        """,
+    "order_detail_base": """
+        WITH detail_orders AS (
+            SELECT *
+            FROM clean_orders
+            WHERE delay_days >= 5
+               OR COALESCE(review_score, 5) <= 2
+               OR MOD(HASH(order_id), 100) < 8
+        ),
+        order_category_gmv AS (
             SELECT
                 oi.order_id,
-                COALESCE(oi.product_category, 'unknown') AS top_product_category,
-                SUM(COALESCE(oi.item_price, 0)) AS category_gmv,
-                ROW_NUMBER() OVER (
-                    PARTITION BY oi.order_id
-                    ORDER BY SUM(COALESCE(oi.item_price, 0)) DESC, COALESCE(oi.product_category, 'unknown')
-                ) AS rn
+                COALESCE(oi.product_category, 'unknown') AS product_category,
+                SUM(COALESCE(oi.item_price, 0)) AS category_gmv
             FROM mart.fact_order_items oi
+            SEMI JOIN detail_orders d
+              ON oi.order_id = d.order_id
             GROUP BY oi.order_id, COALESCE(oi.product_category, 'unknown')
+        ),
+        order_top_category AS (
+            -- Only the sampled detail orders need a top category.
+            SELECT
+                order_id,
+                FIRST(product_category ORDER BY category_gmv DESC, product_category) AS top_product_category
+            FROM order_category_gmv
+            GROUP BY order_id
         )
         SELECT
             co.order_id,
@@ -167,16 +222,57 @@ QUERY_MAP = {
             co.delay_days,
             co.review_score,
             COALESCE(otc.top_product_category, 'unknown') AS top_product_category
-        FROM clean_orders co
+        FROM detail_orders co
         LEFT JOIN order_top_category otc
           ON co.order_id = otc.order_id
-         AND otc.rn = 1
-        WHERE co.delay_days >= 5
-           OR COALESCE(co.review_score, 5) <= 2
-           OR MOD(HASH(co.order_id), 100) < 8
         ORDER BY co.purchase_date, co.order_id
-        """
-    ),
+        """,
+    # One GROUPING SETS pass over clean_orders. Month and week cells collapse
+    # seller_state; the state and payment marginals cover the whole date range.
+    # Rows keep orders_base's measure columns so the dashboard aggregates them
+    # with the same code, with purchase_date set to the period start.
+    "orders_rollup": """
+        WITH rollup_source AS (
+            SELECT
+                *,
+                CAST(DATE_TRUNC('month', purchase_date) AS DATE) AS month_start,
+                CAST(DATE_TRUNC('week', purchase_date) AS DATE) AS week_start
+            FROM clean_orders
+        )
+        SELECT
+            CASE
+                WHEN GROUPING(month_start) = 0 THEN 'month'
+                WHEN GROUPING(week_start) = 0 THEN 'week'
+                WHEN GROUPING(customer_state) = 0 THEN 'state'
+                ELSE 'payment'
+            END AS rollup,
+            COALESCE(month_start, week_start) AS purchase_date,
+            customer_state,
+            payment_type,
+            country,
+            COUNT(*) AS order_count,
+            SUM(gmv) AS gmv,
+            SUM(freight_value) AS freight_value,
+            SUM(payment_installments) AS payment_installments_sum,
+            SUM(CASE WHEN is_late_delivery = 1 THEN 1 ELSE 0 END) AS late_count,
+            SUM(CASE WHEN delay_days >= 5 THEN 1 ELSE 0 END) AS severe_delay_count,
+            SUM(COALESCE(delivery_days, 0)) AS delivery_days_sum,
+            SUM(CASE WHEN delivery_days IS NOT NULL THEN 1 ELSE 0 END) AS delivery_days_count,
+            SUM(COALESCE(delay_days, 0)) AS delay_days_sum,
+            SUM(CASE WHEN delay_days IS NOT NULL THEN 1 ELSE 0 END) AS delay_days_count,
+            SUM(CASE WHEN review_score IS NOT NULL THEN review_score ELSE 0 END) AS review_score_sum,
+            SUM(CASE WHEN review_score IS NOT NULL THEN 1 ELSE 0 END) AS review_count,
+            SUM(CASE WHEN review_score = 1 THEN 1 ELSE 0 END) AS one_star_count,
+            SUM(CASE WHEN review_score <= 2 AND review_score IS NOT NULL THEN 1 ELSE 0 END) AS low_score_count
+        FROM rollup_source
+        GROUP BY GROUPING SETS (
+            (month_start, customer_state, payment_type, country),
+            (week_start, customer_state, payment_type, country),
+            (customer_state, country),
+            (payment_type, country)
+        )
+        ORDER BY purchase_date NULLS LAST, rollup, customer_state, payment_type
+        """,
     "state_geo": """
         SELECT
             customer_state,
@@ -203,44 +299,828 @@ def parse_args() -> argparse.Namespace:
         default="web_dashboard_static/data/dashboard_data.json",
         help="Output JSON path.",
     )
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=DEFAULT_BATCH_ROWS,
+        help=f"Rows fetched from DuckDB per Arrow record batch (default: {DEFAULT_BATCH_ROWS}).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="Maximum number of dataset queries run concurrently.",
+    )
+    parser.add_argument(
+        "--formats",
+        type=parse_formats,
+        default=PACKAGE_FORMATS,
+        help=(
+            "Comma-separated packages to write: rows (dashboard_data.json), "
+            "columnar (dashboard_data.columnar.json) and/or shards (manifest.json "
+            "plus per-dataset, per-year files under shards/). Default: rows,columnar,shards."
+        ),
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Rebuild every dataset and shard, ignoring the previous manifest.",
+    )
+    parser.add_argument(
+        "--binary",
+        action="store_true",
+        help="Store columnar and shard numeric arrays in binary typed-array buffers next to their headers.",
+    )
     return parser.parse_args()
 
 
-def dataframe_to_records(df: pd.DataFrame) -> List[dict]:
-    normalized = df.copy()
-    for col_name in normalized.columns:
-        if pd.api.types.is_datetime64_any_dtype(normalized[col_name]):
-            normalized[col_name] = normalized[col_name].dt.strftime("%Y-%m-%d")
-        elif pd.api.types.is_float_dtype(normalized[col_name]):
-            normalized[col_name] = normalized[col_name].round(4)
-    return json.loads(normalized.to_json(orient="records", date_format="iso"))
+def parse_formats(value: str) -> Tuple[str, ...]:
+    formats = tuple(dict.fromkeys(item.strip() for item in value.split(",") if item.strip()))
+    unknown = sorted(set(formats) - set(PACKAGE_FORMATS))
+    if not formats or unknown:
+        raise argparse.ArgumentTypeError(
+            f"Unknown package format(s) {unknown}; choose from {', '.join(PACKAGE_FORMATS)}."
+        )
+    return formats
+
+
+def temp_path_for(path: Path) -> Path:
+    return path.with_name(path.name + TEMP_SUFFIX)
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
 
 
-def build_meta(orders_base_records: List[dict]) -> Dict[str, object]:
-    if not orders_base_records:
+def quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def connect_sources(db_path: Path) -> duckdb.DuckDBPyConnection:
+    """Open an in-memory database with the warehouse attached read-only.
+
+    Scratch tables such as ``clean_orders`` live in the in-memory catalog,
+    which, unlike TEMP tables, every cursor of the connection can read.
+    """
+    conn = duckdb.connect()
+    conn.execute(f"ATTACH {quote_literal(str(db_path))} AS {WAREHOUSE_ALIAS} (READ_ONLY)")
+    _use_sources(conn)
+    return conn
+
+
+def source_cursor(conn: duckdb.DuckDBPyConnection) -> duckdb.DuckDBPyConnection:
+    cursor = conn.cursor()
+    _use_sources(cursor)
+    return cursor
+
+
+def _use_sources(conn: duckdb.DuckDBPyConnection) -> None:
+    # mart.* resolves in the warehouse and clean_orders in the scratch catalog.
+    conn.execute(f"SET search_path = '{WAREHOUSE_ALIAS}.main,memory.main'")
+
+
+def materialize_clean_orders(conn: duckdb.DuckDBPyConnection) -> int:
+    conn.execute(f"CREATE OR REPLACE TABLE {CLEAN_ORDERS_TABLE} AS {CLEAN_ORDERS_QUERY}")
+    return conn.execute(f"SELECT COUNT(*) FROM {CLEAN_ORDERS_TABLE}").fetchone()[0]
+
+
+def normalized_query(conn: duckdb.DuckDBPyConnection, query: str) -> str:
+    """Wrap a dataset query so DuckDB emits package-ready columns.
+
+    HUGEINT sums become BIGINT and floating columns are rounded to 4 places
+    with NaN mapped to null. Dates stay DATE; each writer formats them.
+    """
+    columns = conn.execute(f"DESCRIBE SELECT * FROM ({query})").fetchall()
+    projections = []
+    for name, column_type, *_ in columns:
+        column = quote_identifier(name)
+        if column_type.startswith("TIMESTAMP"):
+            expr = f"CAST({column} AS DATE)"
+        elif column_type == "HUGEINT":
+            expr = f"CAST({column} AS BIGINT)"
+        elif column_type in ("DOUBLE", "FLOAT") or column_type.startswith("DECIMAL"):
+            expr = f"CASE WHEN ISNAN({column}) THEN NULL ELSE ROUND(CAST({column} AS DOUBLE), 4) END"
+        else:
+            expr = column
+        projections.append(f"{expr} AS {column}")
+    return f"SELECT {', '.join(projections)} FROM ({query})"
+
+
+def arrow_batches(
+    conn: duckdb.DuckDBPyConnection, query: str, batch_rows: int
+) -> pa.RecordBatchReader:
+    result = conn.execute(normalized_query(conn, query))
+    to_reader = getattr(result, "to_arrow_reader", None)
+    if to_reader is None:  # duckdb < 1.4
+        return result.fetch_record_batch(batch_rows)
+    return to_reader(batch_rows)
+
+
+def dates_as_text(batch: pa.RecordBatch) -> pa.RecordBatch:
+    columns = [
+        pc.strftime(column, format="%Y-%m-%d") if pa.types.is_date(column.type) else column
+        for column in batch.columns
+    ]
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+class PackageMeta:
+    """Filter domains collected from streamed batches instead of materialized rows."""
+
+    def __init__(self) -> None:
+        self.dates: Set[str] = set()
+        self.values: Dict[str, Set[str]] = {column: set() for column in META_KEYS.values()}
+
+    def update(self, dataset: str, batch: pa.RecordBatch) -> None:
+        names = batch.schema.names
+        if dataset == "orders_base":
+            if "purchase_date" in names:
+                self.dates.update(
+                    str(value) for value in _distinct(batch.column(names.index("purchase_date")))
+                )
+            for column in ("customer_state", "seller_state", "payment_type"):
+                if column in names:
+                    self.values[column].update(_distinct(batch.column(names.index(column))))
+        elif dataset == "category_base" and "product_category" in names:
+            self.values["product_category"].update(
+                _distinct(batch.column(names.index("product_category")))
+            )
+
+    def update_from_sources(self, conn: duckdb.DuckDBPyConnection) -> None:
+        """Fill the domains from clean_orders when only some years are regenerated."""
+        self.dates.update(
+            str(value)
+            for (value,) in conn.execute("SELECT DISTINCT purchase_date FROM clean_orders").fetchall()
+        )
+        for column in ("customer_state", "seller_state", "payment_type"):
+            self.values[column].update(
+                value
+                for (value,) in conn.execute(
+                    f"SELECT DISTINCT {column} FROM clean_orders WHERE {column} IS NOT NULL"
+                ).fetchall()
+            )
+        self.values["product_category"].update(
+            value
+            for (value,) in conn.execute(
+                """
+                SELECT DISTINCT COALESCE(foi.product_category, 'unknown')
+                FROM mart.fact_order_items foi
+                JOIN clean_orders co
+                  ON foi.order_id = co.order_id
+                """
+            ).fetchall()
+        )
+
+    def merge(self, other: "PackageMeta") -> None:
+        self.dates |= other.dates
+        for column, values in other.values.items():
+            self.values[column] |= values
+
+    def as_dict(self) -> Dict[str, object]:
         return {
             "countries": ["Brazil"],
-            "min_date": None,
-            "max_date": None,
-            "states": [],
-            "seller_states": [],
-            "categories": [],
-            "payment_types": [],
+            "min_date": min(self.dates) if self.dates else None,
+            "max_date": max(self.dates) if self.dates else None,
+            **{key: sorted(self.values[column]) for key, column in META_KEYS.items()},
         }
 
-    dates = sorted({str(row["purchase_date"])[:10] for row in orders_base_records})
-    states = sorted({row["customer_state"] for row in orders_base_records})
-    seller_states = sorted({row["seller_state"] for row in orders_base_records})
-    payment_types = sorted({row["payment_type"] for row in orders_base_records})
-    return {
-        "countries": ["Brazil"],
-        "min_date": dates[0],
-        "max_date": dates[-1],
-        "states": states,
-        "seller_states": seller_states,
-        "categories": [],
-        "payment_types": payment_types,
-    }
+
+def _fits_int32(column: pa.Array) -> bool:
+    bounds = pc.min_max(column)
+    low, high = bounds["min"].as_py(), bounds["max"].as_py()
+    return low is None or (-(2**31) <= low and high < 2**31)
+
+
+def _distinct(column: pa.Array) -> List[object]:
+    return [value for value in pc.unique(column).to_pylist() if value is not None]
+
+
+def warehouse_fingerprint(conn: duckdb.DuckDBPyConnection, db_path: Path) -> str:
+    """Identify a warehouse build by its raw file hashes and model statement hashes.
+
+    Both manifests are written by ``run_pipeline.py``, so a no-op pipeline
+    re-run keeps the fingerprint. Warehouses without them fall back to the
+    file's size and mtime.
+    """
+    try:
+        entries = conn.execute(
+            f"""
+            SELECT 'raw', file_name, content_hash FROM {LOAD_MANIFEST_TABLE}
+            UNION ALL
+            SELECT 'model', target_name, statement_hash FROM {MODEL_MANIFEST_TABLE}
+            ORDER BY 1, 2
+            """
+        ).fetchall()
+    except duckdb.CatalogException:
+        stat = db_path.stat()
+        entries = [("file", str(stat.st_size), str(stat.st_mtime_ns))]
+    return _digest(entries)
+
+
+def generator_fingerprint(formats: Sequence[str], binary: bool) -> str:
+    """Hash everything besides the warehouse that shapes the package."""
+    return _digest(
+        {
+            "formats": sorted(formats),
+            "binary": binary,
+            "versions": [COLUMNAR_FORMAT, MANIFEST_FORMAT],
+            "clean_orders": CLEAN_ORDERS_QUERY,
+            "queries": QUERY_MAP,
+            "dictionary_domains": DICTIONARY_DOMAINS,
+            "posting_columns": POSTING_COLUMNS,
+        }
+    )
+
+
+def day_checksums(conn: duckdb.DuckDBPyConnection) -> Dict[str, str]:
+    """Checksum every purchase day over the clean orders and their item columns.
+
+    Sums of row hashes are order-independent, and unlike XOR duplicates do
+    not cancel out. Only item columns the dataset queries read are hashed,
+    so surrogate key renumbering does not mark every day as changed.
+    """
+    rows = conn.execute(
+        """
+        WITH order_sums AS (
+            SELECT purchase_date, COUNT(*) AS orders, SUM(HASH(co)::HUGEINT) AS order_hash
+            FROM clean_orders co
+            GROUP BY purchase_date
+        ),
+        item_sums AS (
+            SELECT
+                co.purchase_date,
+                COUNT(*) AS items,
+                SUM(
+                    HASH(
+                        foi.order_id,
+                        foi.product_category,
+                        foi.item_price,
+                        foi.item_freight_value,
+                        foi.item_contribution_margin_proxy,
+                        dp.product_weight_g
+                    )::HUGEINT
+                ) AS item_hash
+            FROM mart.fact_order_items foi
+            JOIN clean_orders co
+              ON foi.order_id = co.order_id
+            LEFT JOIN mart.dim_product dp
+              ON foi.product_sk = dp.product_sk
+            GROUP BY co.purchase_date
+        )
+        SELECT
+            CAST(o.purchase_date AS VARCHAR),
+            LEFT(MD5(CONCAT_WS('|', o.orders, o.order_hash, i.items, i.item_hash)), 16)
+        FROM order_sums o
+        LEFT JOIN item_sums i
+          ON o.purchase_date = i.purchase_date
+        ORDER BY o.purchase_date
+        """
+    ).fetchall()
+    return dict(rows)
+
+
+def affected_years(days: Set[str]) -> Set[int]:
+    """Shard years whose content can change when these purchase days change.
+
+    Weekly rollup cells are dated by their Monday, so a day in early January
+    can also change a cell in the previous year's shard.
+    """
+    years: Set[int] = set()
+    for value in days:
+        day = date.fromisoformat(value)
+        years.add(day.year)
+        years.add((day - timedelta(days=day.weekday())).year)
+    return years
+
+
+def _digest(payload: object) -> str:
+    text = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:SHARD_DIGEST_CHARS]
+
+
+@dataclass
+class IncrementalPlan:
+    """Shards from the previous manifest to keep, and the years to rebuild."""
+
+    previous: Dict[str, object]
+    rebuilt_years: Set[int]
+
+    def kept_shards(self, name: str) -> List[Dict[str, object]]:
+        dataset = self.previous["datasets"].get(name, {})
+        return [
+            shard
+            for shard in dataset.get("shards", [])
+            if shard["year"] is not None and shard["year"] not in self.rebuilt_years
+        ]
+
+    def dataset_query(self, name: str, query: str) -> str:
+        """Restrict a year-partitioned dataset to the rebuilt years and undated rows."""
+        if self.previous["datasets"].get(name, {}).get("partition") != "year":
+            return query
+        years = ", ".join(str(year) for year in sorted(self.rebuilt_years)) or "NULL"
+        return (
+            f"SELECT * FROM ({query}) "
+            f"WHERE {DATE_COLUMN} IS NULL OR YEAR({DATE_COLUMN}) IN ({years})"
+        )
+
+
+def read_manifest(manifest_path: Path) -> Optional[Dict[str, object]]:
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == MANIFEST_FORMAT else None
+
+
+def manifest_shards_exist(manifest: Dict[str, object], package_dir: Path, binary: bool) -> bool:
+    for dataset in manifest["datasets"].values():
+        for shard in dataset["shards"]:
+            path = package_dir / shard["path"]
+            if not path.exists() or (binary and not path.with_suffix(".bin").exists()):
+                return False
+    return True
+
+
+class TypedArrayBuffer:
+    """Little-endian binary file of typed arrays, each aligned for zero-copy views."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("wb")
+        self._offset = 0
+
+    def close(self) -> None:
+        self._file.close()
+
+    def append(self, values: pa.Array, dtype: str) -> Dict[str, object]:
+        if values.null_count:
+            # Typed integer arrays cannot hold null, so promote to float64 with NaN.
+            dtype = "float64"
+            values = pc.fill_null(values.cast(pa.float64()), float("nan"))
+        data = values.to_numpy(zero_copy_only=False).astype(f"<{NUMPY_DTYPES[dtype]}").tobytes()
+        padding = -self._offset % BUFFER_ALIGNMENT
+        self._file.write(b"\0" * padding + data)
+        self._offset += padding
+        descriptor = {"dtype": dtype, "offset": self._offset, "length": len(values)}
+        self._offset += len(data)
+        return descriptor
+
+
+class ColumnarEncoder:
+    """Encode Arrow tables column by column against package-wide dictionaries.
+
+    Low-cardinality text columns are codes into shared dictionaries, dates are
+    integer day offsets from a per-column epoch, and numbers are plain arrays,
+    or typed-array views into a ``TypedArrayBuffer`` when one is given.
+    """
+
+    def __init__(self, dictionaries: Optional[Dict[str, List[str]]] = None) -> None:
+        # Seeding with a previous package's dictionaries keeps existing codes
+        # stable, so shards that are reused rather than rebuilt still decode.
+        self.dictionaries: Dict[str, List[str]] = {
+            domain: list(values) for domain, values in (dictionaries or {}).items()
+        }
+        self._codes: Dict[str, Dict[str, int]] = {
+            domain: {value: code for code, value in enumerate(values)}
+            for domain, values in self.dictionaries.items()
+        }
+
+    def encode_table(
+        self, table: pa.Table, buffer: Optional[TypedArrayBuffer] = None
+    ) -> Dict[str, object]:
+        encoded: Dict[str, object] = {
+            "rows": table.num_rows,
+            "columns": {
+                column_name: self._encode(column_name, table.column(column_name), buffer)
+                for column_name in table.column_names
+            },
+        }
+        index = self._index(table, buffer)
+        if index:
+            encoded["index"] = index
+        return encoded
+
+    def _index(self, table: pa.Table, buffer: Optional[TypedArrayBuffer]) -> Dict[str, object]:
+        """Row indexes that let the dashboard filter without scanning every row.
+
+        ``date.starts[k]`` is the first row whose date is ``k`` days after the
+        date column's epoch (the table is date-sorted, nulls last), so a date
+        range is one contiguous row span. ``postings[column]`` lists the row
+        ids of each dictionary code in CSR form: code ``c`` owns
+        ``ids[offsets[c]:offsets[c + 1]]``, ascending.
+        """
+        index: Dict[str, object] = {}
+        if DATE_COLUMN in table.column_names and table.num_rows:
+            days = pc.drop_null(table.column(DATE_COLUMN).combine_chunks().cast(pa.int32()))
+            offsets = days.to_numpy() - (pc.min(days).as_py() or 0)
+            span = int(offsets[-1]) + 1 if len(offsets) else 0
+            index["date"] = {
+                "column": DATE_COLUMN,
+                "starts": np.searchsorted(offsets, np.arange(span + 1)).tolist(),
+            }
+        postings: Dict[str, object] = {}
+        for name in POSTING_COLUMNS:
+            domain = DICTIONARY_DOMAINS.get(name)
+            if name not in table.column_names or domain is None:
+                continue
+            codes = self._dictionary_codes(domain, table.column(name).combine_chunks())
+            codes = codes.to_numpy(zero_copy_only=False)
+            rows = np.flatnonzero(codes >= 0)
+            ids = rows[np.argsort(codes[rows], kind="stable")]
+            counts = np.bincount(codes[rows], minlength=len(self.dictionaries[domain]))
+            postings[name] = {
+                "offsets": np.concatenate(([0], np.cumsum(counts))).tolist(),
+                **_numbers(pa.array(ids, pa.int32()), "int32", buffer),
+            }
+        if postings:
+            index["postings"] = postings
+        return index
+
+    def _encode(
+        self, name: str, column: pa.ChunkedArray, buffer: Optional[TypedArrayBuffer]
+    ) -> Dict[str, object]:
+        column = column.combine_chunks()
+        if pa.types.is_date(column.type):
+            days = column.cast(pa.int32())
+            epoch = pc.min(days).as_py() or 0
+            offsets = pc.subtract(days, pa.scalar(epoch, pa.int32()))
+            return {
+                "encoding": "day",
+                "epoch": str(date(1970, 1, 1) + timedelta(days=epoch)),
+                **_numbers(offsets, "int32", buffer),
+            }
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            domain = DICTIONARY_DOMAINS.get(name)
+            if domain is None:
+                return {"encoding": "string", "data": column.to_pylist()}
+            codes = self._dictionary_codes(domain, column)
+            size = len(self.dictionaries[domain])
+            dtype = "int8" if size < 2**7 else "int16" if size < 2**15 else "int32"
+            return {"encoding": "dict", "domain": domain, **_numbers(codes, dtype, buffer)}
+        if pa.types.is_integer(column.type) and _fits_int32(column):
+            return {"encoding": "plain", **_numbers(column, "int32", buffer)}
+        return {
+            "encoding": "plain",
+            **_numbers(column.cast(pa.float64()), "float64", buffer),
+        }
+
+    def _dictionary_codes(self, domain: str, column: pa.Array) -> pa.Array:
+        values = self.dictionaries.setdefault(domain, [])
+        codes = self._codes.setdefault(domain, {})
+        for value in pc.unique(column).to_pylist():
+            if value is not None and value not in codes:
+                codes[value] = len(values)
+                values.append(value)
+        # Nulls become -1 so every code fits a signed typed array.
+        return pc.fill_null(pc.index_in(column, value_set=pa.array(values)), -1)
+
+
+def _numbers(
+    values: pa.Array, dtype: str, buffer: Optional[TypedArrayBuffer]
+) -> Dict[str, object]:
+    if buffer is None:
+        return {"data": _json_array(values)}
+    return buffer.append(values, dtype)
+
+
+@dataclass(frozen=True)
+class RawJson:
+    """Pre-rendered JSON text that ``_json_text`` splices in verbatim."""
+
+    text: str
+
+
+def _json_array(values: pa.Array) -> RawJson:
+    """Render a numeric array as JSON text in Arrow, without per-value Python objects."""
+    if pa.types.is_floating(values.type) and not pc.all(pc.is_finite(values)).as_py():
+        raise ValueError("Out of range float values are not JSON compliant")
+    text = pc.fill_null(values.cast(pa.string()), "null")
+    offsets = pa.array([0, len(text)], pa.int32())
+    joined = pc.binary_join(pa.ListArray.from_arrays(offsets, text), ",")
+    return RawJson("[" + joined[0].as_py() + "]")
+
+
+class ColumnarWriter:
+    """Collect every dataset into the single ``dashboard_data.columnar.json`` package.
+
+    Each dataset is encoded as soon as it is added and spilled to a part file in
+    ``parts_dir``; ``write`` stitches the parts under the final dictionaries, so
+    only one dataset's encoding is in memory at a time.
+    """
+
+    def __init__(
+        self, encoder: ColumnarEncoder, parts_dir: Path, buffer_path: Optional[Path] = None
+    ) -> None:
+        self.encoder = encoder
+        self.parts_dir = parts_dir
+        self.parts: Dict[str, Path] = {}
+        self.buffer = TypedArrayBuffer(buffer_path) if buffer_path is not None else None
+
+    def close(self) -> None:
+        if self.buffer is not None:
+            self.buffer.close()
+
+    def add_dataset(self, name: str, table: pa.Table) -> None:
+        part_path = self.parts_dir / f"{name}.columnar.json"
+        with part_path.open("w", encoding="utf-8") as part:
+            _write_json(part, self.encoder.encode_table(table, self.buffer))
+        self.parts[name] = part_path
+
+    def write(self, path: Path, generated_at: str, meta: Dict[str, object]) -> None:
+        with path.open("w", encoding="utf-8") as out:
+            out.write(
+                '{"format":' + json.dumps(COLUMNAR_FORMAT)
+                + ',"generated_at":' + json.dumps(generated_at)
+                + ',"dictionaries":' + _json_text(self.encoder.dictionaries)
+                + ',"datasets":{'
+            )
+            for position, (name, part_path) in enumerate(self.parts.items()):
+                out.write(("," if position else "") + json.dumps(name) + ":")
+                with part_path.open("r", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, out)
+                part_path.unlink()
+            out.write('},"meta":' + _json_text(meta))
+            if self.buffer is not None:
+                buffer_name = self.buffer.path.name.removesuffix(TEMP_SUFFIX)
+                out.write(',"buffer":' + json.dumps(buffer_name))
+            out.write("}")
+
+
+class ShardWriter:
+    """Split datasets into per-year columnar shards listed by ``manifest.json``.
+
+    Datasets with a ``purchase_date`` column get one shard per purchase year so
+    the dashboard can fetch only the years in its date range; the rest get a
+    single shard. Shard files are named by a hash of their content and never
+    rewritten, so the manifest swap is the only step readers can observe and
+    unchanged shards keep their URLs (and CDN cache entries) across builds.
+    Dictionaries live in the manifest and are shared by every shard.
+
+    With ``reuse`` set, year shards of ``previous`` datasets outside
+    ``reuse.rebuilt_years`` are carried over as-is and only the rebuilt years
+    plus undated rows of each table given to ``add_dataset`` are written.
+    """
+
+    def __init__(
+        self,
+        shard_dir: Path,
+        encoder: ColumnarEncoder,
+        binary: bool = False,
+        reuse: Optional[IncrementalPlan] = None,
+    ) -> None:
+        self.shard_dir = shard_dir
+        self.encoder = encoder
+        self.binary = binary
+        self.reuse = reuse
+        self.datasets: Dict[str, Dict[str, object]] = {}
+
+    def add_dataset(self, name: str, table: pa.Table) -> None:
+        if DATE_COLUMN not in table.column_names:
+            parts: List[Tuple[Optional[int], pa.Table]] = [(None, table)]
+            partition = None
+        else:
+            years = pc.year(table.column(DATE_COLUMN))
+            parts = [
+                (year, table.filter(pc.equal(years, year)))
+                for year in sorted(_distinct(years))
+            ]
+            if years.null_count:
+                parts.append((None, table.filter(pc.is_null(years))))
+            partition = "year"
+            if self.reuse is not None:
+                parts = [
+                    (year, part)
+                    for year, part in parts
+                    if year is None or year in self.reuse.rebuilt_years
+                ]
+        shards = [self._write_shard(name, year, part) for year, part in parts]
+        if self.reuse is not None and partition == "year":
+            shards += self.reuse.kept_shards(name)
+            shards.sort(key=lambda shard: (shard["year"] is None, shard["year"] or 0))
+        self.datasets[name] = {
+            "rows": sum(shard["rows"] for shard in shards),
+            "partition": partition,
+            "shards": shards,
+        }
+
+    def _write_shard(self, name: str, year: Optional[int], table: pa.Table) -> Dict[str, object]:
+        dataset_dir = self.shard_dir / name
+        dataset_dir.mkdir(parents=True, exist_ok=True)
+        label = str(year) if year is not None else "all"
+        buffer = None
+        if self.binary:
+            buffer = TypedArrayBuffer(temp_path_for(dataset_dir / f"{label}.bin"))
+        try:
+            header: Dict[str, object] = {
+                "format": COLUMNAR_FORMAT,
+                "datasets": {name: self.encoder.encode_table(table, buffer)},
+            }
+        finally:
+            if buffer is not None:
+                buffer.close()
+
+        header_text = _json_text(header)
+        digest = hashlib.sha256(header_text.encode("utf-8"))
+        if buffer is not None:
+            digest.update(buffer.path.read_bytes())
+        stem = f"{label}-{digest.hexdigest()[:SHARD_DIGEST_CHARS]}"
+        if buffer is not None:
+            header["buffer"] = f"{stem}.bin"
+            _publish(buffer.path, dataset_dir / header["buffer"])
+        shard_path = dataset_dir / f"{stem}.json"
+        if buffer is not None:
+            header_text = _json_text(header)
+        temp_path_for(shard_path).write_text(header_text, encoding="utf-8")
+        _publish(temp_path_for(shard_path), shard_path)
+        return {
+            "year": year,
+            "rows": table.num_rows,
+            "path": shard_path.relative_to(self.shard_dir.parent).as_posix(),
+        }
+
+    def manifest(
+        self, generated_at: str, meta: Dict[str, object], source: Dict[str, object]
+    ) -> Dict[str, object]:
+        return {
+            "format": MANIFEST_FORMAT,
+            "generated_at": generated_at,
+            "dictionaries": self.encoder.dictionaries,
+            "datasets": self.datasets,
+            "meta": meta,
+            "source": source,
+        }
+
+    def prune(self) -> int:
+        """Delete shard files the current manifest no longer references."""
+        keep = {
+            self.shard_dir.parent / shard["path"]
+            for dataset in self.datasets.values()
+            for shard in dataset["shards"]
+        }
+        keep |= {path.with_suffix(".bin") for path in keep}
+        removed = 0
+        for path in self.shard_dir.glob("*/*"):
+            if path.is_file() and path not in keep:
+                path.unlink()
+                removed += 1
+        return removed
+
+
+def _write_json(out: TextIO, payload: object) -> None:
+    """Write ``payload`` like ``_json_text`` without building the whole text."""
+    if isinstance(payload, RawJson):
+        out.write(payload.text)
+    elif isinstance(payload, dict):
+        out.write("{")
+        for position, (key, value) in enumerate(payload.items()):
+            out.write(("," if position else "") + json.dumps(key, ensure_ascii=False) + ":")
+            _write_json(out, value)
+        out.write("}")
+    else:
+        out.write(_json_text(payload))
+
+
+def _json_text(payload: object) -> str:
+    raw: List[str] = []
+
+    def stash(value: object) -> str:
+        if not isinstance(value, RawJson):
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+        raw.append(value.text)
+        return f"\0{len(raw) - 1}"
+
+    text = json.dumps(
+        payload, ensure_ascii=False, separators=(",", ":"), allow_nan=False, default=stash
+    )
+    if not raw:
+        return text
+    return RAW_JSON_PLACEHOLDER.sub(lambda match: raw[int(match.group(1))], text)
+
+
+def _publish(temp_path: Path, final_path: Path) -> None:
+    """Move a content-addressed file into place unless an identical one exists."""
+    if final_path.exists():
+        temp_path.unlink()
+    else:
+        os.replace(temp_path, final_path)
+
+
+class TableCollector:
+    """Hold a dataset's table so a worker thread can hand it to the shared writers."""
+
+    def __init__(self) -> None:
+        self.table: Optional[pa.Table] = None
+
+    def add_dataset(self, name: str, table: pa.Table) -> None:
+        self.table = table
+
+
+DatasetWriter = Union[ColumnarWriter, ShardWriter, TableCollector]
+
+
+@dataclass
+class DatasetResult:
+    name: str
+    rows: int
+    duration_s: float
+    meta: PackageMeta
+    table: Optional[pa.Table] = None
+    rows_path: Optional[Path] = None
+
+
+def stream_dataset(
+    conn: duckdb.DuckDBPyConnection,
+    name: str,
+    query: str,
+    out: Optional[TextIO],
+    meta: Optional[PackageMeta] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    writers: Sequence[DatasetWriter] = (),
+) -> int:
+    """Write one dataset as a JSON array of row objects, one record batch at a time.
+
+    The same batches feed ``writers`` when given; they need the whole dataset,
+    so only Arrow's compact column buffers are held, never per-row objects.
+    """
+    reader = arrow_batches(conn, query, batch_rows)
+    batches: List[pa.RecordBatch] = []
+    if out is not None:
+        out.write("[")
+    rows = 0
+    for batch in reader:
+        if batch.num_rows == 0:
+            continue
+        if meta is not None:
+            meta.update(name, batch)
+        if writers:
+            batches.append(batch)
+        if out is not None:
+            # Render row objects a slice at a time; a whole batch of dicts
+            # would dwarf the Arrow batch itself.
+            text_batch = dates_as_text(batch)
+            for offset in range(0, text_batch.num_rows, ROW_JSON_SLICE):
+                chunk = ",".join(
+                    json.dumps(record, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+                    for record in text_batch.slice(offset, ROW_JSON_SLICE).to_pylist()
+                )
+                out.write(("," if rows or offset else "") + chunk)
+        rows += batch.num_rows
+    if out is not None:
+        out.write("]")
+    if writers:
+        table = sorted_by_date(pa.Table.from_batches(batches, schema=reader.schema))
+        for writer in writers:
+            writer.add_dataset(name, table)
+    return rows
+
+
+def sorted_by_date(table: pa.Table) -> pa.Table:
+    """Stable-sort by the date column (nulls last) unless the query already did."""
+    if DATE_COLUMN not in table.column_names or table.num_rows < 2:
+        return table
+    dates = table.column(DATE_COLUMN)
+    if dates.null_count == 0 and pc.all(
+        pc.less_equal(dates.slice(0, len(dates) - 1), dates.slice(1))
+    ).as_py():
+        return table
+    # sort_indices is stable and places nulls last by default.
+    return table.take(pc.sort_indices(table, sort_keys=[(DATE_COLUMN, "ascending")]))
+
+
+def generate_dataset(
+    conn: duckdb.DuckDBPyConnection,
+    name: str,
+    query: str,
+    rows_path: Optional[Path],
+    keep_table: bool,
+    batch_rows: int,
+) -> DatasetResult:
+    """Run one dataset on its own cursor, streaming row JSON to ``rows_path``."""
+    started = time.perf_counter()
+    meta = PackageMeta()
+    collector = TableCollector()
+    cursor = source_cursor(conn)
+    out = rows_path.open("w", encoding="utf-8") if rows_path is not None else None
+    try:
+        rows = stream_dataset(
+            cursor, name, query, out, meta, batch_rows, [collector] if keep_table else ()
+        )
+    finally:
+        if out is not None:
+            out.close()
+        cursor.close()
+    return DatasetResult(
+        name=name,
+        rows=rows,
+        duration_s=time.perf_counter() - started,
+        meta=meta,
+        table=collector.table,
+        rows_path=rows_path,
+    )
+
+
+def columnar_path_for(output_path: Path) -> Path:
+    return output_path.with_name(output_path.stem + ".columnar.json")
 
 
 def main() -> None:
@@ -253,24 +1133,187 @@ def main() -> None:
             f"DuckDB warehouse file not found: {db_path}. Run ETL pipeline first."
         )
 
-    payload: Dict[str, object] = {
-        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-    }
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_path.with_name(MANIFEST_NAME)
+    generator = generator_fingerprint(args.formats, args.binary)
+    # A previous manifest is only reusable when it was built the same way.
+    previous = None if args.full_refresh else read_manifest(manifest_path)
+    if previous is not None and previous.get("source", {}).get("generator") != generator:
+        previous = None
 
-    with duckdb.connect(str(db_path)) as conn:
-        for name, query in QUERY_MAP.items():
-            payload[name] = dataframe_to_records(conn.execute(query).df())
+    with connect_sources(db_path) as conn:
+        fingerprint = warehouse_fingerprint(conn, db_path)
+        if (
+            previous is not None
+            and previous["source"].get("warehouse") == fingerprint
+            and all(path.exists() for path in package_paths(output_path, args.formats, args.binary))
+            and manifest_shards_exist(previous, output_path.parent, args.binary)
+        ):
+            print(
+                f"[data] warehouse unchanged since {previous['generated_at']} "
+                f"(fingerprint {fingerprint}); package is up to date"
+            )
+            return
+        write_package(
+            conn,
+            args,
+            output_path,
+            previous,
+            {"warehouse": fingerprint, "generator": generator},
+        )
 
-    payload["meta"] = build_meta(payload["orders_base"])
-    payload["meta"]["categories"] = sorted(
-        {row["product_category"] for row in payload.get("category_base", [])}
-    )
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+def package_paths(output_path: Path, formats: Sequence[str], binary: bool) -> List[Path]:
+    columnar_path = columnar_path_for(output_path)
+    paths: List[Path] = []
+    if "rows" in formats:
+        paths.append(output_path)
+    if "columnar" in formats:
+        paths.append(columnar_path)
+        if binary:
+            paths.append(columnar_path.with_suffix(".bin"))
+    if "shards" in formats:
+        paths.append(output_path.with_name(MANIFEST_NAME))
+    return paths
+
+
+def write_package(
+    conn: duckdb.DuckDBPyConnection,
+    args: argparse.Namespace,
+    output_path: Path,
+    previous: Optional[Dict[str, object]],
+    source: Dict[str, object],
+) -> None:
+    """Generate every requested package, reusing unchanged shards when possible.
+
+    ``previous`` is the last manifest built with the same settings. It seeds
+    the dictionaries so codes stay stable. Shard years whose day checksums did
+    not move keep their shards; when shards are the only package those years
+    are not even queried, otherwise the single-file packages are regenerated
+    in full and the shard writer skips the kept years.
+    """
+    formats = args.formats
+    columnar_path = columnar_path_for(output_path)
+    buffer_path = columnar_path.with_suffix(".bin")
+    manifest_path = output_path.with_name(MANIFEST_NAME)
+    generated_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    meta = PackageMeta()
+    encoder = ColumnarEncoder(previous["dictionaries"] if previous is not None else None)
+
+    started = time.perf_counter()
+    clean_rows = materialize_clean_orders(conn)
+    checksums = day_checksums(conn)
+    source = {**source, "day_checksums": checksums}
+    print(f"[data] clean_orders: {clean_rows} rows in {time.perf_counter() - started:.2f}s")
+
+    plan = None
+    if previous is not None and "shards" in formats:
+        old_checksums = previous["source"].get("day_checksums", {})
+        changed = {
+            day
+            for day in set(old_checksums) | set(checksums)
+            if old_checksums.get(day) != checksums.get(day)
+        }
+        plan = IncrementalPlan(previous, affected_years(changed))
+        print(
+            f"[data] {len(changed)} changed days; rebuilding shard years "
+            f"{sorted(plan.rebuilt_years) or 'none'} plus undated shards"
+        )
+    # Restricting the queries to rebuilt years is only safe when no other
+    # package needs every row; meta then comes from the sources instead.
+    query_plan = plan if set(formats) == {"shards"} else None
+    if query_plan is not None:
+        meta.update_from_sources(conn)
+
+    # Write into sibling temp files and swap them in, so readers never see a
+    # partial package.
+    final_paths = package_paths(output_path, formats, args.binary)
+    jobs = max(1, args.jobs)
+    out = None
+    columnar = None
+    shards = None
+    try:
+        with tempfile.TemporaryDirectory(
+            prefix=".parts-", dir=output_path.parent
+        ) as parts_dir, ThreadPoolExecutor(max_workers=jobs) as pool:
+            writers: List[DatasetWriter] = []
+            if "columnar" in formats:
+                columnar = ColumnarWriter(
+                    encoder, Path(parts_dir), temp_path_for(buffer_path) if args.binary else None
+                )
+                writers.append(columnar)
+            if "shards" in formats:
+                shards = ShardWriter(
+                    output_path.parent / SHARD_DIR_NAME, encoder, args.binary, plan
+                )
+                writers.append(shards)
+            if "rows" in formats:
+                out = temp_path_for(output_path).open("w", encoding="utf-8")
+                out.write("{" + json.dumps("generated_at") + ":" + json.dumps(generated_at))
+
+            # At most ``jobs`` datasets are queried ahead of the one being
+            # written, so only that many Arrow tables are alive at once.
+            datasets = iter(QUERY_MAP.items())
+            queued = deque()
+
+            def submit_next() -> None:
+                item = next(datasets, None)
+                if item is None:
+                    return
+                name, query = item
+                queued.append(
+                    pool.submit(
+                        generate_dataset,
+                        conn,
+                        name,
+                        query_plan.dataset_query(name, query) if query_plan is not None else query,
+                        Path(parts_dir) / f"{name}.json" if out is not None else None,
+                        bool(writers),
+                        args.batch_rows,
+                    )
+                )
+
+            for _ in range(jobs):
+                submit_next()
+            # Consume in QUERY_MAP order so dictionary codes and the row
+            # package layout do not depend on which query finishes first.
+            while queued:
+                result = queued.popleft().result()
+                submit_next()
+                meta.merge(result.meta)
+                if out is not None:
+                    out.write("," + json.dumps(result.name) + ":")
+                    with result.rows_path.open("r", encoding="utf-8") as part:
+                        shutil.copyfileobj(part, out)
+                    result.rows_path.unlink()
+                for writer in writers:
+                    writer.add_dataset(result.name, result.table)
+                print(f"[data] {result.name}: {result.rows} rows in {result.duration_s:.2f}s")
+                # Drop the table before waiting on the next dataset.
+                result = None
+
+            if out is not None:
+                out.write(',"meta":' + _json_text(meta.as_dict()) + "}")
+            if columnar is not None:
+                columnar.write(temp_path_for(columnar_path), generated_at, meta.as_dict())
+            if shards is not None:
+                temp_path_for(manifest_path).write_text(
+                    _json_text(shards.manifest(generated_at, meta.as_dict(), source)),
+                    encoding="utf-8",
+                )
+    finally:
+        if out is not None:
+            out.close()
+        if columnar is not None:
+            columnar.close()
 
-    print(f"[done] wrote dashboard data package: {output_path}")
+    for path in final_paths:
+        os.replace(temp_path_for(path), path)
+        print(f"[done] wrote dashboard data package: {path}")
+    if shards is not None:
+        removed = shards.prune()
+        shard_count = sum(len(dataset["shards"]) for dataset in shards.datasets.values())
+        print(f"[data] {shard_count} shards referenced, {removed} stale shard files removed")
 
 
 if __name__ == "__main__":